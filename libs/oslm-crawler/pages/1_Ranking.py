@@ -1,14 +1,18 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
+from oslm_crawler.catalog import SnapshotCatalog
+from oslm_crawler.service import DIMENSIONS, RankingService
 
 root_path = Path(__file__).parents[1]
-choices = []
 
-for path in (root_path / 'data').glob("????-??-??"):
-    overall_rank_path = path / 'overall-rank.csv'
-    if overall_rank_path.exists():
-        choices.append(path.name)
+
+@st.cache_resource
+def ranking_service():
+    return RankingService(root_path / 'data')
+
+
+choices = SnapshotCatalog.load(root_path / 'data').dates(require='overall-rank.csv')
         
 option = st.selectbox(
     "Select date",
@@ -22,4 +26,14 @@ else:
     cur_path = root_path / 'data' / option / 'overall-rank.csv'
 
 data = pd.read_csv(cur_path, index_col='org')
-data
\ No newline at end of file
+
+with st.expander("Customize"):
+    orgs = st.multiselect("Organizations", data.index.tolist(), default=data.index.tolist())
+    dimensions = st.multiselect("Dimensions", DIMENSIONS, default=DIMENSIONS)
+
+if not orgs or not dimensions:
+    st.warning("Select at least one organization and one dimension.")
+else:
+    if set(orgs) != set(data.index) or dimensions != DIMENSIONS:
+        data = ranking_service().rank(option, orgs, dimensions, accumulated=accumulate)['overall']
+    data
\ No newline at end of file
@@ -2,6 +2,7 @@ import json
 import streamlit as st
 import pandas as pd
 from pathlib import Path
+from oslm_crawler.catalog import SnapshotCatalog
 
 def set_multi_level_columns(df, mapping):
     new_columns = []
@@ -17,12 +18,7 @@ key_path = Path(__file__).parents[1] / 'config/ranking-key-zh.json'
 with key_path.open('r', encoding='utf-8') as f:
     mapping = json.load(f)['Data']
 
-choices = []
-
-for path in (root_path / 'data').glob("????-??-??"):
-    overall_rank_path = path / 'data-rank.csv'
-    if overall_rank_path.exists():
-        choices.append(path.name)
+choices = SnapshotCatalog.load(root_path / 'data').dates(require='data-rank.csv')
         
 option = st.selectbox(
     "Select date",
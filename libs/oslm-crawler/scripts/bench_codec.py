@@ -0,0 +1,70 @@
+import io
+import time
+import argparse
+import jsonlines
+from pathlib import Path
+from oslm_crawler import codec
+
+
+def bench(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(paths, repeat):
+    for path in paths:
+        with jsonlines.open(path, 'r') as f:
+            records = list(f)
+        print(f"{path} ({path.stat().st_size / 2**20:.1f} MiB, {len(records)} records)")
+
+        def read_jsonlines():
+            with jsonlines.open(path, 'r') as f:
+                list(f)
+
+        def read_open_jsonl():
+            with codec.open_jsonl(path, 'r') as f:
+                list(f)
+
+        def read_iter_jsonl():
+            list(codec.iter_jsonl(path))
+
+        def write_jsonlines():
+            jsonlines.Writer(io.StringIO()).write_all(records)
+
+        def write_jsonl_writer():
+            codec.jsonl_writer(io.StringIO()).write_all(records)
+
+        # (operation, codec, label, function)
+        cases = [('read', 'json', 'jsonlines', read_jsonlines)]
+        for name in codec.CODECS:
+            cases.append(('read', name, f'{name} open_jsonl', read_open_jsonl))
+            cases.append(('read', name, f'{name} iter_jsonl', read_iter_jsonl))
+        cases.append(('write', 'json', 'jsonlines', write_jsonlines))
+        for name in codec.CODECS:
+            cases.append(('write', name, f'{name} jsonl_writer', write_jsonl_writer))
+
+        baseline = {}
+        for op, name, label, func in cases:
+            codec.set_codec(name)
+            elapsed = bench(func, repeat)
+            baseline.setdefault(op, elapsed)
+            print(f"  {op:5s} {label:22s} {elapsed * 1000:8.1f} ms  x{baseline[op] / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the JSONL codecs with plain jsonlines.")
+    parser.add_argument("paths", nargs="*", help="JSONL files, default: the largest files under data/")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.paths:
+        paths = [Path(p) for p in args.paths]
+    else:
+        data_path = Path(__file__).parents[1] / 'data'
+        paths = sorted(data_path.rglob('*.jsonl'), key=lambda p: p.stat().st_size)[-3:]
+    main(paths, args.repeat)
@@ -0,0 +1,121 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import yaml
+from pathlib import Path
+from oslm_crawler.summary import summarize_datasets, summarize_models, LIFECYCLES
+
+MODEL_MODALITIES = ['Language', 'Speech', 'Vision', 'Multimodal', 'Protein', 'Vector', '3D', 'Embodied']
+DATASET_MODALITIES = ['Language', 'Speech', 'Vision', 'Multimodal', 'Embodied']
+# Records of the 2025-09-07 snapshot.
+BASE_MODELS = 4217
+BASE_DATASETS = 1765
+
+
+def synthetic(rows, modalities, lifecycles, orgs, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'org': rng.choice(orgs, rows),
+        'modality': rng.choice(modalities + [None], rows),
+        'downloads_last_month': rng.integers(0, 100_000, rows),
+        'likes': rng.integers(0, 1000, rows),
+        'community': rng.integers(0, 100, rows),
+        'descendants': rng.integers(0, 50, rows),
+        'dataset_usage': rng.integers(0, 50, rows),
+    })
+    if lifecycles:
+        df['lifecycle'] = rng.choice(lifecycles, rows)
+    return df
+
+
+def legacy_datasets(df, weights, target_orgs, downloads, other):
+    """The per-key filtering the ranking pipelines used before `oslm_crawler.summary`."""
+    res = pd.DataFrame(index=target_orgs)
+    for key in weights.keys():
+        suffix = key.split("_")[-1]
+        col, label = ('lifecycle', LIFECYCLES[suffix]) if suffix in LIFECYCLES else ('modality', suffix.title())
+        if key.startswith('num'):
+            res[key] = df[df[col] == label].groupby('org').size().reindex(target_orgs, fill_value=0)
+            res[key] += other[other[col] == label].groupby('org').size().reindex(target_orgs, fill_value=0)
+        elif key.startswith('downloads'):
+            res[key] = df[df[col] == label].groupby('org')[downloads].sum().reindex(target_orgs, fill_value=0)
+        elif key == 'dataset_usage':
+            res[key] = df.groupby('org')['dataset_usage'].sum().reindex(target_orgs, fill_value=0)
+        elif key == 'operators':
+            res[key] = pd.Series({"BAAI": 24, "Ali": 105}).reindex(target_orgs, fill_value=0)
+    res.index.name = 'org'
+    return res
+
+
+def legacy_models(df, weights, target_orgs, downloads):
+    res = pd.DataFrame(index=target_orgs)
+    counters = {'descendants': 'descendants', 'likes': 'likes', 'issue': 'community'}
+    for key in weights.keys():
+        if key.startswith('num') and key != 'num_adapted_chips':
+            modality = key.split("_")[-1].title()
+            res[key] = df[df['modality'] == modality].groupby('org').size().reindex(target_orgs, fill_value=0)
+        elif key.startswith('downloads'):
+            modality = key.split("_")[-1].title()
+            res[key] = df[df['modality'] == modality].groupby('org')[downloads].sum().reindex(
+                target_orgs, fill_value=0)
+        elif key in counters:
+            res[key] = df.groupby('org')[counters[key]].sum().reindex(target_orgs, fill_value=0)
+        elif key == 'num_adapted_chips':
+            res[key] = pd.Series({"BAAI": 4, "Baidu": 2, "Huawei": 2, "Meta": 2, "Google": 2,
+                                  "ByteDance": 2}).reindex(target_orgs, fill_value=1)
+    res.index.name = 'org'
+    return res
+
+
+def bench(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, res
+
+
+def main(scales, num_orgs, repeat):
+    config_path = Path(__file__).parents[1] / 'config/default_task.yaml'
+    ranking = yaml.safe_load(config_path.read_text())['RankingPipeline']['ranking']
+    data_weights = ranking['data_config'][1]
+    model_weights = ranking['model_config'][1]
+    orgs = [f'org-{i}' for i in range(num_orgs)]
+    target_orgs = orgs[:num_orgs // 2]
+    lifecycles = list(LIFECYCLES.values()) + ['Evaluation']
+
+    for scale in scales:
+        models = synthetic(BASE_MODELS * scale, MODEL_MODALITIES, None, orgs, scale)
+        datasets = synthetic(BASE_DATASETS * scale, DATASET_MODALITIES, lifecycles, orgs, scale + 1)
+        other = synthetic(130, DATASET_MODALITIES, lifecycles, orgs, 0)
+        print(f"x{scale}: {len(models)} models, {len(datasets)} datasets, {num_orgs} orgs")
+
+        cases = [
+            ('datasets', lambda: legacy_datasets(
+                datasets, data_weights, target_orgs, 'downloads_last_month', other),
+             lambda: summarize_datasets(
+                 datasets, data_weights, target_orgs, 'downloads_last_month', other)),
+            ('models', lambda: legacy_models(
+                models, model_weights, target_orgs, 'downloads_last_month'),
+             lambda: summarize_models(models, model_weights, target_orgs, 'downloads_last_month')),
+        ]
+        for name, legacy, engine in cases:
+            legacy_time, expected = bench(legacy, repeat)
+            engine_time, res = bench(engine, repeat)
+            pd.testing.assert_frame_equal(res, expected)
+            print(f"  {name:8s} per-key {legacy_time * 1000:8.1f} ms  "
+                  f"grouped {engine_time * 1000:8.1f} ms  x{legacy_time / engine_time:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the grouped summary engine with per-key filtering on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="*", default=[1, 10, 100],
+                        help="Multiples of the current snapshot size")
+    parser.add_argument("--orgs", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.scales, args.orgs, args.repeat)
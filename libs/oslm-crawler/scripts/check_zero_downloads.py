@@ -1,10 +1,10 @@
 import re
-import jsonlines
 import argparse
 from loguru import logger
 from pathlib import Path
 from tqdm import tqdm
 from oslm_crawler.ai.screenshot_checker import check_image_info, CheckRequest
+from oslm_crawler.codec import open_jsonl
 
 
 parser = argparse.ArgumentParser()
@@ -18,7 +18,7 @@ if args.from_log:
         logs = f.readlines()
     buffer = []
     path = Path(args.path)
-    with jsonlines.open(path, 'r') as f:
+    with open_jsonl(path, 'r') as f:
         for item in f:
             assert 'total_downloads' in item
             if item['total_downloads'] == 0 and item['img_path'] and Path(item['img_path']).exists():
@@ -29,7 +29,7 @@ if args.from_log:
                         downloads = int(downloads)
                         item['total_downloads'] = downloads
             buffer.append(item)
-    with jsonlines.open(path, 'w') as f:
+    with open_jsonl(path, 'w') as f:
         f.write_all(buffer)
                 
 else:
@@ -39,12 +39,12 @@ else:
     buffer = []
     count = 0
     total = 0
-    with jsonlines.open(path, 'r') as f:
+    with open_jsonl(path, 'r') as f:
         for item in f:
             if item['total_downloads'] == 0 and item['img_path'] and Path(item['img_path']).exists():
                 total += 1
     pbar = tqdm(total=total, desc="Error correction...")
-    with jsonlines.open(path, 'r') as f:
+    with open_jsonl(path, 'r') as f:
         for item in f:
             assert 'total_downloads' in item
             if item['total_downloads'] == 0 and item['img_path'] and Path(item['img_path']).exists():
@@ -65,5 +65,5 @@ else:
     pbar.close()
     print(f'successful: {count}, total: {total}')
 
-    with jsonlines.open(path, 'w') as f:
+    with open_jsonl(path, 'w') as f:
         f.write_all(buffer)
@@ -1,21 +1,28 @@
 import argparse
-import jsonlines
 from pathlib import Path
+from oslm_crawler.codec import open_jsonl
 
 def main(ss_path):
     data_base_path = Path(__file__).parents[1] / 'data'
-    for file in data_base_path.rglob('*.jsonl'):
-        data = []
-        with jsonlines.open(file, 'r') as f:
-            for item in f:
-                if item.get('img_path') is not None:
-                    if ss_path:
-                        item['img_path'] = str(ss_path / item['img_path'].split('screenshots')[-1])
-                    else:
-                        item['img_path'] = None
-                data.append(item)
-        with jsonlines.open(file, 'w') as f:
-            f.write_all(data)
+    for pattern in ('*.jsonl', '*.jsonl.zst', '*.jsonl.gz'):
+        for file in data_base_path.rglob(pattern):
+            data = []
+            changed = False
+            with open_jsonl(file, 'r') as f:
+                for item in f:
+                    if item.get('img_path') is not None:
+                        if ss_path:
+                            img_path = str(ss_path / item['img_path'].split('screenshots')[-1])
+                        else:
+                            img_path = None
+                        changed = changed or img_path != item['img_path']
+                        item['img_path'] = img_path
+                    data.append(item)
+            # Leave untouched files (and their parquet copies) as they are.
+            if not changed:
+                continue
+            with open_jsonl(file, 'w') as f:
+                f.write_all(data)
     
 
 if __name__ == "__main__":
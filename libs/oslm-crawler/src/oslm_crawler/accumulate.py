@@ -0,0 +1,160 @@
+"""
+Running accumulation of the merged records of every snapshot.
+
+`accumulated-*-info.jsonl` of a snapshot holds, per repo/name, the attributes first seen, the
+summed `downloads_last_month` and the maximum counters over all snapshots up to it, in the order
+the keys were first seen. It is therefore also the state needed to accumulate the next snapshot:
+`Accumulator` folds the merged records of snapshot N into the accumulated records of an earlier
+snapshot. `AccumulateCheckpoints` (`data/accumulate-checkpoints.json`) records the merged files
+each accumulated file was built from, so that it is only reused while that history is unchanged.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+from .catalog import Snapshot, SnapshotCatalog
+from .parquet import iter_records
+
+
+@dataclass(frozen=True)
+class AccumulateSpec:
+    name_field: str
+    first: tuple[str, ...]
+    maxima: tuple[str, ...]
+    fields: tuple[str, ...]
+    merged_file: str
+    accumulated_file: str
+
+
+MODEL_ACCUMULATE = AccumulateSpec(
+    name_field='model_name',
+    first=('org', 'repo', 'model_name', 'modality'),
+    maxima=('likes', 'community', 'descendants'),
+    fields=('org', 'repo', 'model_name', 'modality', 'accumulated_downloads', 'likes',
+            'community', 'descendants'),
+    merged_file='merged-models-info.jsonl',
+    accumulated_file='accumulated-models-info.jsonl',
+)
+
+DATASET_ACCUMULATE = AccumulateSpec(
+    name_field='dataset_name',
+    first=('org', 'repo', 'dataset_name', 'modality', 'lifecycle'),
+    maxima=('likes', 'community', 'dataset_usage'),
+    fields=('org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'accumulated_downloads',
+            'likes', 'community', 'dataset_usage'),
+    merged_file='merged-datasets-info.jsonl',
+    accumulated_file='accumulated-datasets-info.jsonl',
+)
+
+
+class Accumulator:
+
+    def __init__(self, spec: AccumulateSpec):
+        self.spec = spec
+        self.groups: dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add(self, record: dict):
+        """Fold one merged record."""
+        spec = self.spec
+        key = f"{record['repo']}/{record[spec.name_field]}"
+        item = self.groups.get(key)
+        if item is None:
+            item = {
+                field: record['downloads_last_month'] if field == 'accumulated_downloads'
+                else record[field]
+                for field in spec.fields
+            }
+            self.groups[key] = item
+            return
+        item['accumulated_downloads'] += record['downloads_last_month']
+        for field in spec.maxima:
+            if record[field] > item[field]:
+                item[field] = record[field]
+
+    def update(self, records: Iterable[dict]) -> "Accumulator":
+        for record in records:
+            self.add(record)
+        return self
+
+    def load(self, path: str | Path) -> "Accumulator":
+        """Start from the accumulated records of an earlier snapshot."""
+        for record in iter_records(path):
+            key = f"{record['repo']}/{record[self.spec.name_field]}"
+            self.groups[key] = {field: record[field] for field in self.spec.fields}
+        return self
+
+    def results(self) -> list[dict]:
+        return list(self.groups.values())
+
+
+def _history(snapshots: list[Snapshot]) -> str:
+    checksums = []
+    for snapshot in snapshots:
+        for spec in (MODEL_ACCUMULATE, DATASET_ACCUMULATE):
+            info = snapshot.artifact(spec.merged_file)
+            checksums.append([snapshot.date, spec.merged_file, info['sha256'] if info else None])
+    return hashlib.sha256(json.dumps(checksums).encode('utf-8')).hexdigest()
+
+
+def _stat(path: Path) -> Optional[list[int]]:
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class AccumulateCheckpoints:
+
+    def __init__(self, data_path: str | Path | None = None):
+        if data_path is None:
+            data_path = Path(__file__).parents[2] / 'data'
+        self.data_path = Path(data_path)
+        self.path = self.data_path / 'accumulate-checkpoints.json'
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            with self.path.open('r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def _outputs(self, date: str) -> dict[str, Optional[list[int]]]:
+        return {
+            spec.accumulated_file: _stat(self.data_path / date / spec.accumulated_file)
+            for spec in (MODEL_ACCUMULATE, DATASET_ACCUMULATE)
+        }
+
+    def is_valid(self, history: list[Snapshot]) -> bool:
+        """Whether the accumulated files of `history[-1]` were built from exactly `history`
+        and have not been modified since."""
+        date = history[-1].date
+        entry = self.entries.get(date)
+        if entry is None or entry['history'] != _history(history):
+            return False
+        outputs = self._outputs(date)
+        return None not in outputs.values() and entry['outputs'] == outputs
+
+    def latest(self, history: list[Snapshot]) -> Optional[int]:
+        """Index of the latest snapshot of `history` with a valid checkpoint, if any."""
+        for i in range(len(history) - 1, -1, -1):
+            if self.is_valid(history[:i + 1]):
+                return i
+        return None
+
+    def record(self, history: list[Snapshot]):
+        date = history[-1].date
+        self.entries[date] = {
+            'history': _history(history),
+            'outputs': self._outputs(date),
+        }
+        tmp_path = self.path.with_suffix(f'.json.{os.getpid()}.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(dict(sorted(self.entries.items())), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def accumulation_history(catalog: SnapshotCatalog, date: str) -> list[Snapshot]:
+    """The snapshots accumulated up to `date` (the first snapshot is not part of the rankings)."""
+    return [snapshot for snapshot in catalog.snapshots()[1:] if snapshot.date <= date]
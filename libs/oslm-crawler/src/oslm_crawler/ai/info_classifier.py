@@ -0,0 +1,208 @@
+"""
+Classify models and datasets locally before falling back to the LLM generators.
+
+Two signals are combined: deterministic naming rules (e.g. `whisper` -> Speech, `bert` -> not a
+large model) and token statistics learned from the labels already recorded in `model-info.json`
+and `dataset-info.json`. Every rule and token is scored by how often it agrees with those labels,
+so the confidence reported for a prediction is an empirical precision. Only items classified with
+low confidence need to be sent to the LLM.
+"""
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+
+@dataclass
+class Classification:
+    key: str
+    info: Optional[dict]
+    confidence: float
+    method: Literal['rule', 'stats', 'none']
+
+
+# (pattern on the lowercased name, (modality, is_large_model), prior confidence)
+MODEL_RULES = [
+    (r"(^|[-_])(bert|roberta|albert|distilbert|electra|deberta|t5|mt5|bart|xlnet)([-_]|$)",
+     (None, False), 0.8),
+    (r"whisper|wav2vec|hubert|speech|tts|asr|audio|voice|paraformer|sensevoice|cosyvoice|"
+     r"fastconformer|kws|vad",
+     ("Speech", True), 0.9),
+    (r"(^|[-_])(bge|e5|gte|m3e)([-_]|$)|embedding|rerank",
+     ("Vector", True), 0.8),
+    (r"robo|(^|[-_])vla([-_]|$)|gr00t|embodied",
+     ("Embodied", True), 0.8),
+    (r"(^|[-_])(esm|esm2|protein|alphafold)([-_\d]|$)",
+     ("Protein", True), 0.8),
+    (r"(^|[-_])(clip|siglip|blip|blip2|llava|vl|vlm|mllm|paligemma|internvl|internvl2|"
+     r"internvl3|qwen-vl|cogvlm|idefics|kosmos|flux|sdxl|cogvideox|omni)([-_\d]|$)",
+     ("Multimodal", True), 0.85),
+    (r"(^|[-_])(vit|dino|dinov2|dinov3|sam|sam2|swin|convnext|resnet|yolo|detr|segformer|"
+     r"deit|beit|internimage)([-_\d]|$)",
+     ("Vision", True), 0.8),
+    (r"(^|[-_])(llama|llama2|llama3|qwen|qwen2|qwen3|chatglm|glm|baichuan|baichuan2|internlm|"
+     r"internlm2|deepseek|mistral|mixtral|gemma|phi|falcon|pythia|olmo|aquila|bloom|codegeex|"
+     r"starcoder|codellama)([-_\d]|$)",
+     ("Language", True), 0.75),
+]
+
+# (pattern on the lowercased name, (modality, lifecycle, is_valid), prior confidence)
+DATASET_RULES = [
+    (r"(^|[-_])(dpo|rlhf|preference|preferences|ultrafeedback|reward)([-_]|$)",
+     ("Language", "Preference", True), 0.6),
+    (r"(^|[-_])(sft|instruct|instruction|alpaca)([-_]|$)",
+     ("Language", "Fine-tuning", True), 0.6),
+    (r"(^|[-_])(corpus|pretrain|pretraining|fineweb|pile)([-_]|$)",
+     ("Language", "Pre-training", True), 0.6),
+]
+
+_SIZE_TOKEN = re.compile(r"^\d+(\.\d+)?[bmkt]$")
+_SPLIT_NAME = re.compile(r"[-_.\s/]+")
+
+
+def _tokens(repo: str, name: str) -> set[str]:
+    tokens = {f"repo:{repo.lower()}"}
+    for token in _SPLIT_NAME.split(name.lower()):
+        if not token or token.isdigit():
+            continue
+        if _SIZE_TOKEN.match(token):
+            token = "<size>"
+        tokens.add(token)
+    return tokens
+
+
+def _normalize(value):
+    return None if value in ('null', '') else value
+
+
+def _model_label(info: dict) -> Optional[tuple]:
+    match info.get('is_large_model'):
+        case True:
+            return (_normalize(info.get('modality')), True)
+        case False:
+            return (None, False)
+    return None
+
+
+def _dataset_label(info: dict) -> Optional[tuple]:
+    match info.get('is_valid'):
+        case True:
+            return (_normalize(info.get('modality')), info.get('lifecycle'), True)
+        case False:
+            return (None, None, False)
+    return None
+
+
+class _LabelModel:
+
+    def __init__(
+        self,
+        infos: dict[str, dict],
+        to_label,
+        rules: list[tuple[str, tuple, float]],
+        min_support: int,
+        prior_weight: int,
+    ):
+        self.rules = [(re.compile(p), label, prior) for p, label, prior in rules]
+        token_counter: dict[str, Counter] = defaultdict(Counter)
+        rule_hits = [0] * len(self.rules)
+        rule_correct = [0] * len(self.rules)
+        for key, info in infos.items():
+            if '/' not in key or not isinstance(info, dict):
+                continue
+            label = to_label(info)
+            if label is None:
+                continue
+            repo, name = key.split('/', 1)
+            for token in _tokens(repo, name):
+                token_counter[token][label] += 1
+            for i in self._matched_rules(name):
+                rule_hits[i] += 1
+                rule_correct[i] += self.rules[i][1] == label
+
+        self.token_table: dict[str, tuple[tuple, float]] = {}
+        for token, counter in token_counter.items():
+            total = sum(counter.values())
+            if total < min_support:
+                continue
+            label, count = counter.most_common(1)[0]
+            self.token_table[token] = (label, count / (total + 1))
+        self.rule_confidence = [
+            (correct + prior * prior_weight) / (hits + prior_weight)
+            for (_, _, prior), hits, correct in zip(self.rules, rule_hits, rule_correct)
+        ]
+
+    def _matched_rules(self, name: str) -> list[int]:
+        name = name.lower()
+        return [i for i, (pattern, _, _) in enumerate(self.rules) if pattern.search(name)]
+
+    def predict(self, repo: str, name: str) -> tuple[Optional[tuple], float, str]:
+        best_label, best_conf, method = None, 0.0, 'none'
+        for i in self._matched_rules(name):
+            if self.rule_confidence[i] > best_conf:
+                best_label, best_conf, method = self.rules[i][1], self.rule_confidence[i], 'rule'
+        for token in _tokens(repo, name):
+            res = self.token_table.get(token)
+            if res and res[1] > best_conf:
+                best_label, best_conf, method = res[0], res[1], 'stats'
+        return best_label, best_conf, method
+
+
+class InfoClassifier:
+
+    def __init__(
+        self,
+        model_infos: dict[str, dict] | None = None,
+        dataset_infos: dict[str, dict] | None = None,
+        min_confidence: float = 0.9,
+        min_support: int = 5,
+        prior_weight: int = 5,
+    ):
+        self.min_confidence = min_confidence
+        self.model_clf = _LabelModel(
+            model_infos or {}, _model_label, MODEL_RULES, min_support, prior_weight)
+        self.dataset_clf = _LabelModel(
+            dataset_infos or {}, _dataset_label, DATASET_RULES, min_support, prior_weight)
+        self.cache: dict[tuple[str, str], Classification] = {}
+        self.counter = Counter()
+
+    def classify_model(self, repo: str, model_name: str) -> Classification:
+        key = f"{repo}/{model_name}"
+        if ('models', key) not in self.cache:
+            label, conf, method = self.model_clf.predict(repo, model_name)
+            info = None if label is None else {
+                'modality': label[0],
+                'is_large_model': label[1],
+            }
+            self.cache[('models', key)] = Classification(key, info, conf, method)
+        return self.cache[('models', key)]
+
+    def classify_dataset(self, repo: str, dataset_name: str) -> Classification:
+        key = f"{repo}/{dataset_name}"
+        if ('datasets', key) not in self.cache:
+            label, conf, method = self.dataset_clf.predict(repo, dataset_name)
+            info = None if label is None else {
+                'modality': label[0],
+                'lifecycle': label[1],
+                'is_valid': label[2],
+            }
+            self.cache[('datasets', key)] = Classification(key, info, conf, method)
+        return self.cache[('datasets', key)]
+
+    def model_info(self, repo: str, model_name: str) -> Optional[dict]:
+        """Return the model info when the local classification is confident enough, else None."""
+        res = self.classify_model(repo, model_name)
+        if res.info is None or res.confidence < self.min_confidence:
+            self.counter['models_fallback'] += 1
+            return None
+        self.counter['models_local'] += 1
+        return res.info
+
+    def dataset_info(self, repo: str, dataset_name: str) -> Optional[dict]:
+        """Return the dataset info when the local classification is confident enough, else None."""
+        res = self.classify_dataset(repo, dataset_name)
+        if res.info is None or res.confidence < self.min_confidence:
+            self.counter['datasets_fallback'] += 1
+            return None
+        self.counter['datasets_local'] += 1
+        return res.info
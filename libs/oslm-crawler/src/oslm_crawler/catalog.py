@@ -0,0 +1,249 @@
+"""
+Catalog of the snapshot directories (`data/YYYY-MM-DD`).
+
+The catalog is persisted as `data/manifest.json` and records, for every snapshot, the sources
+crawled, the artifacts produced with their row counts, sizes and sha256 checksums, and whether the
+snapshot is complete (all sources processed, merged and ranked). Pipelines, processors, the
+Streamlit pages and the sqlite controller resolve snapshots through `SnapshotCatalog.load()`
+instead of globbing and probing the data directory themselves. Artifacts are re-hashed only when
+their size or mtime differ from the manifest, so loading the catalog in a new process only stats
+the files. A compressed artifact (`x.jsonl.zst`) stands for its plain name.
+"""
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+from .codec import COMPRESSED_SUFFIXES, compact_jsonl, open_binary
+from .downloads_index import nearest_snapshot
+
+SOURCES = ['HuggingFace', 'ModelScope', 'OpenDataLab', 'BAAIData']
+
+REQUIRED_ARTIFACTS = [
+    *[f'{source}/processed-datasets-info.jsonl' for source in SOURCES],
+    'HuggingFace/processed-models-info.jsonl',
+    'ModelScope/processed-models-info.jsonl',
+    'merged-models-info.jsonl',
+    'merged-datasets-info.jsonl',
+    'overall-rank.csv',
+]
+
+ARTIFACT_SUFFIXES = ('.jsonl', '.csv', '.json', '.parquet', '.gz', '.zst')
+
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+@dataclass
+class Snapshot:
+    date: str
+    path: Path
+    sources: list[str] = field(default_factory=list)
+    artifacts: dict[str, dict] = field(default_factory=dict)
+    complete: bool = False
+
+    def artifact(self, artifact: str) -> Optional[dict]:
+        for name in (artifact, *(artifact + suffix for suffix in COMPRESSED_SUFFIXES)):
+            if name in self.artifacts:
+                return self.artifacts[name]
+        return None
+
+    def has(self, artifact: str) -> bool:
+        return self.artifact(artifact) is not None
+
+    def rows(self, artifact: str) -> Optional[int]:
+        info = self.artifact(artifact)
+        return info['rows'] if info else None
+
+
+def _describe(path: Path) -> dict:
+    digest = hashlib.sha256()
+    lines = 0
+    with path.open('rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+            lines += chunk.count(b'\n')
+    if path.suffix in COMPRESSED_SUFFIXES:
+        lines = 0
+        with open_binary(path) as f:
+            while chunk := f.read(1 << 20):
+                lines += chunk.count(b'\n')
+    stat = path.stat()
+    return {
+        'rows': max(lines - 1, 0) if path.suffix == '.csv' else lines,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': digest.hexdigest(),
+    }
+
+
+class SnapshotCatalog:
+
+    _instances: dict[Path, "SnapshotCatalog"] = {}
+
+    def __init__(self, data_path: str | Path | None = None):
+        if data_path is None:
+            data_path = Path(__file__).parents[2] / 'data'
+        self.data_path = Path(data_path).resolve()
+        self.manifest_path = self.data_path / 'manifest.json'
+        self.manifest_mtime = None
+        self.entries: dict[str, Snapshot] = {}
+        self._read_manifest()
+
+    @classmethod
+    def load(cls, data_path: str | Path | None = None) -> "SnapshotCatalog":
+        """Return the cached catalog of `data_path`. The snapshot directories are checked against
+        the manifest once per process. Afterwards the manifest is re-read when another process
+        has rewritten it, and the catalog is refreshed when snapshot directories were added or
+        removed. New artifacts of a known snapshot are picked up by `update` or `refresh`."""
+        if data_path is None:
+            data_path = Path(__file__).parents[2] / 'data'
+        key = Path(data_path).resolve()
+        if key not in cls._instances:
+            cls._instances[key] = cls(data_path).refresh()
+        catalog = cls._instances[key]
+        if catalog._manifest_changed():
+            catalog._read_manifest()
+        if catalog._dates() != catalog.entries.keys():
+            catalog.refresh()
+        return catalog
+
+    def _dates(self) -> set[str]:
+        # One listing of the data directory, cheap enough to run on every load.
+        with os.scandir(self.data_path) as entries:
+            return {e.name for e in entries if e.is_dir() and _DATE_PATTERN.match(e.name)}
+
+    def _manifest_changed(self) -> bool:
+        if not self.manifest_path.exists():
+            return False
+        return self.manifest_path.stat().st_mtime != self.manifest_mtime
+
+    def _read_manifest(self):
+        self.entries = {}
+        if not self.manifest_path.exists():
+            return
+        with self.manifest_path.open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for date, entry in manifest.get('snapshots', {}).items():
+            self.entries[date] = Snapshot(
+                date=date,
+                path=self.data_path / date,
+                sources=entry['sources'],
+                artifacts=entry['artifacts'],
+                complete=entry['complete'],
+            )
+        self.manifest_mtime = self.manifest_path.stat().st_mtime
+
+    def _write_manifest(self):
+        manifest = {
+            'snapshots': {
+                date: {
+                    'sources': snapshot.sources,
+                    'complete': snapshot.complete,
+                    'artifacts': snapshot.artifacts,
+                }
+                for date, snapshot in sorted(self.entries.items())
+            }
+        }
+        # Unique per process, ranking workers may load the catalog concurrently.
+        tmp_path = self.manifest_path.with_suffix(f'.json.{os.getpid()}.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self.manifest_mtime = self.manifest_path.stat().st_mtime
+
+    def _scan(self, date: str) -> bool:
+        path = self.data_path / date
+        old = self.entries.get(date)
+        old_artifacts = old.artifacts if old else {}
+        artifacts = {}
+        changed = False
+        for p in sorted(path.rglob('*')):
+            if not p.is_file() or p.suffix not in ARTIFACT_SUFFIXES:
+                continue
+            name = p.relative_to(path).as_posix()
+            stat = p.stat()
+            info = old_artifacts.get(name)
+            if info is None or info['size'] != stat.st_size or info['mtime'] != stat.st_mtime:
+                info = _describe(p)
+                changed = True
+            artifacts[name] = info
+        changed = changed or artifacts.keys() != old_artifacts.keys()
+        sources = [
+            source for source in SOURCES
+            if any(name.startswith(f'{source}/') for name in artifacts)
+        ]
+        snapshot = Snapshot(date, path, sources, artifacts)
+        snapshot.complete = all(snapshot.has(name) for name in REQUIRED_ARTIFACTS)
+        self.entries[date] = snapshot
+        return changed
+
+    def refresh(self) -> "SnapshotCatalog":
+        """Synchronize the manifest with the snapshot directories on disk."""
+        dates = self._dates()
+        changed = dates != self.entries.keys()
+        for date in list(self.entries):
+            if date not in dates:
+                del self.entries[date]
+        for date in sorted(dates):
+            changed = self._scan(date) or changed
+        if changed or not self.manifest_path.exists():
+            self._write_manifest()
+            logger.debug(f"Snapshot manifest updated: {self.manifest_path}")
+        return self
+
+    def update(self, date: str) -> Snapshot:
+        """Re-scan one snapshot after its artifacts have been written."""
+        if self._manifest_changed():
+            self._read_manifest()
+        if self._scan(date):
+            self._write_manifest()
+        return self.entries[date]
+
+    def snapshots(self, require: str | None = None, complete: bool = False) -> list[Snapshot]:
+        """Return snapshots sorted by date, optionally only those containing `require` or
+        those that are complete."""
+        return [
+            snapshot for _, snapshot in sorted(self.entries.items())
+            if (require is None or snapshot.has(require)) and (not complete or snapshot.complete)
+        ]
+
+    def dates(self, require: str | None = None, complete: bool = False) -> list[str]:
+        return [snapshot.date for snapshot in self.snapshots(require, complete)]
+
+    def get(self, date: str) -> Optional[Snapshot]:
+        return self.entries.get(date)
+
+    def nearest(
+        self,
+        date: str,
+        days: int = 30,
+        max_diff: int = 15,
+        dates: list[str] | None = None,
+    ) -> Optional[Snapshot]:
+        """Return the snapshot nearest to `date - days` (among `dates` if given), or None if it
+        is more than `max_diff` days away."""
+        if dates is None:
+            dates = list(self.entries)
+        closest_date = nearest_snapshot(date, dates, days, max_diff)
+        return self.entries.get(closest_date) if closest_date else None
+
+    def compact(self, keep: int = 2, suffix: str = '.zst', dry_run: bool = False) -> list[Path]:
+        """Compress the JSONL artifacts of every snapshot but the `keep` most recent ones.
+        Readers resolve the compressed files transparently; Parquet copies stay fresh."""
+        snapshots = self.snapshots()
+        targets = snapshots[:-keep] if keep > 0 else snapshots
+        compacted = []
+        for snapshot in targets:
+            paths = sorted(snapshot.path.rglob('*.jsonl'))
+            for path in paths:
+                if dry_run:
+                    logger.info(f"Would compact {path}")
+                    continue
+                compacted.append(compact_jsonl(path, suffix))
+            if paths and not dry_run:
+                self.update(snapshot.date)
+                logger.info(f"Compact {len(paths)} artifacts in {snapshot.path}")
+        return compacted
@@ -4,6 +4,10 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 from typing_extensions import deprecated
+from .catalog import SnapshotCatalog
+from .fingerprints import RankFingerprints, previous_snapshot
+from .scheduler import RankingScheduler
+from .whatif import WhatIfRanking, rank_stability
 from .core import AccumulateAndRankingPipeline, BAAIDataPipeline, HFPipeline, MSPipeline, MergeAndRankingPipeline, OpenDataLabPipeline
 
 
@@ -52,11 +56,28 @@ def init_config(args):
             config['RankingPipeline']['data_dir'] = args.data_dir
         elif args.all:
             config['RankingPipeline']['data_dir'] = 'all'
+        config['RankingPipeline']['force'] = args.force
+        config['RankingPipeline']['workers'] = args.workers
     elif args.command == 'accumulate':
         if args.data_dir:
             config['RankingPipeline']['data_dir'] = args.data_dir
         elif args.all:
             config['RankingPipeline']['data_dir'] = 'all'
+        config['RankingPipeline']['workers'] = args.workers
+    elif args.command == 'compact':
+        config['Compact'] = {
+            'keep': args.keep,
+            'suffix': f'.{args.format}',
+            'dry_run': args.dry_run,
+        }
+    elif args.command == 'whatif':
+        config['WhatIf'] = {
+            'grid': args.grid,
+            'data_dir': args.data_dir,
+            'accumulated': args.accumulated,
+            'top': args.top,
+            'output_dir': args.output_dir,
+        }
         
     return config
     
@@ -79,14 +100,31 @@ def get_parser():
     group = gen_rank_parser.add_mutually_exclusive_group()
     group.add_argument("--all", action="store_true", help="Generate rankings for all data in the default path.")
     group.add_argument("--data-dir", help="Data directory, default value is the current day")
+    gen_rank_parser.add_argument("--force", action="store_true", help="With --all, recompute every snapshot even if its inputs and config are unchanged.")
+    gen_rank_parser.add_argument("--workers", type=int, help="With --all, number of processes ranking snapshots in parallel, default value is the number of CPUs.")
     gen_rank_parser.set_defaults(func=gen_rank)
     
     accumulate_parser = sub_parsers.add_parser("accumulate", parents=[parent_parser], help="Accumulate historical download data and generate rankings.")
     group = accumulate_parser.add_mutually_exclusive_group()
     group.add_argument("--all", action="store_true", help="Generate accumulated rankings for all data in the default path.")
     group.add_argument("--data-dir", help="Data directory, default value is the current day")
+    accumulate_parser.add_argument("--workers", type=int, help="With --all, number of processes ranking snapshots in parallel, default value is the number of CPUs.")
     accumulate_parser.set_defaults(func=accumulate)
     
+    compact_parser = sub_parsers.add_parser("compact", parents=[parent_parser], help="Compress the JSONL artifacts of old snapshots.")
+    compact_parser.add_argument("--keep", type=int, default=2, help="Number of most recent snapshots left uncompressed, default value is 2.")
+    compact_parser.add_argument("--format", choices=["zst", "gz"], default="zst", help="Compression format, default value is zst.")
+    compact_parser.add_argument("--dry-run", action="store_true", help="Only list the files that would be compressed.")
+    compact_parser.set_defaults(func=compact)
+
+    whatif_parser = sub_parsers.add_parser("whatif", parents=[parent_parser], help="Rank the orgs under a grid of ranking weights without re-running the pipeline.")
+    whatif_parser.add_argument("grid", help="YAML file mapping `ranking_weights` and `[data|model|infra|eval]_config` weights to lists of candidate values.")
+    whatif_parser.add_argument("--data-dir", help="Snapshot directory whose rank tables are used, default value is the latest snapshot.")
+    whatif_parser.add_argument("--accumulated", action="store_true", help="Use the accumulated rankings instead of the monthly ones.")
+    whatif_parser.add_argument("--top", type=int, default=10, help="Report the share of scenarios ranking each org in the top N, default value is 10.")
+    whatif_parser.add_argument("--output-dir", help="Save the scenarios, the rank of every org per scenario and the rank stability as CSV files to this directory.")
+    whatif_parser.set_defaults(func=whatif)
+    
     return parser
 
 
@@ -162,15 +200,31 @@ def gen_rank(config):
     if config['data_dir'] == "all":
         data_dir_base = Path(__file__).parents[2] / 'data'
         log_path = Path(__file__).parents[2] / f'logs/rank-all-{datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")}'
-        for data_dir in sorted(data_dir_base.glob(r"????-??-??"))[1:]:
-            proc = MergeAndRankingPipeline(data_dir, log_path/f"{data_dir.name}.log")
-            if 'merge_models' in config:
-                proc = proc.step('merge_models', **config['merge_models'])
-            if 'merge_datasets' in config:
-                proc = proc.step('merge_datasets', **config['merge_datasets'])
-            if 'ranking' in config:
-                proc = proc.step('ranking', **config['ranking'])
-            proc.done()
+        catalog = SnapshotCatalog.load(data_dir_base)
+        fingerprints = RankFingerprints(data_dir_base)
+        snapshots = catalog.snapshots()[1:]
+        stages = [
+            (stage, config[stage]) for stage in ['merge_models', 'merge_datasets', 'ranking']
+            if stage in config
+        ]
+        scheduler = RankingScheduler(MergeAndRankingPipeline, stages, log_path, config.get('workers'))
+        outdated = [
+            snapshot for snapshot in snapshots
+            if config.get('force') or not fingerprints.is_current(snapshot, fingerprints.compute(
+                snapshot, previous_snapshot(catalog, snapshot.date), config))
+        ]
+        print(f"Rank {len(outdated)} of {len(snapshots)} snapshots, the others are unchanged.")
+        scheduler.compute(outdated)
+        # Deltas in date order: fingerprint once the previous snapshot is final, so that changes
+        # of its outputs propagate to this one.
+        for snapshot in snapshots:
+            snapshot = catalog.get(snapshot.date)
+            previous = previous_snapshot(catalog, snapshot.date)
+            fingerprint = fingerprints.compute(snapshot, previous, config)
+            if fingerprints.is_current(snapshot, fingerprint):
+                continue
+            snapshot = scheduler.apply_delta(snapshot)
+            fingerprints.record(snapshot, fingerprint)
     else:
         proc = MergeAndRankingPipeline(config['data_dir'])
         if 'merge_models' in config:
@@ -187,13 +241,23 @@ def accumulate(config):
     if config['data_dir'] == "all":
         data_dir_base = Path(__file__).parents[2] / 'data'
         log_path = Path(__file__).parents[2] / f'logs/rank-all-{datetime.now().strftime(r"%Y-%m-%d_%H-%M-%S")}'
-        for data_dir in sorted(data_dir_base.glob(r"????-??-??"))[1:]:
-            proc = AccumulateAndRankingPipeline(data_dir, log_path/f"{data_dir.name}.log")
-            if 'accumulate' in config:
+        catalog = SnapshotCatalog.load(data_dir_base)
+        snapshots = catalog.snapshots()[1:]
+        if 'accumulate' in config:
+            # Each month resumes from the checkpoint of the previous one, so accumulate in order.
+            for snapshot in snapshots:
+                proc = AccumulateAndRankingPipeline(snapshot.path, log_path/f"{snapshot.date}.log")
                 proc = proc.step('accumulate')
-            if 'ranking' in config:
-                proc = proc.step('ranking', **config['ranking'])
-            proc.done()
+                if 'ranking' not in config:
+                    proc.done()
+                else:
+                    # The checkpoint is validated against the catalog entry of this month, record
+                    # its accumulated files before the next month resumes from it.
+                    catalog.update(snapshot.date)
+        if 'ranking' in config:
+            stages = [('ranking', config['ranking'])]
+            scheduler = RankingScheduler(AccumulateAndRankingPipeline, stages, log_path, config.get('workers'))
+            scheduler.run(snapshots)
     else:
         proc = AccumulateAndRankingPipeline(config['data_dir'])
         if 'accumulate' in config:
@@ -203,6 +267,33 @@ def accumulate(config):
         proc.done()
 
 
+def compact(config):
+    config = config['Compact']
+    data_dir_base = Path(__file__).parents[2] / 'data'
+    SnapshotCatalog.load(data_dir_base).compact(**config)
+
+
+def whatif(config):
+    ranking_config = config['RankingPipeline']['ranking']
+    config = config['WhatIf']
+    data_dir = config['data_dir']
+    if data_dir is None:
+        data_dir = SnapshotCatalog.load(Path(__file__).parents[2] / 'data').snapshots()[-1].path
+    with open(config['grid'], 'r') as f:
+        grid = yaml.safe_load(f) or {}
+    ranking = WhatIfRanking.load(data_dir, ranking_config, config['accumulated'])
+    scenarios, ranks = ranking.evaluate(grid)
+    stability = rank_stability(ranks, config['top'])
+    print(f"Ranked {len(ranking.orgs)} orgs under {len(scenarios)} scenarios from {data_dir}.")
+    print(stability.to_string())
+    if config['output_dir']:
+        output_dir = Path(config['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        scenarios.to_csv(output_dir / 'whatif-scenarios.csv')
+        ranks.to_csv(output_dir / 'whatif-ranks.csv')
+        stability.to_csv(output_dir / 'whatif-stability.csv')
+
+
 def test_hf_pipeline():
     save_path = Path(__file__).parents[2] / 'tmp-data/hf-test'
     save_path.mkdir(exist_ok=True, parents=True)
@@ -228,7 +319,7 @@ def tmp_executor(target_org=None):
     from .pipeline.crawlers import OpenDataLabCrawler, BAAIDatasetsCrawler
     from .pipeline.writers import JsonlineWriter
     from datetime import datetime
-    import jsonlines
+    from .codec import jsonl_writer
     
     cur_path = Path(__file__)
     data_path = cur_path.parents[2] / 'data/2025-09-07'
@@ -242,7 +333,7 @@ def tmp_executor(target_org=None):
     error_f.parent.mkdir(exist_ok=True, parents=True)
     error_f.touch()
     error_f = open(error_f, 'a', encoding='utf-8')
-    error_writer = jsonlines.Writer(error_f)
+    error_writer = jsonl_writer(error_f)
     
     reader = OrgLinksReader(orgs=target_org)
     reader.parse_input()
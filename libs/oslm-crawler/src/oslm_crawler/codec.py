@@ -0,0 +1,234 @@
+"""
+JSON codec shared by every JSONL reader and writer.
+
+`orjson` is used when it is installed and the stdlib `json` module otherwise; the backend can be
+forced with `set_codec()` or the `OSLM_JSON_CODEC` environment variable. Both backends read each
+other's output, they only differ in whitespace. `open_jsonl`, `jsonl_reader` and `jsonl_writer`
+are drop-in replacements for `jsonlines.open`, `jsonlines.Reader` and `jsonlines.Writer`, and
+`iter_jsonl` is the fast path for plain scans, optionally decoding each line straight into a
+record type. Typed records (`oslm_crawler.records`) are encoded directly by both backends.
+
+Artifacts may also be stored compressed (`x.jsonl.zst` or `x.jsonl.gz`, see `compact_jsonl`).
+Callers keep using the plain `x.jsonl` path: readers resolve it to whichever variant exists,
+and writers compress according to the suffix of the path they are given.
+"""
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+import jsonlines
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+T = TypeVar('T')
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonCodec:
+
+    name = 'json'
+
+    @staticmethod
+    def loads(s: str | bytes) -> Any:
+        return json.loads(s)
+
+    @staticmethod
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, default=_default)
+
+    @staticmethod
+    def dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+
+
+class OrjsonCodec:
+
+    name = 'orjson'
+
+    @staticmethod
+    def loads(s: str | bytes) -> Any:
+        return orjson.loads(s)
+
+    @staticmethod
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    @staticmethod
+    def dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2).decode()
+
+
+CODECS = {'json': JsonCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+_codec = CODECS.get(os.environ.get('OSLM_JSON_CODEC', ''), OrjsonCodec if orjson else JsonCodec)
+
+
+def get_codec():
+    return _codec
+
+
+def set_codec(name: str):
+    """Select the JSON backend (`json` or `orjson`) used from now on."""
+    global _codec
+    if name not in CODECS:
+        raise ValueError(f"Unknown or unavailable JSON codec: {name}, available: {list(CODECS)}")
+    _codec = CODECS[name]
+
+
+def loads(s: str | bytes) -> Any:
+    return _codec.loads(s)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Encode `obj` as a JSON string, on one line unless `pretty`."""
+    if pretty:
+        return _codec.dumps_pretty(obj)
+    res = _codec.dumps(obj)
+    return res.decode() if isinstance(res, bytes) else res
+
+
+COMPRESSED_SUFFIXES = ('.zst', '.gz')
+
+
+def plain_path(path: str | Path) -> Path:
+    """Return the uncompressed name of `path` (`x.jsonl.zst` -> `x.jsonl`)."""
+    path = Path(path)
+    return path.with_suffix('') if path.suffix in COMPRESSED_SUFFIXES else path
+
+
+def variants(path: str | Path) -> list[Path]:
+    """Return the plain and compressed variants of `path`, plain first."""
+    path = plain_path(path)
+    return [path, *(path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES)]
+
+
+def resolve(path: str | Path) -> Path:
+    """Return the variant of `path` that exists on disk, or `path` itself if none does."""
+    path = Path(path)
+    if path.exists():
+        return path
+    for variant in variants(path):
+        if variant.exists():
+            return variant
+    return path
+
+
+def exists(path: str | Path) -> bool:
+    return any(variant.exists() for variant in variants(path))
+
+
+def remove_variants(path: str | Path):
+    """Delete the variants of `path` other than `path` itself, so that a freshly written
+    artifact is not shadowed by a stale copy in another encoding."""
+    path = Path(path)
+    for variant in variants(path):
+        if variant != path and variant.exists():
+            variant.unlink()
+
+
+def _zstd():
+    if zstandard is None:
+        raise ImportError("zstandard is required to read or write .zst artifacts.")
+    return zstandard
+
+
+def open_binary(path: str | Path, mode: str = 'rb', compression: str | None = None):
+    """Open `path` in binary mode, (de)compressing according to `compression` ('.zst', '.gz'
+    or '' for none), which defaults to the suffix of `path`. `mode` is one of 'rb', 'wb' or
+    'ab'; appending to a compressed file adds a new frame/member."""
+    path = Path(path)
+    if compression is None:
+        compression = path.suffix
+    if compression == '.zst':
+        if mode == 'rb':
+            # The zstandard reader does not iterate over lines by itself.
+            return io.BufferedReader(_zstd().open(path, 'rb'), 1 << 20)
+        return _zstd().open(path, mode, cctx=zstandard.ZstdCompressor(level=10))
+    if compression == '.gz':
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def open_text(path: str | Path, mode: str = 'r', compression: str | None = None):
+    """Open `path` in text mode ('r', 'w' or 'a'), see `open_binary`."""
+    path = Path(path)
+    if compression is None:
+        compression = path.suffix
+    if compression not in COMPRESSED_SUFFIXES:
+        return open(path, mode, encoding='utf-8')
+    return io.TextIOWrapper(open_binary(path, mode + 'b', compression), encoding='utf-8')
+
+
+def open_jsonl(path: str | Path, mode: str = 'r', **kwargs):
+    """Like `jsonlines.open`; reading resolves `path` to its compressed variant if needed."""
+    if mode == 'r':
+        path = resolve(path)
+    if Path(path).suffix not in COMPRESSED_SUFFIXES:
+        if mode == 'r':
+            return jsonlines.open(path, mode, loads=_codec.loads, **kwargs)
+        return jsonlines.open(path, mode, dumps=_codec.dumps, **kwargs)
+    fp = open_text(path, mode)
+    if mode == 'r':
+        instance = jsonlines.Reader(fp, loads=_codec.loads, **kwargs)
+    else:
+        instance = jsonlines.Writer(fp, dumps=_codec.dumps, **kwargs)
+    instance._should_close_fp = True
+    return instance
+
+
+def jsonl_reader(fp, **kwargs) -> jsonlines.Reader:
+    return jsonlines.Reader(fp, loads=_codec.loads, **kwargs)
+
+
+def jsonl_writer(fp, **kwargs) -> jsonlines.Writer:
+    return jsonlines.Writer(fp, dumps=_codec.dumps, **kwargs)
+
+
+def iter_jsonl(
+    path: str | Path,
+    record_type: Callable[..., T] | None = None,
+) -> Iterator[dict | T]:
+    """Yield the records of a JSONL file (or its compressed variant), built with
+    `record_type(**record)` if given."""
+    codec_loads = _codec.loads
+    with open_binary(resolve(path)) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = codec_loads(line)
+            yield record if record_type is None else record_type(**record)
+
+
+def compact_jsonl(path: str | Path, suffix: str = '.zst', remove: bool = True) -> Path:
+    """Compress the JSONL file `path` to `path + suffix` (atomically, keeping its mtime so that
+    Parquet copies stay fresh) and delete the original unless `remove` is False."""
+    path = Path(path)
+    assert suffix in COMPRESSED_SUFFIXES, f"Unknown compression suffix: {suffix}"
+    target = path.with_name(path.name + suffix)
+    tmp_path = target.with_name(target.name + '.tmp')
+    with open(path, 'rb') as src, open_binary(tmp_path, 'wb', suffix) as dst:
+        while chunk := src.read(1 << 20):
+            dst.write(chunk)
+    stat = path.stat()
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, target)
+    if remove:
+        path.unlink()
+    return target
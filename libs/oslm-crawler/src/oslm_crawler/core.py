@@ -1,10 +1,8 @@
 import re
-import jsonlines
 import sys
 import pandas as pd
-import numpy as np
 from collections import defaultdict
-from typing import Literal
+from typing import Iterable, Literal
 from loguru import logger
 from oslm_crawler.pipeline.base import PipelineData
 from oslm_crawler.pipeline.processors import HFInfoProcessor
@@ -17,10 +15,101 @@ from .pipeline.readers import OrgLinksReader, JsonlineReader
 from .pipeline.crawlers import HFRepoPageCrawler, MSRepoPageCrawler
 from .pipeline.crawlers import HFDetailPageCrawler, MSDetailPageCrawler
 from .pipeline.crawlers import OpenDataLabCrawler, BAAIDatasetsCrawler
-from .pipeline.writers import ModelDatasetJsonlineWriter, JsonlineWriter
+from .pipeline.writers import DBWriter, ModelDatasetDBWriter, ModelDatasetJsonlineWriter, JsonlineWriter
+from .downloads_index import DownloadsIndex
+from .catalog import SnapshotCatalog
+from .fingerprints import previous_snapshot
+from .merge import MergeAggregator, MODEL_MERGE, DATASET_MERGE
+from .accumulate import Accumulator, AccumulateCheckpoints, accumulation_history
+from .accumulate import MODEL_ACCUMULATE, DATASET_ACCUMULATE
+from .parquet import export_snapshot, iter_records, read_frame
+from .summary import read_other_source_datasets, summarize_datasets, summarize_models
+from .summary import normalize_summary, rank_overall, select_summary
+from .codec import open_jsonl, jsonl_writer
 from datetime import datetime, timedelta
 
 
+def _index_downloads(source: str, save_dir: Path):
+    with DownloadsIndex(save_dir.parents[1] / 'downloads-index.db') as index:
+        count = index.ingest(source, save_dir, force=True)
+    logger.info(f"Update downloads index of {source} with {count} records.")
+
+
+def _write_db(db_writer, data: PipelineData, error_writer, error_f):
+    # The records the database rejected, this one or the buffered ones, are reported like the
+    # other errors.
+    db_writer.parse_input(data)
+    for res in db_writer.run():
+        if res.error is not None:
+            error_writer.write(res.error)
+            error_f.flush()
+
+
+def _close_db(db_writer, error_writer) -> bool:
+    # The records dropped by the last flush are reported before the error file is closed.
+    if db_writer is None:
+        return True
+    closed = db_writer.close()
+    for error in db_writer.take_errors():
+        error_writer.write(error)
+    return closed
+
+
+def _process_records(processor, inps: Iterable[PipelineData]):
+    for inp in inps:
+        if inp.error is not None:
+            yield inp
+            continue
+        processor.parse_input(inp)
+        yield from processor.run()
+
+
+def _read_raw_records(paths: list[Path], extra: dict | None = None):
+    for path in paths:
+        reader = JsonlineReader(path, stream=True)
+        reader.parse_input(PipelineData(extra or {}, None, None))
+        yield from reader.run()
+
+
+def _update_catalog(snapshot_dir: Path):
+    if not re.match(r'^\d{4}-\d{2}-\d{2}$', snapshot_dir.name):
+        return
+    export_snapshot(snapshot_dir)
+    snapshot = SnapshotCatalog.load(snapshot_dir.parent).update(snapshot_dir.name)
+    logger.info(f"Snapshot {snapshot.date}: sources {snapshot.sources}, complete: {snapshot.complete}")
+
+
+def _add_deltas(pipeline, summaries: dict[str, pd.DataFrame], ranks: dict[str, pd.DataFrame]):
+    """Compare the tables of a ranking pipeline with those of its previous snapshot: write the
+    `*-summary-delta.csv` tables and add a `delta rank` column to the rank tables."""
+    last_dir = pipeline.data_dir_last_month
+    if not last_dir:
+        return
+    for name, summary in summaries.items():
+        summary_last_month = pd.read_csv(last_dir / name, index_col='org')
+        delta_name = name.replace('-summary.csv', '-summary-delta.csv')
+        (summary - summary_last_month).to_csv(pipeline.data_dir / delta_name)
+    for name, rank in ranks.items():
+        rank_last_month = pd.read_csv(last_dir / name, index_col='org')
+        rank['delta rank'] = rank_last_month['rank'] - rank['rank']
+
+
+def _apply_deltas(pipeline, save: bool = True):
+    """`delta` stage: add the deltas to tables written by `ranking` with `delta=False`."""
+    logger.info(f"Compare {pipeline.data_dir.name} with {pipeline.data_dir_last_month}")
+    def read(name):
+        return pd.read_csv(pipeline.data_dir / name, index_col='org', float_precision='round_trip')
+
+    summaries = {name: read(name) for name in pipeline.summary_files}
+    ranks = {name: read(name).drop(columns='delta rank', errors='ignore')
+             for name in pipeline.rank_files}
+    _add_deltas(pipeline, summaries, ranks)
+    if save:
+        for name, df in ranks.items():
+            df.to_csv(pipeline.data_dir / name)
+    return pipeline
+
+
 class HFPipeline:
     
     def __init__(
@@ -89,6 +178,7 @@ class HFPipeline:
                 return self._post_process(save, **kargs)
                 
     def done(self):
+        _update_catalog(self.save_dir.parent)
         logger.success(f"HFPipeline {self.task_name} done.")
     
     def _init_org_links(self, save, **kargs):
@@ -112,7 +202,7 @@ class HFPipeline:
     def _crawl_repo_page(self, save, **kargs):
         error_f = self.error_f / 'org-links.jsonl'
         error_f = open(error_f, 'a')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Crawl repo page of HuggingFace")
         if not hasattr(self, "_init_org_links_res"):
             logger.info("Missing the running result of the previous step (init_org_links)")
@@ -157,7 +247,7 @@ class HFPipeline:
     def _crawl_detail_page(self, save, **kargs):
         error_f = self.error_f / 'repo-page.jsonl'
         error_f = open(error_f, 'a')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Crawl detail page of HuggingFace")
         if not hasattr(self, "_crawl_repo_page_res"):
             logger.info("Missing the running result of the previous step (crawl_repo_page)")
@@ -188,7 +278,9 @@ class HFPipeline:
             writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / "raw-models-info.jsonl"),
                 str(self.save_dir / "raw-datasets-info.jsonl"),
-                ['repo_org_mapper'], ['repo_org_mapper']
+                ['repo_org_mapper'], ['repo_org_mapper'],
+                # Not atomic: a crawl interrupted midway keeps the records flushed so far.
+                buffer_size=100, flush_interval=5,
             )
         for inp in inps:
             crawler.parse_input(inp)
@@ -222,48 +314,50 @@ class HFPipeline:
     def _post_process(self, save, **kargs):
         error_f = self.error_f / 'post-process-error.jsonl'
         error_f = open(error_f, 'w')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Post Processing of HuggingFace data.")
         if not hasattr(self, "_crawl_detail_page_res"):
             logger.info("Missing the running result of the previous step (crawl_detail_page)")
             logger.info(f"Trying load required data from {self.save_dir}")
             org_links_reader = OrgLinksReader(sources=['HuggingFace'])
             org_links_reader.parse_input()
-            models_reader = JsonlineReader(self.save_dir / 'raw-models-info.jsonl')
-            datasets_reader = JsonlineReader(self.save_dir / 'raw-datasets-info.jsonl')
             repo_org_mapper = next(org_links_reader.run()).data['repo_org_mapper']
-            self._crawl_detail_page_res = next(models_reader.run()).data.get('content')
-            self._crawl_detail_page_res.extend(next(datasets_reader.run()).data.get('content'))
-            for inp in self._crawl_detail_page_res:
-                inp['repo_org_mapper'] = repo_org_mapper
-            self._crawl_detail_page_res = [
-                PipelineData(inp, None, None) for inp in self._crawl_detail_page_res
-            ]
+            self._crawl_detail_page_res = _read_raw_records(
+                [self.save_dir / 'raw-models-info.jsonl', self.save_dir / 'raw-datasets-info.jsonl'],
+                {'repo_org_mapper': repo_org_mapper},
+            )
+            if kargs.get('ai_check', False):
+                # The records are written back after the AI check.
+                self._crawl_detail_page_res = list(self._crawl_detail_page_res)
             
         inps = self._crawl_detail_page_res
+        db_path = kargs.get('db_path')
         kargs = {k: v for k, v in kargs.items() if k in [
             'dataset_info_path', 'model_info_path', 'ai_gen', 'ai_check',
-            'buffer_size', 'max_retries'
+            'buffer_size', 'max_retries', 'pre_classify', 'min_confidence'
         ]}
         processor = HFInfoProcessor(**kargs)
         res = []
+        # Records are also upserted into the database as they are processed.
+        db_writer = ModelDatasetDBWriter(db_path, 'hf_models_info', 'hf_datasets_info') if db_path else None
         if save:
             writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / 'processed-models-info.jsonl'),
                 str(self.save_dir / 'processed-datasets-info.jsonl'),
+                buffer_size=1000, atomic=True,
             )
-        for inp in inps:
-            processor.parse_input(inp)
-            for data in processor.run():
-                if data.error is not None:
-                    self.error_writer.write(data.error)
-                    error_f.flush()
-                    continue
-                if save:
-                    writer.parse_input(data)
-                    res.append(next(writer.run()))
-                else:
-                    res.append(data)
+        for data in _process_records(processor, inps):
+            if data.error is not None:
+                self.error_writer.write(data.error)
+                error_f.flush()
+                continue
+            if save:
+                writer.parse_input(data)
+                res.append(next(writer.run()))
+            else:
+                res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         for data in processor.flush(update_infos=True):
             if data.error is not None:
                 self.error_writer.write(data.error)
@@ -274,6 +368,8 @@ class HFPipeline:
                 res.append(next(writer.run()))
             else:
                 res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
 
         if kargs.get('ai_check', False):
             model_check = {
@@ -287,7 +383,8 @@ class HFPipeline:
             back_writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / "raw-models-info.jsonl"),
                 str(self.save_dir / "raw-datasets-info.jsonl"),
-                ['repo_org_mapper'], ['repo_org_mapper']
+                ['repo_org_mapper'], ['repo_org_mapper'],
+                buffer_size=1000, atomic=True,
             )
             for inp in self._crawl_detail_page_res:
                 if 'model_name' in inp.data.keys():
@@ -303,8 +400,11 @@ class HFPipeline:
             back_writer.close()
         
         writer.close()
+        db_closed = _close_db(db_writer, self.error_writer)
         self.error_writer.close()
         error_f.close()
+        if not db_closed:
+            raise RuntimeError(f"Failed to write the processed records to {db_path}.")
         count = defaultdict(int)
         for data in res:
             if 'model_name' in data.data.keys():
@@ -384,6 +484,7 @@ class MSPipeline:
                 return self._post_process(save, **kargs)
                 
     def done(self):
+        _update_catalog(self.save_dir.parent)
         logger.success(f"MSPipeline {self.task_name} done.")
     
     def _init_org_links(self, save, **kargs):
@@ -407,7 +508,7 @@ class MSPipeline:
     def _crawl_repo_page(self, save, **kargs):
         error_f = self.error_f / 'org-links.jsonl'
         error_f = open(error_f, 'a')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Crawl repo page of ModelScope")
         if not hasattr(self, "_init_org_links_res"):
             logger.info("Missing the running result of the previous step (init_org_links)")
@@ -452,7 +553,7 @@ class MSPipeline:
     def _crawl_detail_page(self, save, **kargs):
         error_f = self.error_f / 'repo-page.jsonl'
         error_f = open(error_f, 'a')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Crawl detail page of ModelScope")
         if not hasattr(self, "_crawl_repo_page_res"):
             logger.info("Missing the running result of the previous step (crawl_repo_page)")
@@ -483,7 +584,9 @@ class MSPipeline:
             writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / "raw-models-info.jsonl"),
                 str(self.save_dir / "raw-datasets-info.jsonl"),
-                ['repo_org_mapper'], ['repo_org_mapper']
+                ['repo_org_mapper'], ['repo_org_mapper'],
+                # Not atomic: a crawl interrupted midway keeps the records flushed so far.
+                buffer_size=100, flush_interval=5,
             )
         for inp in inps:
             crawler.parse_input(inp)
@@ -511,53 +614,58 @@ class MSPipeline:
             elif 'dataset_name' in data.data.keys():
                 count['datasets'] += 1
         logger.info(f"Crawl detail page done. Total models: {count['models']}. Total datasets: {count['datasets']}")
+        if save:
+            _index_downloads('ModelScope', self.save_dir)
         self._crawl_detail_page_res = res
         return self
     
     def _post_process(self, save, **kargs):
         error_f = self.error_f / 'post-process-error.jsonl'
         error_f = open(error_f, 'w')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Post Processing of ModelScope data.")
         if not hasattr(self, "_crawl_detail_page_res"):
             logger.info("Missing the running result of the previous step (crawl_detail_page)")
             logger.info(f"Trying load required data from {self.save_dir}")
             org_links_reader = OrgLinksReader(sources=['ModelScope'])
             org_links_reader.parse_input()
-            models_reader = JsonlineReader(self.save_dir / 'raw-models-info.jsonl')
-            datasets_reader = JsonlineReader(self.save_dir / 'raw-datasets-info.jsonl')
             repo_org_mapper = next(org_links_reader.run()).data['repo_org_mapper']
-            self._crawl_detail_page_res = next(models_reader.run()).data.get('content')
-            self._crawl_detail_page_res.extend(next(datasets_reader.run()).data.get('content'))
-            for inp in self._crawl_detail_page_res:
-                inp['repo_org_mapper'] = repo_org_mapper
-            self._crawl_detail_page_res = [
-                PipelineData(inp, None, None) for inp in self._crawl_detail_page_res
-            ]
+            self._crawl_detail_page_res = _read_raw_records(
+                [self.save_dir / 'raw-models-info.jsonl', self.save_dir / 'raw-datasets-info.jsonl'],
+                {'repo_org_mapper': repo_org_mapper},
+            )
+            if kargs.get('ai_check', False):
+                # The records are written back after the AI check.
+                self._crawl_detail_page_res = list(self._crawl_detail_page_res)
         inps = self._crawl_detail_page_res
+        db_path = kargs.get('db_path')
         kargs = {k: v for k, v in kargs.items() if k in [
             'dataset_info_path', 'model_info_path', 'ai_gen', 'ai_check',
-            'buffer_size', 'max_retries', 'history_data_path'
+            'buffer_size', 'max_retries', 'history_data_path', 'pre_classify',
+            'min_confidence'
         ]}
         processor = MSInfoProcessor(**kargs)
         res = []
+        # Records are also upserted into the database as they are processed.
+        db_writer = ModelDatasetDBWriter(db_path, 'ms_models_info', 'ms_datasets_info') if db_path else None
         if save:
             writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / 'processed-models-info.jsonl'),
                 str(self.save_dir / 'processed-datasets-info.jsonl'),
+                buffer_size=1000, atomic=True,
             )
-        for inp in inps:
-            processor.parse_input(inp)
-            for data in processor.run():
-                if data.error is not None:
-                    self.error_writer.write(data.error)
-                    error_f.flush()
-                    continue
-                if save:
-                    writer.parse_input(data)
-                    res.append(next(writer.run()))
-                else:
-                    res.append(data)
+        for data in _process_records(processor, inps):
+            if data.error is not None:
+                self.error_writer.write(data.error)
+                error_f.flush()
+                continue
+            if save:
+                writer.parse_input(data)
+                res.append(next(writer.run()))
+            else:
+                res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         for data in processor.flush(update_infos=True):
             if data.error is not None:
                 self.error_writer.write(data.error)
@@ -568,6 +676,8 @@ class MSPipeline:
                 res.append(next(writer.run()))
             else:
                 res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
                 
         if kargs.get('ai_check', False):
             model_check = {
@@ -581,7 +691,8 @@ class MSPipeline:
             back_writer = ModelDatasetJsonlineWriter(
                 str(self.save_dir / "raw-models-info.jsonl"),
                 str(self.save_dir / "raw-datasets-info.jsonl"),
-                ['repo_org_mapper'], ['repo_org_mapper']
+                ['repo_org_mapper'], ['repo_org_mapper'],
+                buffer_size=1000, atomic=True,
             )
             for inp in self._crawl_detail_page_res:
                 if 'model_name' in inp.data.keys():
@@ -595,10 +706,14 @@ class MSPipeline:
                 back_writer.parse_input(inp)
                 next(back_writer.run())
             back_writer.close()
+            _index_downloads('ModelScope', self.save_dir)
         
         writer.close()
+        db_closed = _close_db(db_writer, self.error_writer)
         self.error_writer.close()
         error_f.close()
+        if not db_closed:
+            raise RuntimeError(f"Failed to write the processed records to {db_path}.")
         count = defaultdict(int)
         for data in res:
             if 'model_name' in data.data.keys():
@@ -663,6 +778,7 @@ class OpenDataLabPipeline:
                 return self._post_process(save, **kargs)
 
     def done(self):
+        _update_catalog(self.save_dir.parent)
         logger.success(f"OpenDataLabPipeline {self.task_name} done.")
         
     def _init_org_links(self, save, **kargs):
@@ -708,44 +824,48 @@ class OpenDataLabPipeline:
             pbar.update(1)
             
         writer.close()
+        if save:
+            _index_downloads('OpenDataLab', self.save_dir)
         pbar.close()
         self._crawl_repo_page_res = res
         
     def _post_process(self, save, **kargs):
         error_f = self.error_f / 'post-process-error.jsonl'
         error_f = open(error_f, 'w')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Post Processing of OpenDataLab data.")
         if not hasattr(self, "_crawl_repo_page_res"):
             logger.info("Missing the running result of the previous step (crawl_repo_page)")
             logger.info(f"Trying load required data from {self.save_dir}")
-            datasets_reader = JsonlineReader(self.save_dir / 'raw-datasets-info.jsonl')
-            self._crawl_repo_page_res = next(datasets_reader.run()).data.get('content')
-            self._crawl_repo_page_res = [
-                PipelineData(inp, None, None) for inp in self._crawl_repo_page_res
-            ]
+            self._crawl_repo_page_res = _read_raw_records(
+                [self.save_dir / 'raw-datasets-info.jsonl']
+            )
 
         inps = self._crawl_repo_page_res
+        db_path = kargs.get('db_path')
         kargs = {k: v for k, v in kargs.items() if k in [
             'dataset_info_path', 'history_data_path', 'ai_gen',
-            'buffer_size', 'max_retries'
+            'buffer_size', 'max_retries', 'pre_classify', 'min_confidence'
         ]}
         processor = OpenDataLabInfoProcessor(**kargs)
         res = []
+        # Records are also upserted into the database as they are processed.
+        db_writer = DBWriter(db_path, 'odl_datasets_info') if db_path else None
         if save:
-            writer = JsonlineWriter(str(self.save_dir / 'processed-datasets-info.jsonl'))
-        for inp in inps:
-            processor.parse_input(inp)
-            for data in processor.run():
-                if data.error is not None:
-                    self.error_writer.write(data.error)
-                    error_f.flush()
-                    continue
-                if save:
-                    writer.parse_input(data)
-                    res.append(next(writer.run()))
-                else:
-                    res.append(data)
+            writer = JsonlineWriter(str(self.save_dir / 'processed-datasets-info.jsonl'),
+                                    buffer_size=1000, atomic=True)
+        for data in _process_records(processor, inps):
+            if data.error is not None:
+                self.error_writer.write(data.error)
+                error_f.flush()
+                continue
+            if save:
+                writer.parse_input(data)
+                res.append(next(writer.run()))
+            else:
+                res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         for data in processor.flush(update_infos=True):
             if data.error is not None:
                 self.error_writer.write(data.error)
@@ -756,10 +876,15 @@ class OpenDataLabPipeline:
                 res.append(next(writer.run()))
             else:
                 res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         
         writer.close()
+        db_closed = _close_db(db_writer, self.error_writer)
         self.error_writer.close()
         error_f.close()
+        if not db_closed:
+            raise RuntimeError(f"Failed to write the processed records to {db_path}.")
         count = len(res)
         logger.info(f"Post process done. Total datasets: {count}")
         self._post_process_res = res
@@ -819,6 +944,7 @@ class BAAIDataPipeline:
                 return self._post_process(save, **kargs)
 
     def done(self):
+        _update_catalog(self.save_dir.parent)
         logger.success(f"BAAIDataPipeline {self.task_name} done.")
         
     def _init_org_links(self, save, **kargs):
@@ -861,43 +987,47 @@ class BAAIDataPipeline:
                 res.append(data)
             
         writer.close()
+        if save:
+            _index_downloads('BAAIData', self.save_dir)
         self._crawl_repo_page_res = res
         
     def _post_process(self, save, **kargs):
         error_f = self.error_f / 'post-process-error.jsonl'
         error_f = open(error_f, 'w')
-        self.error_writer = jsonlines.Writer(error_f)
+        self.error_writer = jsonl_writer(error_f)
         logger.info("Post Processing of BAAIData data.")
         if not hasattr(self, "_crawl_repo_page_res"):
             logger.info("Missing the running result of the previous step (crawl_repo_page)")
             logger.info(f"Trying load required data from {self.save_dir}")
-            datasets_reader = JsonlineReader(self.save_dir / 'raw-datasets-info.jsonl')
-            self._crawl_repo_page_res = next(datasets_reader.run()).data.get('content')
-            self._crawl_repo_page_res = [
-                PipelineData(inp, None, None) for inp in self._crawl_repo_page_res
-            ]
+            self._crawl_repo_page_res = _read_raw_records(
+                [self.save_dir / 'raw-datasets-info.jsonl']
+            )
 
         inps = self._crawl_repo_page_res
+        db_path = kargs.get('db_path')
         kargs = {k: v for k, v in kargs.items() if k in [
             'dataset_info_path', 'history_data_path', 'ai_gen',
-            'buffer_size', 'max_retries'
+            'buffer_size', 'max_retries', 'pre_classify', 'min_confidence'
         ]}
         processor = BAAIDataInfoProcessor(**kargs)
         res = []
+        # Records are also upserted into the database as they are processed.
+        db_writer = DBWriter(db_path, 'baai_datasets_info') if db_path else None
         if save:
-            writer = JsonlineWriter(str(self.save_dir / 'processed-datasets-info.jsonl'))
-        for inp in inps:
-            processor.parse_input(inp)
-            for data in processor.run():
-                if data.error is not None:
-                    self.error_writer.write(data.error)
-                    error_f.flush()
-                    continue
-                if save:
-                    writer.parse_input(data)
-                    res.append(next(writer.run()))
-                else:
-                    res.append(data)
+            writer = JsonlineWriter(str(self.save_dir / 'processed-datasets-info.jsonl'),
+                                    buffer_size=1000, atomic=True)
+        for data in _process_records(processor, inps):
+            if data.error is not None:
+                self.error_writer.write(data.error)
+                error_f.flush()
+                continue
+            if save:
+                writer.parse_input(data)
+                res.append(next(writer.run()))
+            else:
+                res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         for data in processor.flush(update_infos=True):
             if data.error is not None:
                 self.error_writer.write(data.error)
@@ -908,10 +1038,15 @@ class BAAIDataPipeline:
                 res.append(next(writer.run()))
             else:
                 res.append(data)
+            if db_writer is not None:
+                _write_db(db_writer, data, self.error_writer, error_f)
         
         writer.close()
+        db_closed = _close_db(db_writer, self.error_writer)
         self.error_writer.close()
         error_f.close()
+        if not db_closed:
+            raise RuntimeError(f"Failed to write the processed records to {db_path}.")
         count = len(res)
         logger.info(f"Post process done. Total datasets: {count}")
         self._post_process_res = res
@@ -943,26 +1078,14 @@ class MergeAndRankingPipeline:
         logger.add(sys.stderr, level="DEBUG")
         logger.add(log_path, level="DEBUG")
         
-    def _get_last_month_path(self, date: str):
-        date = datetime.strptime(date, r"%Y-%m-%d")
-        last_month_date = date - timedelta(days=30)
-        
-        min_diff = None
-        closest_date = None
+    # Tables compared with the previous snapshot by the `delta` stage.
+    summary_files = ['data-summary.csv', 'model-summary.csv']
+    rank_files = ['data-rank.csv', 'model-rank.csv', 'infra-rank.csv', 'eval-rank.csv',
+                  'overall-rank.csv']
         
-        for d in (Path(__file__).parents[2]/'data').glob(r"????-??-??"):
-            cur_date = datetime.strptime(d.name, r"%Y-%m-%d")
-            diff = abs((cur_date - last_month_date).days)
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_date = d
-                
-        if min_diff > 15:
-            return None
-        
-        if (closest_date / 'overall-rank.csv').exists():
-            return closest_date
-        return None
+    def _get_last_month_path(self, date: str):
+        snapshot = previous_snapshot(SnapshotCatalog.load(self.data_dir.parent), date)
+        return snapshot.path if snapshot else None
         
     def step(
         self,
@@ -970,6 +1093,7 @@ class MergeAndRankingPipeline:
             "merge_models",
             "merge_datasets",
             "ranking",
+            "delta",
         ],
         save: bool = True,
         **kargs,
@@ -981,85 +1105,55 @@ class MergeAndRankingPipeline:
                 return self._merge_dataset(save, **kargs)
             case 'ranking':
                 return self._ranking(save, **kargs)
+            case 'delta':
+                return _apply_deltas(self, save)
     
     def done(self):
+        _update_catalog(self.data_dir)
         logger.success("Merge and ranking done.")
         
     def _merge_models(self, save, **kargs):
         logger.info("Merge models")
-        buffer = defaultdict(list)
-        for p in self.data_dir.iterdir():
-            data_path = p / 'processed-models-info.jsonl'
-            if not data_path.exists():
-                continue
-            with jsonlines.open(data_path, 'r') as reader:
-                for data in reader:
-                    key = f"{data['org']}/{data['model_name']}"
-                    buffer[key].append(data)
-        if len(buffer) == 0:
+        merger = MergeAggregator(MODEL_MERGE).update_from(
+            p / 'processed-models-info.jsonl' for p in self.data_dir.iterdir()
+        )
+        if len(merger) == 0:
             raise RuntimeError("No processed data found.")
         save_path = self.data_dir / 'merged-models-info.jsonl'
-        res = []
-        with jsonlines.open(save_path, 'w') as writer:
-            for _, models in buffer.items():
-                data = {
-                    "org": models[0]['org'],
-                    "repo": models[0]['repo'],
-                    "model_name": models[0]['model_name'],
-                    "modality": models[0]['modality'],
-                    "downloads_last_month": sum(model['downloads_last_month']
-                                                for model in models
-                                                if model['downloads_last_month'] > 0),
-                    "likes": sum(model['likes'] for model in models),
-                    "community": sum(model['community'] for model in models
-                                        if 'community' in model),
-                    "descendants": sum(model['descendants'] for model in models
-                                        if 'descendants' in model),
-                    "date_crawl": models[0]['date_crawl'],
-                } # TODO Currently missing the date_last_crawl and date_enter_db fields
-                writer.write(data)
-                res.append(data)
+        # TODO Currently missing the date_last_crawl and date_enter_db fields
+        res = merger.results()
+        with open_jsonl(save_path, 'w') as writer:
+            writer.write_all(res)
+        if kargs.get('db_path'):
+            db_writer = DBWriter(kargs['db_path'], 'models')
+            db_writer.write_many(res)
+            closed = db_writer.close()
+            if not closed or db_writer.take_errors():
+                raise RuntimeError(f"Failed to write the merged models to {kargs['db_path']}.")
         self._merge_models_res = res
-        logger.info(f"Total model records: {len(buffer)}")
+        logger.info(f"Total model records: {len(merger)}")
         return self
         
     def _merge_dataset(self, save, **kargs):
         logger.info("Merge datasets")
-        buffer = defaultdict(list)
-        for p in self.data_dir.iterdir():
-            data_path = p / 'processed-datasets-info.jsonl'
-            if not data_path.exists():
-                continue
-            with jsonlines.open(data_path, 'r') as reader:
-                for data in reader:
-                    key = f"{data['org']}/{data['dataset_name']}"
-                    buffer[key].append(data)
-        if len(buffer) == 0:
+        merger = MergeAggregator(DATASET_MERGE).update_from(
+            p / 'processed-datasets-info.jsonl' for p in self.data_dir.iterdir()
+        )
+        if len(merger) == 0:
             raise RuntimeError("No processed data found.")
         save_path = self.data_dir / 'merged-datasets-info.jsonl'
-        res = []
-        with jsonlines.open(save_path, 'w') as writer:
-            for _, datasets in buffer.items():
-                data = {
-                    "org": datasets[0]['org'],
-                    "repo": datasets[0]['repo'],
-                    "dataset_name": datasets[0]['dataset_name'],
-                    "modality": datasets[0]['modality'],
-                    "lifecycle": datasets[0]['lifecycle'],
-                    "downloads_last_month": sum(dataset['downloads_last_month']
-                                                for dataset in datasets
-                                                if dataset['downloads_last_month'] > 0),
-                    "likes": sum(dataset['likes'] for dataset in datasets),
-                    "community": sum(dataset['community'] for dataset in datasets
-                                        if 'community' in dataset),
-                    "dataset_usage": sum(dataset['dataset_usage'] for dataset in datasets
-                                            if 'dataset_usage' in dataset),
-                    "date_crawl": datasets[0]['date_crawl'],
-                } # TODO Currently missing the date_last_crawl and date_enter_db fields
-                writer.write(data)
-                res.append(data)
+        # TODO Currently missing the date_last_crawl and date_enter_db fields
+        res = merger.results()
+        with open_jsonl(save_path, 'w') as writer:
+            writer.write_all(res)
+        if kargs.get('db_path'):
+            db_writer = DBWriter(kargs['db_path'], 'datasets')
+            db_writer.write_many(res)
+            closed = db_writer.close()
+            if not closed or db_writer.take_errors():
+                raise RuntimeError(f"Failed to write the merged datasets to {kargs['db_path']}.")
         self._merge_datasets_res = res
-        logger.info(f"Total datasets records: {len(buffer)}")
+        logger.info(f"Total datasets records: {len(merger)}")
         return self
 
     def _summary_data(
@@ -1068,64 +1162,8 @@ class MergeAndRankingPipeline:
         config: dict,
         target_orgs: list,
     ) -> pd.DataFrame:
-        weights: dict[str, float | int] = config[1]
-        if target_orgs[0] == 'all':
-            target_orgs = df['org'].unique()
-        res = pd.DataFrame(index=target_orgs)
-        lifecycle_mapper = {
-            'pretraining': 'Pre-training',
-            'finetuning': 'Fine-tuning',
-            'preference': 'Preference'
-        }
-        
-        # TODO temp handle other source dataset
-        data_path = self.data_dir / 'other-source-datasets.jsonl'
-        if data_path.exists():
-            other_data = pd.read_json(data_path, lines=True)
-        
-        for key in weights.keys():
-            if key.startswith('num'):
-                if key.split("_")[-1] in ['pretraining', 'finetuning', 'preference']:
-                    lifecycle = lifecycle_mapper.get(key.split("_")[-1])
-                    res[key] = df[df["lifecycle"] == lifecycle].groupby(
-                        'org').size().reindex(target_orgs, fill_value=0)
-                    
-                    # TODO temp handle other source dataset
-                    if data_path.exists():
-                        res[key] += other_data[other_data['lifecycle'] == lifecycle].groupby(
-                            'org').size().reindex(target_orgs, fill_value=0)
-                else:
-                    modality = key.split("_")[-1].title()
-                    res[key] = df[df['modality'] == modality].groupby(
-                        'org').size().reindex(target_orgs, fill_value=0)
-                    
-                    # TODO temp handle other source dataset
-                    if data_path.exists():
-                        res[key] += other_data[other_data['modality'] == modality].groupby(
-                            'org').size().reindex(target_orgs, fill_value=0)
-            elif key.startswith("downloads"):
-                if key.split("_")[-1] in ['pretraining', 'finetuning', 'preference']:
-                    lifecycle = lifecycle_mapper.get(key.split("_")[-1])
-                    res[key] = df[df["lifecycle"] == lifecycle].groupby(
-                        'org')['downloads_last_month'].sum().reindex(target_orgs, fill_value=0)
-                else: 
-                    modality = key.split("_")[-1].title()
-                    res[key] = df[df['modality'] == modality].groupby(
-                        'org')['downloads_last_month'].sum().reindex(target_orgs, fill_value=0)
-            elif key == 'dataset_usage':
-                res[key] = df.groupby('org')['dataset_usage'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'operators':
-                # TODO data process tool operators
-                res[key] = pd.Series({
-                    "BAAI": 24,
-                    "Ali": 105,
-                }).reindex(target_orgs, fill_value=0)
-            else:
-                raise RuntimeError(f"Unrecognized field {key}")
-            
-        res.index.name = 'org'
-        return res
+        other = read_other_source_datasets(self.data_dir)
+        return summarize_datasets(df, config[1], target_orgs, 'downloads_last_month', other)
 
     def _summary_model(
         self, 
@@ -1133,101 +1171,36 @@ class MergeAndRankingPipeline:
         config: dict,
         target_orgs: list,
     ) -> pd.DataFrame:
-        weights: dict[str, float | int] = config[1]
-        if target_orgs[0] == 'all':
-            target_orgs = df['org'].unique()
-        res = pd.DataFrame(index=target_orgs)
-        for key in weights.keys():
-            if key.startswith('num') and key != 'num_adapted_chips':
-                modality = key.split("_")[-1].title()
-                res[key] = df[df['modality'] == modality].groupby(
-                    'org').size().reindex(target_orgs, fill_value=0)
-            elif key.startswith('downloads'):
-                modality = key.split("_")[-1].title()
-                res[key] = df[df['modality'] == modality].groupby(
-                    'org')['downloads_last_month'].sum().reindex(
-                        target_orgs, fill_value=0)
-            elif key == 'descendants':
-                res[key] = df.groupby('org')['descendants'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'likes':
-                res[key] = df.groupby('org')[key].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'issue':
-                res[key] = df.groupby('org')['community'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'num_adapted_chips':
-                # TODO chips model
-                res[key] = pd.Series({
-                    "BAAI": 4,
-                    "Baidu": 2,
-                    "Huawei": 2,
-                    "Meta": 2,
-                    "Google": 2,
-                    "ByteDance": 2
-                }).reindex(target_orgs, fill_value=1)
-            else:
-                raise RuntimeError(f"Unrecognized field {key}")
-
-        res.index.name = 'org'
-        return res
+        return summarize_models(df, config[1], target_orgs, 'downloads_last_month')
 
     def _summary_infra(self, config: dict, target_orgs: list) -> pd.DataFrame:
         infra_path = self.data_dir / 'infra-summary.csv'
-        weights: dict[str, float | int] = config[1]
-        df = pd.read_csv(infra_path, index_col='org')
-        if target_orgs[0] == 'all':
-            target_orgs = df.index.unique()
-        df = df[df.columns.intersection(weights.keys())]
-        df = df[df.index.isin(target_orgs)]
-        return df
+        return select_summary(pd.read_csv(infra_path, index_col='org'), config, target_orgs)
     
     def _summary_eval(self, config: dict, target_orgs: list) -> pd.DataFrame:
         eval_path = self.data_dir / 'eval-summary.csv'
-        weights: dict[str, float | int] = config[1]
-        df = pd.read_csv(eval_path, index_col='org')
-        if target_orgs[0] == 'all':
-            target_orgs = df.index.unique()
-        df = df[df.columns.intersection(weights.keys())]
-        df = df[df.index.isin(target_orgs)]
-        return df
+        return select_summary(pd.read_csv(eval_path, index_col='org'), config, target_orgs)
 
     def _normalize_summary(self, summary: pd.DataFrame, config: dict) -> pd.DataFrame:
-        df = summary.div(summary.max())
-        weights = config[1]
-        weights = {
-            k: v if isinstance(v, (int, float)) else eval(v)
-            for k, v in weights.items() if k in summary.columns
-        }
-        if config[0] == 'average':
-            df['score'] = df.mean(axis=1)
-            df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
-        elif config[0] == 'weight':
-            df['score'] = df.mul(weights).sum(axis=1)
-            df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
-        else:
-            raise RuntimeError(f'Unrecognized method: {config[0]}, accept `average` or `weight`')
-        return df
+        return normalize_summary(summary, config)
 
     def _ranking(self, save, **kargs):
         logger.info("Calculate ranking.")
 
         if not hasattr(self, "_merge_models_res"):
             logger.info(f"Trying load merged models from {self.data_dir}")
-            merged_models = pd.read_json(self.data_dir/'merged-models-info.jsonl', 
-                                         lines=True)
+            merged_models = read_frame(self.data_dir/'merged-models-info.jsonl')
         else:
             merged_models = pd.DataFrame(self._merge_models_res)
         if not hasattr(self, "_merge_datasets_res"):
             logger.info(f"Trying load merged datasets from {self.data_dir}")
-            merged_datasets = pd.read_json(self.data_dir/'merged-datasets-info.jsonl', 
-                                           lines=True)
+            merged_datasets = read_frame(self.data_dir/'merged-datasets-info.jsonl')
         else:
             merged_datasets = pd.DataFrame(self._merge_datasets_res)
 
         kargs = {k: v for k, v in kargs.items() if k in [
             'data_config', 'model_config', 'infra_config', 'eval_config',
-            'target_orgs', 'ranking_weights'
+            'target_orgs', 'ranking_weights', 'delta'
         ]}
         target_orgs = kargs.get('target_orgs', ['all'])
         
@@ -1245,17 +1218,6 @@ class MergeAndRankingPipeline:
         data_summary = self._summary_data(merged_datasets, kargs['data_config'], target_orgs)
         model_summary = self._summary_model(merged_models, kargs['model_config'], target_orgs)
         
-        if self.data_dir_last_month:
-            data_summary_last_month = pd.read_csv(self.data_dir_last_month/'data-summary.csv',
-                                                  index_col='org')
-            model_summary_last_month = pd.read_csv(self.data_dir_last_month/'model-summary.csv',
-                                                   index_col='org')
-            data_summary_delta = data_summary - data_summary_last_month
-            model_summary_delta = model_summary - model_summary_last_month
-            
-            data_summary_delta.to_csv(self.data_dir / "data-summary-delta.csv")
-            model_summary_delta.to_csv(self.data_dir / "model-summary-delta.csv")
-        
         data_summary.to_csv(self.data_dir / "data-summary.csv")
         model_summary.to_csv(self.data_dir / "model-summary.csv")
 
@@ -1264,54 +1226,24 @@ class MergeAndRankingPipeline:
         model_normalization = self._normalize_summary(model_summary, kargs['model_config'])
         infra_normalization = self._normalize_summary(infra_summary, kargs['infra_config'])
         eval_normalization = self._normalize_summary(eval_summary, kargs['eval_config'])
-        
-        if self.data_dir_last_month:
-            data_rank_last_month = pd.read_csv(self.data_dir_last_month/'data-rank.csv',
-                                               index_col='org')
-            model_rank_last_month = pd.read_csv(self.data_dir_last_month/'model-rank.csv',
-                                                index_col='org')
-            infra_rank_last_month = pd.read_csv(self.data_dir_last_month/'infra-rank.csv',
-                                                index_col='org')
-            eval_rank_last_month = pd.read_csv(self.data_dir_last_month/'eval-rank.csv',
-                                               index_col='org')
-            data_normalization['delta rank'] = data_rank_last_month['rank'] - data_normalization['rank']
-            model_normalization['delta rank'] = model_rank_last_month['rank'] - model_normalization['rank']
-            infra_normalization['delta rank'] = infra_rank_last_month['rank'] - infra_normalization['rank']
-            eval_normalization['delta rank'] = eval_rank_last_month['rank'] - eval_normalization['rank']
-        
-        data_normalization.to_csv(self.data_dir / 'data-rank.csv')
-        model_normalization.to_csv(self.data_dir / 'model-rank.csv')
-        infra_normalization.to_csv(self.data_dir / 'infra-rank.csv')
-        eval_normalization.to_csv(self.data_dir / 'eval-rank.csv')
 
         logger.info("Calculate overall ranking based on sub-dimension rankings.")
-        orgs = data_normalization.index.intersection(
-            model_normalization.index
-        ).intersection(
-            infra_normalization.index
-        ).intersection(
-            eval_normalization.index
-        )
-        overall_ranking = pd.DataFrame(index=orgs)
-        overall_ranking.index.name = 'org'
-        overall_ranking['data'] = 1 / np.log2(data_normalization['rank'] + 1)
-        overall_ranking['model'] = 1 / np.log2(model_normalization['rank'] + 1)
-        overall_ranking['infra'] = 1 / np.log2(infra_normalization['rank'] + 1)
-        overall_ranking['eval'] = 1 / np.log2(eval_normalization['rank'] + 1)
-        overall_weights = kargs['ranking_weights']
-        overall_weights = {
-            k: v if isinstance(v, (int, float)) else eval(v)
-            for k, v in overall_weights.items()
-        }
-        overall_ranking['score'] = overall_ranking.mul(overall_weights).sum(axis=1)
-        overall_ranking['rank'] = overall_ranking['score'].rank(ascending=False, method='dense').astype(int)
+        overall_ranking = rank_overall({
+            'data': data_normalization,
+            'model': model_normalization,
+            'infra': infra_normalization,
+            'eval': eval_normalization,
+        }, kargs['ranking_weights'])
         
-        if self.data_dir_last_month:
-            overall_ranking_last_month = pd.read_csv(self.data_dir_last_month/'overall-rank.csv',
-                                                     index_col='org')
-            overall_ranking['delta rank'] = overall_ranking_last_month['rank'] - overall_ranking['rank']
-        
-        overall_ranking.to_csv(self.data_dir / "overall-rank.csv")
+        summaries = dict(zip(self.summary_files, [data_summary, model_summary]))
+        ranks = dict(zip(self.rank_files, [
+            data_normalization, model_normalization, infra_normalization, eval_normalization,
+            overall_ranking,
+        ]))
+        if kargs.get('delta', True):
+            _add_deltas(self, summaries, ranks)
+        for name, df in ranks.items():
+            df.to_csv(self.data_dir / name)
         return self
 
 
@@ -1341,32 +1273,22 @@ class AccumulateAndRankingPipeline:
         logger.add(sys.stderr, level="DEBUG")
         logger.add(log_path, level="DEBUG")
         
+    # Tables compared with the previous snapshot by the `delta` stage.
+    summary_files = []
+    rank_files = ['data-accumulated-rank.csv', 'model-accumulated-rank.csv',
+                  'overall-accumulated-rank.csv']
+    
     def _get_last_month_path(self, date: str):
-        date = datetime.strptime(date, r"%Y-%m-%d")
-        last_month_date = date - timedelta(days=30)
-        
-        min_diff = None
-        closest_date = None
-        
-        for d in sorted((Path(__file__).parents[2]/'data').glob(r"????-??-??"))[1:]:
-            cur_date = datetime.strptime(d.name, r"%Y-%m-%d")
-            diff = abs((cur_date - last_month_date).days)
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_date = d
-                
-        if min_diff > 15:
-            return None
-        
-        if (closest_date / 'overall-accumulated-rank.csv').exists():
-            return closest_date
-        return closest_date
+        catalog = SnapshotCatalog.load(self.data_dir.parent)
+        snapshot = catalog.nearest(date, dates=catalog.dates()[1:])
+        return snapshot.path if snapshot else None
         
     def step(
         self,
         stage: Literal[
             'accumulate',
-            'ranking'
+            'ranking',
+            'delta',
         ],
         save: bool = True,
         **kargs,
@@ -1376,57 +1298,40 @@ class AccumulateAndRankingPipeline:
                 return self._accumulate(save, **kargs)
             case 'ranking':
                 return self._ranking(save, **kargs)
+            case 'delta':
+                return _apply_deltas(self, save)
     
     def done(self):
+        _update_catalog(self.data_dir)
         logger.success("AccumulateAndRankingPipeline done.")
     
     def _accumulate(self, save, **kargs):
-        date = datetime.strptime(self.date, r"%Y-%m-%d")
         base_path = self.data_dir.parent
-        models_buffer = defaultdict(list)
-        datasets_buffer = defaultdict(list)
-        for path in sorted(base_path.glob("????-??-??"))[1:]:
-            if datetime.strptime(path.name, r"%Y-%m-%d") > date:
-                continue
-            with jsonlines.open(path/'merged-models-info.jsonl', 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['model_name']}"
-                    models_buffer[key].append(item)
-            with jsonlines.open(path/'merged-datasets-info.jsonl', 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['dataset_name']}"
-                    datasets_buffer[key].append(item)
-        models_buffer = [
-            {
-                'org': lst[0]['org'],
-                'repo': lst[0]['repo'],
-                'model_name': lst[0]['model_name'],
-                'modality': lst[0]['modality'],
-                'accumulated_downloads': sum(item['downloads_last_month'] for item in lst),
-                'likes': max([item['likes'] for item in lst]),
-                'community': max([item['community'] for item in lst]),
-                'descendants': max([item['descendants'] for item in lst]), 
-            }
-            for lst in models_buffer.values()
-        ]
-        datasets_buffer = [
-            {
-                'org': lst[0]['org'],
-                'repo': lst[0]['repo'],
-                'dataset_name': lst[0]['dataset_name'],
-                'modality': lst[0]['modality'],
-                'lifecycle': lst[0]['lifecycle'],
-                'accumulated_downloads': sum(item['downloads_last_month'] for item in lst),
-                'likes': max([item['likes'] for item in lst]),
-                'community': max([item['community'] for item in lst]),
-                'dataset_usage': max([item['dataset_usage'] for item in lst])
-            }
-            for lst in datasets_buffer.values()
-        ]
-        with jsonlines.open(self.data_dir/'accumulated-models-info.jsonl', 'w') as f:
+        catalog = SnapshotCatalog.load(base_path)
+        history = accumulation_history(catalog, self.date)
+        checkpoints = AccumulateCheckpoints(base_path)
+        models = Accumulator(MODEL_ACCUMULATE)
+        datasets = Accumulator(DATASET_ACCUMULATE)
+        start = checkpoints.latest(history)
+        if start is None:
+            start = 0
+        else:
+            checkpoint = history[start]
+            logger.info(f"Resume accumulation from the checkpoint of {checkpoint.date}")
+            models.load(checkpoint.path/'accumulated-models-info.jsonl')
+            datasets.load(checkpoint.path/'accumulated-datasets-info.jsonl')
+            start += 1
+        for snapshot in history[start:]:
+            models.update(iter_records(snapshot.path/'merged-models-info.jsonl'))
+            datasets.update(iter_records(snapshot.path/'merged-datasets-info.jsonl'))
+        models_buffer = models.results()
+        datasets_buffer = datasets.results()
+        with open_jsonl(self.data_dir/'accumulated-models-info.jsonl', 'w') as f:
             f.write_all(models_buffer)
-        with jsonlines.open(self.data_dir/'accumulated-datasets-info.jsonl', 'w') as f:
+        with open_jsonl(self.data_dir/'accumulated-datasets-info.jsonl', 'w') as f:
             f.write_all(datasets_buffer)
+        if history and history[-1].date == self.date:
+            checkpoints.record(history)
             
         self._accumulated_models = models_buffer
         self._accumulated_datasets = datasets_buffer
@@ -1438,64 +1343,8 @@ class AccumulateAndRankingPipeline:
         config: dict,
         target_orgs: list,
     ) -> pd.DataFrame:
-        weights: dict[str, float | int] = config[1]
-        if target_orgs[0] == 'all':
-            target_orgs = df['org'].unique()
-        res = pd.DataFrame(index=target_orgs)
-        lifecycle_mapper = {
-            'pretraining': 'Pre-training',
-            'finetuning': 'Fine-tuning',
-            'preference': 'Preference'
-        }
-        
-        # TODO temp handle other source dataset
-        data_path = self.data_dir / 'other-source-datasets.jsonl'
-        if data_path.exists():
-            other_data = pd.read_json(data_path, lines=True)
-            
-        for key in weights.keys():
-            if key.startswith('num'):
-                if key.split("_")[-1] in ['pretraining', 'finetuning', 'preference']:
-                    lifecycle = lifecycle_mapper.get(key.split("_")[-1])
-                    res[key] = df[df["lifecycle"] == lifecycle].groupby(
-                        'org').size().reindex(target_orgs, fill_value=0)
-                    
-                    # TODO temp handle other source dataset
-                    if data_path.exists():
-                        res[key] += other_data[other_data['lifecycle'] == lifecycle].groupby(
-                            'org').size().reindex(target_orgs, fill_value=0)
-                else:
-                    modality = key.split("_")[-1].title()
-                    res[key] = df[df['modality'] == modality].groupby(
-                        'org').size().reindex(target_orgs, fill_value=0)
-                    
-                    # TODO temp handle other source dataset
-                    if data_path.exists():
-                        res[key] += other_data[other_data['modality'] == modality].groupby(
-                            'org').size().reindex(target_orgs, fill_value=0)
-            elif key.startswith("downloads"):
-                if key.split("_")[-1] in ['pretraining', 'finetuning', 'preference']:
-                    lifecycle = lifecycle_mapper.get(key.split("_")[-1])
-                    res[key] = df[df["lifecycle"] == lifecycle].groupby(
-                        'org')['accumulated_downloads'].sum().reindex(target_orgs, fill_value=0)
-                else: 
-                    modality = key.split("_")[-1].title()
-                    res[key] = df[df['modality'] == modality].groupby(
-                        'org')['accumulated_downloads'].sum().reindex(target_orgs, fill_value=0)
-            elif key == 'dataset_usage':
-                res[key] = df.groupby('org')['dataset_usage'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'operators':
-                # TODO data process tool operators
-                res[key] = pd.Series({
-                    "BAAI": 24,
-                    "Ali": 105,
-                }).reindex(target_orgs, fill_value=0)
-            else:
-                raise RuntimeError(f"Unrecognized field {key}")
-            
-        res.index.name = 'org'
-        return res
+        other = read_other_source_datasets(self.data_dir)
+        return summarize_datasets(df, config[1], target_orgs, 'accumulated_downloads', other)
 
     def _summary_model(
         self, 
@@ -1503,101 +1352,36 @@ class AccumulateAndRankingPipeline:
         config: dict,
         target_orgs: list,
     ) -> pd.DataFrame:
-        weights: dict[str, float | int] = config[1]
-        if target_orgs[0] == 'all':
-            target_orgs = df['org'].unique()
-        res = pd.DataFrame(index=target_orgs)
-        for key in weights.keys():
-            if key.startswith('num') and key != 'num_adapted_chips':
-                modality = key.split("_")[-1].title()
-                res[key] = df[df['modality'] == modality].groupby(
-                    'org').size().reindex(target_orgs, fill_value=0)
-            elif key.startswith('downloads'):
-                modality = key.split("_")[-1].title()
-                res[key] = df[df['modality'] == modality].groupby(
-                    'org')['accumulated_downloads'].sum().reindex(
-                        target_orgs, fill_value=0)
-            elif key == 'descendants':
-                res[key] = df.groupby('org')['descendants'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'likes':
-                res[key] = df.groupby('org')[key].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'issue':
-                res[key] = df.groupby('org')['community'].sum().reindex(
-                    target_orgs, fill_value=0)
-            elif key == 'num_adapted_chips':
-                # TODO chips model
-                res[key] = pd.Series({
-                    "BAAI": 4,
-                    "Baidu": 2,
-                    "Huawei": 2,
-                    "Meta": 2,
-                    "Google": 2,
-                    "ByteDance": 2
-                }).reindex(target_orgs, fill_value=1)
-            else:
-                raise RuntimeError(f"Unrecognized field {key}")
+        return summarize_models(df, config[1], target_orgs, 'accumulated_downloads')
 
-        res.index.name = 'org'
-        return res
-    
     def _summary_infra(self, config: dict, target_orgs: list) -> pd.DataFrame:
         infra_path = self.data_dir / 'infra-summary.csv'
-        weights: dict[str, float | int] = config[1]
-        df = pd.read_csv(infra_path, index_col='org')
-        if target_orgs[0] == 'all':
-            target_orgs = df.index.unique()
-        df = df[df.columns.intersection(weights.keys())]
-        df = df[df.index.isin(target_orgs)]
-        return df
+        return select_summary(pd.read_csv(infra_path, index_col='org'), config, target_orgs)
     
     def _summary_eval(self, config: dict, target_orgs: list) -> pd.DataFrame:
         eval_path = self.data_dir / 'eval-summary.csv'
-        weights: dict[str, float | int] = config[1]
-        df = pd.read_csv(eval_path, index_col='org')
-        if target_orgs[0] == 'all':
-            target_orgs = df.index.unique()
-        df = df[df.columns.intersection(weights.keys())]
-        df = df[df.index.isin(target_orgs)]
-        return df
+        return select_summary(pd.read_csv(eval_path, index_col='org'), config, target_orgs)
     
     def _normalize_summary(self, summary: pd.DataFrame, config: dict) -> pd.DataFrame:
-        df = summary.div(summary.max())
-        weights = config[1]
-        weights = {
-            k: v if isinstance(v, (int, float)) else eval(v)
-            for k, v in weights.items() if k in summary.columns
-        }
-        if config[0] == 'average':
-            df['score'] = df.mean(axis=1)
-            df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
-        elif config[0] == 'weight':
-            df['score'] = df.mul(weights).sum(axis=1)
-            df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
-        else:
-            raise RuntimeError(f'Unrecognized method: {config[0]}, accept `average` or `weight`')
-        return df
+        return normalize_summary(summary, config)
 
     def _ranking(self, save, **kargs):
         logger.info("Calculate accumulated ranking.")
         
         if not hasattr(self, '_accumulated_models'):
             logger.info(f"Trying load accumulated models from {self.data_dir}")
-            accumulated_models = pd.read_json(self.data_dir/'accumulated-models-info.jsonl',
-                                              lines=True)
+            accumulated_models = read_frame(self.data_dir/'accumulated-models-info.jsonl')
         else:
             accumulated_models = pd.DataFrame(self._accumulated_models)
         if not hasattr(self, '_accumulated_datasets'):
             logger.info(f"Trying load accumulated datasets from {self.data_dir}")
-            accumulated_datasets = pd.read_json(self.data_dir/'accumulated-datasets-info.jsonl',
-                                                lines=True)
+            accumulated_datasets = read_frame(self.data_dir/'accumulated-datasets-info.jsonl')
         else:
             accumulated_datasets = pd.DataFrame(self._accumulated_datasets)
 
         kargs = {k: v for k, v in kargs.items() if k in [
             'data_config', 'model_config', 'infra_config', 'eval_config',
-            'target_orgs', 'ranking_weights'
+            'target_orgs', 'ranking_weights', 'delta'
         ]}
         target_orgs = kargs.get('target_orgs', ['all'])
         
@@ -1621,46 +1405,18 @@ class AccumulateAndRankingPipeline:
         model_normalization = self._normalize_summary(model_summary, kargs['model_config'])
         infra_normalization = self._normalize_summary(infra_summary, kargs['infra_config'])
         eval_normalization = self._normalize_summary(eval_summary, kargs['eval_config'])
-        
-        if self.data_dir_last_month:
-            data_rank_last_month = pd.read_csv(
-                self.data_dir_last_month/'data-accumulated-rank.csv',
-                index_col='org')
-            model_rank_last_month = pd.read_csv(
-                self.data_dir_last_month/'model-accumulated-rank.csv',
-                index_col='org')
-            data_normalization['delta rank'] = data_rank_last_month['rank'] - data_normalization['rank']
-            model_normalization['delta rank'] = model_rank_last_month['rank'] - model_normalization['rank']
-            
-        data_normalization.to_csv(self.data_dir/'data-accumulated-rank.csv')
-        model_normalization.to_csv(self.data_dir/'model-accumulated-rank.csv')
 
         logger.info("Calculate overall ranking based on sub-dimension rankings.")
-        orgs = data_normalization.index.intersection(
-            model_normalization.index
-        ).intersection(
-            infra_normalization.index
-        ).intersection(
-            eval_normalization.index
-        )
-        overall_ranking = pd.DataFrame(index=orgs)
-        overall_ranking['data'] = 1 / np.log2(data_normalization['rank'] + 1)
-        overall_ranking['model'] = 1 / np.log2(model_normalization['rank'] + 1)
-        overall_ranking['infra'] = 1 / np.log2(infra_normalization['rank'] + 1)
-        overall_ranking['eval'] = 1 / np.log2(eval_normalization['rank'] + 1)
-        overall_weights = kargs['ranking_weights']
-        overall_weights = {
-            k: v if isinstance(v, (int, float)) else eval(v)
-            for k, v in overall_weights.items()
-        }
-        overall_ranking['score'] = overall_ranking.mul(overall_weights).sum(axis=1)
-        overall_ranking['rank'] = overall_ranking['score'].rank(ascending=False, method='dense').astype(int)
-        
-        if self.data_dir_last_month:
-            overall_ranking_last_month = pd.read_csv(
-                self.data_dir_last_month/'overall-accumulated-rank.csv',
-                index_col='org')
-            overall_ranking['delta rank'] = overall_ranking_last_month['rank'] - overall_ranking['rank']
+        overall_ranking = rank_overall({
+            'data': data_normalization,
+            'model': model_normalization,
+            'infra': infra_normalization,
+            'eval': eval_normalization,
+        }, kargs['ranking_weights'])
         
-        overall_ranking.to_csv(self.data_dir/"overall-accumulated-rank.csv")
+        ranks = dict(zip(self.rank_files, [data_normalization, model_normalization, overall_ranking]))
+        if kargs.get('delta', True):
+            _add_deltas(self, {}, ranks)
+        for name, df in ranks.items():
+            df.to_csv(self.data_dir / name)
         return self
@@ -2,10 +2,11 @@ import requests
 import traceback
 from datetime import datetime
 from dataclasses import dataclass, field
+from ..records import Record
 
 
-@dataclass
-class BAAIDataInfo:
+@dataclass(slots=True)
+class BAAIDataInfo(Record):
     org: str = field(init=False, default="BAAI")
     repo: str = field(init=False, default="BAAI")
     dataset_name: str = field()
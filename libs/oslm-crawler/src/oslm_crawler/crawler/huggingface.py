@@ -9,10 +9,11 @@ from datetime import datetime
 from typing import Literal, Optional
 from dataclasses import dataclass, field
 from .utils import str2int
+from ..records import Record
 
 
-@dataclass
-class HFRepoInfo:
+@dataclass(slots=True)
+class HFRepoInfo(Record):
     repo: str
     repo_url: str
     category: Literal['datasets', 'models']
@@ -21,8 +22,8 @@ class HFRepoInfo:
     error_msg: Optional[Exception] = None
 
 
-@dataclass
-class HFModelInfo:
+@dataclass(slots=True)
+class HFModelInfo(Record):
     repo: str = field(init=False)
     model_name: str = field(init=False)
     downloads_last_month: Optional[int] = field(init=False, default=None)
@@ -45,8 +46,8 @@ class HFModelInfo:
             self.descendants = sum(str2int(x) for x in self.metadata["tree"])
 
 
-@dataclass
-class HFDatasetInfo:
+@dataclass(slots=True)
+class HFDatasetInfo(Record):
     repo: str = field(init=False)
     dataset_name: str = field(init=False)
     downloads_last_month: Optional[int] = field(init=False, default=None)
@@ -9,10 +9,11 @@ from datetime import datetime
 from typing import Literal, Optional
 from dataclasses import dataclass, field
 from .utils import str2int
+from ..records import Record
 
 
-@dataclass
-class MSRepoInfo:
+@dataclass(slots=True)
+class MSRepoInfo(Record):
     repo: str
     repo_url: str
     category: Literal['datasets', 'models']
@@ -21,8 +22,8 @@ class MSRepoInfo:
     error_msg: Optional[str] = None
     
     
-@dataclass
-class MSModelInfo:
+@dataclass(slots=True)
+class MSModelInfo(Record):
     repo: str = field(init=False)
     model_name: str = field(init=False)
     total_downloads: Optional[int] = field(init=False, default=None)
@@ -43,8 +44,8 @@ class MSModelInfo:
             self.community = str2int(self.metadata['community'])
 
 
-@dataclass
-class MSDatasetInfo:
+@dataclass(slots=True)
+class MSDatasetInfo(Record):
     repo: str = field(init=False)
     dataset_name: str = field(init=False)
     total_downloads: Optional[int] = field(init=False, default=None)
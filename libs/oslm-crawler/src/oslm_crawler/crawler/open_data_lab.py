@@ -8,10 +8,11 @@ from datetime import datetime
 from typing import Optional, Union
 from dataclasses import dataclass, field
 from .utils import str2int
+from ..records import Record
 
 
-@dataclass
-class OpenDataLabInfo:
+@dataclass(slots=True)
+class OpenDataLabInfo(Record):
     org: str = field(init=False, default="ShanghaiAILab")
     repo: str = field(init=False)
     dataset_name: str = field(init=False)
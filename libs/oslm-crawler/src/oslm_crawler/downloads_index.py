@@ -0,0 +1,199 @@
+"""
+Persistent time-series index of `total_downloads` per (source, repo/name, date).
+
+ModelScope, OpenDataLab and BAAIData only expose cumulative downloads, so the monthly value is
+computed as a delta against the snapshot crawled about 30 days earlier. The index keeps those
+historical values in a sqlite file next to the data directory, so the processors no longer
+re-parse old `raw-*-info.jsonl` files on every run. Snapshots are (re)ingested lazily whenever
+the raw file is missing from the index or has changed since it was ingested.
+"""
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+from .codec import iter_jsonl, resolve
+
+# source -> [(raw file name, name field)]
+SOURCE_FILES = {
+    'ModelScope': [
+        ('raw-models-info.jsonl', 'model_name'),
+        ('raw-datasets-info.jsonl', 'dataset_name'),
+    ],
+    'OpenDataLab': [
+        ('raw-datasets-info.jsonl', 'dataset_name'),
+    ],
+    'BAAIData': [
+        ('raw-datasets-info.jsonl', 'dataset_name'),
+    ],
+}
+
+_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def nearest_snapshot(
+    date_crawl: str,
+    dates,
+    days: int = 30,
+    max_diff: int = 15,
+) -> Optional[str]:
+    """Return the snapshot date closest to `date_crawl - days`, or None if it is more than
+    `max_diff` days away."""
+    target = datetime.strptime(date_crawl, r"%Y-%m-%d") - timedelta(days=days)
+    min_diff = None
+    closest_date = None
+    for date in dates:
+        diff = abs((datetime.strptime(date, r"%Y-%m-%d") - target).days)
+        if min_diff is None or diff < min_diff:
+            min_diff = diff
+            closest_date = date
+    if min_diff is None or min_diff > max_diff:
+        return None
+    return closest_date
+
+
+class DownloadsIndex:
+
+    create_tables = """
+        CREATE TABLE IF NOT EXISTS downloads (
+            source TEXT NOT NULL,
+            date TEXT NOT NULL,
+            key TEXT NOT NULL,
+            total_downloads INTEGER,
+            PRIMARY KEY (source, date, key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS snapshots (
+            source TEXT NOT NULL,
+            date TEXT NOT NULL,
+            file TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (source, date, file)
+        );
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        if path is None:
+            path = Path(__file__).parents[2] / 'data/downloads-index.db'
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: sqlite3.Connection | None = None
+        self.cache: dict[tuple[str, str], dict[str, int]] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection to the index, opened on first use and again after `close()`."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.executescript(self.create_tables)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _ingested(self, source: str, date: str, path: Path) -> bool:
+        row = self.conn.execute(
+            "SELECT mtime, size FROM snapshots WHERE source = ? AND date = ? AND file = ?",
+            (source, date, path.name)
+        ).fetchone()
+        if row is None:
+            return False
+        stat = path.stat()
+        return row[0] == stat.st_mtime and row[1] == stat.st_size
+
+    def ingest(self, source: str, snapshot_dir: str | Path, force: bool = False) -> int:
+        """Index the raw files of `source` found in `snapshot_dir` (`data/{date}` or
+        `data/{date}/{source}`). Files already indexed and unchanged are skipped unless `force`.
+        Return the number of rows written."""
+        snapshot_dir = Path(snapshot_dir)
+        if snapshot_dir.name == source:
+            snapshot_dir = snapshot_dir.parent
+        date = snapshot_dir.name
+        if not _DATE_PATTERN.match(date):
+            logger.warning(f"Skip indexing {snapshot_dir}: directory name is not a date.")
+            return 0
+
+        paths = [
+            (resolve(snapshot_dir / source / file_name), name_field)
+            for file_name, name_field in SOURCE_FILES[source]
+        ]
+        paths = [(path, name_field) for path, name_field in paths if path.exists()]
+        if not force and all(self._ingested(source, date, path) for path, _ in paths):
+            return 0
+
+        rows = []
+        for path, name_field in paths:
+            for item in iter_jsonl(path):
+                rows.append((
+                    source, date, f"{item['repo']}/{item[name_field]}",
+                    item['total_downloads']
+                ))
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM downloads WHERE source = ? AND date = ?", (source, date)
+            )
+            self.conn.execute(
+                "DELETE FROM snapshots WHERE source = ? AND date = ?", (source, date)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?)", rows
+            )
+            for path, _ in paths:
+                stat = path.stat()
+                self.conn.execute(
+                    "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                    (source, date, path.name, stat.st_mtime, stat.st_size)
+                )
+        self.cache.pop((source, date), None)
+        logger.debug(f"Indexed {len(rows)} {source} downloads of {date}.")
+        return len(rows)
+
+    def backfill(self, data_path: str | Path | None = None) -> int:
+        """Index every snapshot of every source under `data_path`."""
+        if data_path is None:
+            data_path = self.path.parent
+        total = 0
+        for snapshot_dir in sorted(Path(data_path).glob("????-??-??")):
+            for source in SOURCE_FILES:
+                total += self.ingest(source, snapshot_dir)
+        return total
+
+    def dates(self, source: str) -> list[str]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT date FROM snapshots WHERE source = ? ORDER BY date", (source,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, source: str, date: str) -> dict[str, int]:
+        """Return `{repo/name: total_downloads}` of the snapshot `date` for `source`."""
+        if (source, date) not in self.cache:
+            rows = self.conn.execute(
+                "SELECT key, total_downloads FROM downloads WHERE source = ? AND date = ?",
+                (source, date)
+            ).fetchall()
+            self.cache[(source, date)] = dict(rows)
+        return self.cache[(source, date)]
+
+    def last_month_downloads(
+        self,
+        source: str,
+        date_crawl: str,
+        history_data_path: dict[str, Path],
+    ) -> dict[str, int]:
+        """Return the downloads of the snapshot nearest to 30 days before `date_crawl`, chosen
+        among `history_data_path` (`{date: snapshot dir}`). The snapshot is indexed first if
+        needed."""
+        closest_date = nearest_snapshot(date_crawl, history_data_path.keys())
+        if closest_date is None:
+            return {}
+        self.ingest(source, history_data_path[closest_date])
+        return self.get(source, closest_date)
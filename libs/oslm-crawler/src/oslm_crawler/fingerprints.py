@@ -0,0 +1,119 @@
+"""
+Fingerprints of the inputs of the merge and ranking stage of every snapshot.
+
+A fingerprint hashes the processed files of each source, the infra/eval summaries, the other
+source datasets, the ranking config and the outputs of the previous snapshot that the deltas are
+computed against. The checksums come from the snapshot catalog, so computing a fingerprint does
+not read the artifacts again. `gen-rank --all` only recomputes a snapshot whose fingerprint
+changed or whose outputs were modified since they were written; the fingerprints are persisted
+in `data/rank-fingerprints.json`.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+from .catalog import SOURCES, Snapshot, SnapshotCatalog
+
+RANK_INPUTS = [
+    *[f'{source}/processed-datasets-info.jsonl' for source in SOURCES],
+    'HuggingFace/processed-models-info.jsonl',
+    'ModelScope/processed-models-info.jsonl',
+    'other-source-datasets.jsonl',
+    'infra-summary.csv',
+    'eval-summary.csv',
+]
+
+# Outputs of the previous snapshot read by the ranking step.
+PREVIOUS_OUTPUTS = [
+    'data-summary.csv',
+    'model-summary.csv',
+    'data-rank.csv',
+    'model-rank.csv',
+    'infra-rank.csv',
+    'eval-rank.csv',
+    'overall-rank.csv',
+]
+
+RANK_OUTPUTS = [
+    'merged-models-info.jsonl',
+    'merged-datasets-info.jsonl',
+    'data-summary-delta.csv',
+    'model-summary-delta.csv',
+    *PREVIOUS_OUTPUTS,
+]
+
+# Options that do not change the results, at the top level and in the stage configs.
+_IGNORED_CONFIG = ('data_dir', 'log_path', 'force', 'workers')
+_IGNORED_STAGE_CONFIG = ('db_path',)
+
+
+def _checksums(snapshot: Snapshot, artifacts: list[str]) -> dict[str, Optional[str]]:
+    checksums = {}
+    for name in artifacts:
+        info = snapshot.artifact(name)
+        checksums[name] = info['sha256'] if info else None
+    return checksums
+
+
+class RankFingerprints:
+
+    def __init__(self, data_path: str | Path | None = None):
+        if data_path is None:
+            data_path = Path(__file__).parents[2] / 'data'
+        self.data_path = Path(data_path)
+        self.path = self.data_path / 'rank-fingerprints.json'
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            with self.path.open('r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def compute(
+        self,
+        snapshot: Snapshot,
+        previous: Snapshot | None,
+        config: dict,
+    ) -> str:
+        config = {
+            k: {kk: vv for kk, vv in v.items() if kk not in _IGNORED_STAGE_CONFIG}
+            if isinstance(v, dict) else v
+            for k, v in config.items() if k not in _IGNORED_CONFIG
+        }
+        state = {
+            'inputs': _checksums(snapshot, RANK_INPUTS),
+            'config': config,
+            'previous': None if previous is None else {
+                'date': previous.date,
+                'outputs': _checksums(previous, PREVIOUS_OUTPUTS),
+            },
+        }
+        encoded = json.dumps(state, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def is_current(self, snapshot: Snapshot, fingerprint: str) -> bool:
+        """Whether `snapshot` was ranked with `fingerprint` and its outputs are unchanged."""
+        entry = self.entries.get(snapshot.date)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return False
+        return entry['outputs'] == _checksums(snapshot, RANK_OUTPUTS)
+
+    def record(self, snapshot: Snapshot, fingerprint: str):
+        self.entries[snapshot.date] = {
+            'fingerprint': fingerprint,
+            'outputs': _checksums(snapshot, RANK_OUTPUTS),
+        }
+        self.save()
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(dict(sorted(self.entries.items())), f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def previous_snapshot(catalog: SnapshotCatalog, date: str) -> Optional[Snapshot]:
+    """The snapshot the deltas of `date` are computed against, as in `MergeAndRankingPipeline`."""
+    snapshot = catalog.nearest(date)
+    if snapshot and snapshot.has('overall-rank.csv'):
+        return snapshot
+    return None
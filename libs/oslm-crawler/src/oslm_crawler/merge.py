@@ -0,0 +1,89 @@
+"""
+Streaming merge of the processed records of several sources.
+
+The same model or dataset may be published on several platforms. `MergeAggregator` folds the
+records into one running total per key in a single pass: attributes are taken from the first
+record seen, `downloads_last_month` only counts positive values and the other counters are
+summed (missing counters count as 0). Memory grows with the number of unique keys only, and the
+output keeps the order in which the keys were first seen.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+from .codec import exists
+from .parquet import iter_records
+
+
+@dataclass(frozen=True)
+class MergeSpec:
+    name_field: str
+    first: tuple[str, ...]
+    positive: tuple[str, ...]
+    sums: tuple[str, ...]
+    fields: tuple[str, ...]
+
+
+MODEL_MERGE = MergeSpec(
+    name_field='model_name',
+    first=('org', 'repo', 'model_name', 'modality', 'date_crawl'),
+    positive=('downloads_last_month',),
+    sums=('likes', 'community', 'descendants'),
+    fields=('org', 'repo', 'model_name', 'modality', 'downloads_last_month', 'likes',
+            'community', 'descendants', 'date_crawl'),
+)
+
+DATASET_MERGE = MergeSpec(
+    name_field='dataset_name',
+    first=('org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'date_crawl'),
+    positive=('downloads_last_month',),
+    sums=('likes', 'community', 'dataset_usage'),
+    fields=('org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month',
+            'likes', 'community', 'dataset_usage', 'date_crawl'),
+)
+
+
+class MergeAggregator:
+
+    def __init__(self, spec: MergeSpec, group_by: str = 'org'):
+        self.spec = spec
+        self.group_by = group_by
+        self.groups: dict[str, dict] = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add(self, record: dict):
+        spec = self.spec
+        key = f"{record[self.group_by]}/{record[spec.name_field]}"
+        item = self.groups.get(key)
+        if item is None:
+            item = {
+                field: record[field] if field in spec.first else 0
+                for field in spec.fields
+            }
+            self.groups[key] = item
+        for field in spec.positive:
+            value = record[field]
+            if value > 0:
+                item[field] += value
+        for field in spec.sums:
+            item[field] += record.get(field, 0)
+        self.total += 1
+
+    def update(self, records: Iterable[dict]) -> "MergeAggregator":
+        for record in records:
+            self.add(record)
+        return self
+
+    def update_from(self, paths: Iterable[str | Path]) -> "MergeAggregator":
+        """Stream the records of every existing jsonl file (compressed, or its parquet copy) in
+        `paths`."""
+        for path in paths:
+            if not exists(path):
+                continue
+            self.update(iter_records(path))
+        return self
+
+    def results(self) -> list[dict]:
+        return list(self.groups.values())
@@ -0,0 +1,275 @@
+"""
+Parquet copies of the JSONL artifacts of a snapshot.
+
+Every `*.jsonl` artifact can be exported to a `*.parquet` sibling with a fixed schema per record
+type (raw, processed, merged and accumulated records of each source), so that ranking,
+accumulation and the database ingest load typed columns instead of re-parsing JSON. Nested values
+such as `metadata` are stored as JSON strings and decoded again by `iter_records`. The JSONL file
+(plain or compressed) stays the source of truth: readers only use the Parquet copy when it is at
+least as recent.
+"""
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TypeVar
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from . import codec
+from .records import Record
+
+R = TypeVar('R', bound=Record)
+
+_JSON = {b'json': b'true'}
+
+
+def _schema(*fields: str) -> pa.Schema:
+    return pa.schema([_FIELDS[name] for name in fields])
+
+
+_FIELDS = {
+    name: pa.field(name, pa.string()) for name in [
+        'org', 'repo', 'model_name', 'dataset_name', 'modality', 'lifecycle', 'date_crawl',
+        'link', 'source', 'img_path', 'error_msg',
+    ]
+} | {
+    name: pa.field(name, pa.int64()) for name in [
+        'downloads_last_month', 'total_downloads', 'accumulated_downloads', 'likes',
+        'community', 'descendants', 'dataset_usage',
+    ]
+} | {
+    'metadata': pa.field('metadata', pa.string(), metadata=_JSON),
+}
+
+# (source directory or None for the snapshot root, file stem) -> schema
+SCHEMAS = {
+    ('HuggingFace', 'raw-models-info'): _schema(
+        'repo', 'model_name', 'downloads_last_month', 'likes', 'community', 'descendants',
+        'date_crawl', 'link', 'img_path', 'error_msg', 'metadata'),
+    ('HuggingFace', 'raw-datasets-info'): _schema(
+        'repo', 'dataset_name', 'downloads_last_month', 'likes', 'community', 'dataset_usage',
+        'date_crawl', 'link', 'img_path', 'error_msg', 'metadata'),
+    ('HuggingFace', 'processed-models-info'): _schema(
+        'org', 'repo', 'model_name', 'modality', 'downloads_last_month', 'likes', 'community',
+        'descendants', 'date_crawl', 'link', 'source', 'img_path'),
+    ('HuggingFace', 'processed-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month', 'likes',
+        'community', 'dataset_usage', 'date_crawl', 'link', 'source', 'img_path'),
+    ('ModelScope', 'raw-models-info'): _schema(
+        'repo', 'model_name', 'total_downloads', 'likes', 'community', 'date_crawl', 'link',
+        'img_path', 'error_msg', 'metadata'),
+    ('ModelScope', 'raw-datasets-info'): _schema(
+        'repo', 'dataset_name', 'total_downloads', 'likes', 'community', 'date_crawl', 'link',
+        'img_path', 'error_msg', 'metadata'),
+    ('ModelScope', 'processed-models-info'): _schema(
+        'org', 'repo', 'model_name', 'modality', 'downloads_last_month', 'total_downloads',
+        'likes', 'community', 'date_crawl', 'link', 'source', 'img_path'),
+    ('ModelScope', 'processed-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month',
+        'total_downloads', 'likes', 'community', 'date_crawl', 'link', 'source', 'img_path'),
+    ('OpenDataLab', 'raw-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'total_downloads', 'likes', 'date_crawl', 'link',
+        'metadata'),
+    ('OpenDataLab', 'processed-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month',
+        'total_downloads', 'likes', 'date_crawl', 'link', 'source'),
+    ('BAAIData', 'raw-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'total_downloads', 'likes', 'date_crawl', 'link'),
+    ('BAAIData', 'processed-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month',
+        'total_downloads', 'likes', 'date_crawl', 'link', 'source'),
+    (None, 'merged-models-info'): _schema(
+        'org', 'repo', 'model_name', 'modality', 'downloads_last_month', 'likes', 'community',
+        'descendants', 'date_crawl'),
+    (None, 'merged-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'downloads_last_month', 'likes',
+        'community', 'dataset_usage', 'date_crawl'),
+    (None, 'accumulated-models-info'): _schema(
+        'org', 'repo', 'model_name', 'modality', 'accumulated_downloads', 'likes', 'community',
+        'descendants'),
+    (None, 'accumulated-datasets-info'): _schema(
+        'org', 'repo', 'dataset_name', 'modality', 'lifecycle', 'accumulated_downloads',
+        'likes', 'community', 'dataset_usage'),
+    (None, 'other-source-datasets'): _schema(
+        'org', 'repo', 'dataset_name', 'link', 'modality', 'lifecycle'),
+}
+
+
+def schema_for(path: str | Path) -> Optional[pa.Schema]:
+    """Return the fixed schema of the artifact at `path` (`.jsonl` or `.parquet`), if known."""
+    path = codec.plain_path(path)
+    source = path.parent.name
+    if (source, path.stem) in SCHEMAS:
+        return SCHEMAS[(source, path.stem)]
+    return SCHEMAS.get((None, path.stem))
+
+
+def parquet_path(path: str | Path) -> Path:
+    return codec.plain_path(path).with_suffix('.parquet')
+
+
+def is_fresh(path: str | Path) -> bool:
+    """Whether the Parquet copy of the JSONL artifact `path` exists and is up to date."""
+    path = codec.resolve(path)
+    target = parquet_path(path)
+    if not target.exists():
+        return False
+    return not path.exists() or target.stat().st_mtime >= path.stat().st_mtime
+
+
+def _column(records: list[dict], field: pa.Field) -> pa.Array:
+    values = [record.get(field.name) for record in records]
+    if field.metadata == _JSON:
+        values = [None if v is None else codec.dumps(v) for v in values]
+    return pa.array(values, type=field.type)
+
+
+def to_table(records: list[dict], schema: pa.Schema | None = None) -> pa.Table:
+    """Convert records to a table with `schema`. Keys missing from the schema get an inferred
+    column (nested values as JSON strings); values that do not fit their declared type make the
+    column inferred as well."""
+    fields = list(schema) if schema is not None else []
+    names = {field.name for field in fields}
+    for record in records:
+        for k, v in record.items():
+            if k in names:
+                continue
+            names.add(k)
+            nested = isinstance(v, (dict, list))
+            fields.append(pa.field(k, pa.string(), metadata=_JSON) if nested else pa.field(k, pa.null()))
+    arrays = []
+    for i, field in enumerate(fields):
+        if pa.types.is_null(field.type):
+            array = pa.array([record.get(field.name) for record in records])
+            fields[i] = pa.field(field.name, array.type)
+        else:
+            try:
+                array = _column(records, field)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                logger.warning(f"Column '{field.name}' does not match {field.type}, inferring it.")
+                array = pa.array([record.get(field.name) for record in records])
+                fields[i] = pa.field(field.name, array.type)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def records_to_table(records: Iterable[Record], schema: pa.Schema | None = None) -> pa.Table:
+    """Convert typed records to a table column by column, without going through dicts. The
+    default schema has one column per field, typed like the artifacts that hold them."""
+    records = list(records)
+    if schema is None:
+        names = type(records[0]).field_names() if records else ()
+        schema = pa.schema([_FIELDS.get(name, pa.field(name, pa.string())) for name in names])
+    arrays = []
+    for field in schema:
+        values = [getattr(record, field.name, None) for record in records]
+        if field.metadata == _JSON:
+            values = [None if v is None else codec.dumps(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(
+    records: list[dict],
+    path: str | Path,
+    schema: pa.Schema | None = None,
+) -> Path:
+    """Write records to `path` atomically (temporary file, then rename)."""
+    path = Path(path)
+    if schema is None:
+        schema = schema_for(path)
+    table = to_table(records, schema)
+    tmp_path = path.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_parquet(path: str | Path, force: bool = False) -> Optional[Path]:
+    """Write the Parquet copy of the JSONL artifact `path` unless it is already up to date.
+    Return the Parquet path, or None if nothing was written."""
+    path = Path(path)
+    if not force and is_fresh(path):
+        return None
+    records = list(codec.iter_jsonl(path))
+    return write_parquet(records, parquet_path(path))
+
+
+def export_snapshot(snapshot_dir: str | Path, force: bool = False) -> list[Path]:
+    """Export every JSONL artifact of a snapshot directory."""
+    written = []
+    paths = {
+        codec.plain_path(path) for pattern in ('*.jsonl', '*.jsonl.zst', '*.jsonl.gz')
+        for path in Path(snapshot_dir).rglob(pattern)
+    }
+    for path in sorted(paths):
+        try:
+            target = export_parquet(path, force)
+        except Exception:
+            logger.exception(f"Failed to export {path} to parquet.")
+            continue
+        if target is not None:
+            written.append(target)
+    if written:
+        logger.info(f"Export {len(written)} parquet artifacts in {snapshot_dir}")
+    return written
+
+
+def _json_columns(schema: pa.Schema) -> list[str]:
+    return [field.name for field in schema if field.metadata == _JSON]
+
+
+def _iter_typed(pf: pq.ParquetFile, record_type: type[R]) -> Iterator[R]:
+    names = [name for name in record_type.field_names() if name in pf.schema_arrow.names]
+    json_columns = set(_json_columns(pf.schema_arrow)) & set(names)
+    for batch in pf.iter_batches(columns=names):
+        columns = []
+        for name in names:
+            values = batch.column(name).to_pylist()
+            if name in json_columns:
+                values = [None if v is None else codec.loads(v) for v in values]
+            columns.append(values)
+        if tuple(names) == record_type.field_names():
+            yield from map(record_type.from_row, zip(*columns))
+        else:
+            for values in zip(*columns):
+                yield record_type(**dict(zip(names, values)))
+
+
+def iter_records(
+    path: str | Path,
+    columns: list[str] | None = None,
+    record_type: type[R] | None = None,
+) -> Iterator[dict | R]:
+    """Yield the records of the JSONL artifact `path`, from its Parquet copy when it is fresh.
+    With `record_type`, only its fields are read and each record is built as that type."""
+    path = Path(path)
+    if is_fresh(path):
+        pf = pq.ParquetFile(parquet_path(path))
+        if record_type is not None:
+            yield from _iter_typed(pf, record_type)
+            return
+        json_columns = _json_columns(pf.schema_arrow)
+        for batch in pf.iter_batches(columns=columns):
+            for record in batch.to_pylist():
+                for k in json_columns:
+                    if record.get(k) is not None:
+                        record[k] = codec.loads(record[k])
+                yield record
+        return
+    if record_type is not None:
+        yield from map(record_type.from_dict, codec.iter_jsonl(path))
+        return
+    for record in codec.iter_jsonl(path):
+        if columns is not None:
+            record = {k: record[k] for k in columns if k in record}
+        yield record
+
+
+def read_frame(path: str | Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Load the JSONL artifact `path` as a DataFrame, from its Parquet copy when it is fresh."""
+    path = Path(path)
+    if is_fresh(path):
+        return pd.read_parquet(parquet_path(path), columns=columns)
+    df = pd.read_json(codec.resolve(path), lines=True)
+    return df if columns is None else df[columns]
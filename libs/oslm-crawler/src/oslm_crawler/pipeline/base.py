@@ -6,6 +6,8 @@ from typing import Any, Generator, TypeAlias
 @dataclass
 class PipelineData:
     
+    # TODO Steps still pass records as dicts, since each adds and drops keys; the typed records
+    # of oslm_crawler.records are only used by the crawlers, writers, parquet and the database.
     data: dict | None
     message: dict | None
     error: dict | None
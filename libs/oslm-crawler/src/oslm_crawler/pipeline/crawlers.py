@@ -2,7 +2,6 @@ import os
 import traceback
 from time import sleep
 from typing import Literal
-from dataclasses import asdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 from .base import PipelineStep, PipelineResult, PipelineData
@@ -178,7 +177,7 @@ class HFDetailPageCrawler(PipelineStep):
                     lc = futures[future]
                     info = future.result()
                     if info.error_msg is None:
-                        data = asdict(info)
+                        data = info.to_dict()
                         msg = data.copy()
                         msg.pop('metadata')
                         data.update(self.data)
@@ -379,7 +378,7 @@ class MSDetailPageCrawler(PipelineStep):
                     lc = futures[future]
                     info = future.result()
                     if info.error_msg is None:
-                        data = asdict(info)
+                        data = info.to_dict()
                         msg = data.copy()
                         msg.pop('metadata')
                         data.update(self.data)
@@ -483,7 +482,7 @@ class OpenDataLabCrawler(PipelineStep):
                             })
                     else:
                         for info in infos:
-                            data = asdict(info)
+                            data = info.to_dict()
                             msg = data.copy()
                             msg.pop('metadata')
                             data.update(self.data)
@@ -533,7 +532,7 @@ class BAAIDatasetsCrawler(PipelineStep):
             if isinstance(infos, str):
                 continue
             for info in infos:
-                data = asdict(info)
+                data = info.to_dict()
                 msg = data.copy()
                 data.update(self.data)
                 yield PipelineData(data, msg, None)
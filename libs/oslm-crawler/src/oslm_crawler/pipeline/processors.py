@@ -1,16 +1,18 @@
 import json
 import traceback
-from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Literal, Optional
 from collections import defaultdict
 from typing_extensions import deprecated
-import jsonlines
 from loguru import logger
 from .base import PipelineStep, PipelineResult, PipelineData
 from ..ai.model_info_generator import ModelInfo, gen_model_info_huggingface, gen_model_info_modelscope
 from ..ai.dataset_info_generator import DatasetInfo, gen_dataset_info_huggingface, gen_dataset_info_modelscope
 from ..ai.screenshot_checker import check_image_info, CheckRequest
+from ..ai.info_classifier import InfoClassifier
+from ..downloads_index import DownloadsIndex
+from ..catalog import SnapshotCatalog
+from ..merge import MergeAggregator, MODEL_MERGE, DATASET_MERGE
 
 
 class HFInfoProcessor(PipelineStep):
@@ -26,6 +28,8 @@ class HFInfoProcessor(PipelineStep):
         ai_check: bool = False,
         buffer_size: int = 8,
         max_retries: int = 3,
+        pre_classify: bool = True,
+        min_confidence: float = 0.9,
     ):
         self.ai_gen = ai_gen
         self.ai_check = ai_check
@@ -49,6 +53,9 @@ class HFInfoProcessor(PipelineStep):
         self.dataset_info_path = dataset_info_path
         self.model_infos = self._init_info(model_info_path)
         self.dataset_infos = self._init_info(dataset_info_path)
+        self.classifier = InfoClassifier(
+            self.model_infos, self.dataset_infos, min_confidence
+        ) if pre_classify else None
         self.models_buffer = []
         self.models_buffer_counter = defaultdict(int)
         self.datasets_buffer = []
@@ -94,6 +101,8 @@ class HFInfoProcessor(PipelineStep):
                 return None
             model_key = f'{repo}/{model_name}'
             model_info = self.model_infos.get(model_key, None)
+            if model_info is None and self.classifier:
+                model_info = self.classifier.model_info(repo, model_name)
             if model_info:
                 modality = model_info['modality']
                 is_large_model = model_info['is_large_model']
@@ -147,6 +156,8 @@ class HFInfoProcessor(PipelineStep):
                 return None
             dataset_key = f'{repo}/{dataset_name}'
             dataset_info = self.dataset_infos.get(dataset_key, None)
+            if dataset_info is None and self.classifier:
+                dataset_info = self.classifier.dataset_info(repo, dataset_name)
             if dataset_info:
                 modality = dataset_info['modality']
                 lifecycle = dataset_info['lifecycle']
@@ -287,6 +298,8 @@ class HFInfoProcessor(PipelineStep):
                     })
             
     def flush(self, update_infos: bool = True) -> Optional[PipelineResult]:
+        if self.classifier:
+            logger.info(f"Local pre-classification: {dict(self.classifier.counter)}")
         if len(self.models_buffer) > 0:
             urls = [inp['link'] for inp in self.models_buffer]
             model_infos = gen_model_info_huggingface(urls)
@@ -348,6 +361,8 @@ class MSInfoProcessor(PipelineStep):
         ai_check: bool = False,
         buffer_size: int = 8,
         max_retries: int = 3,
+        pre_classify: bool = True,
+        min_confidence: float = 0.9,
     ):
         self.ai_gen = ai_gen
         self.ai_check = ai_check
@@ -371,13 +386,18 @@ class MSInfoProcessor(PipelineStep):
             model_info_path = Path(model_info_path)
         else:
             model_info_path = curr_path.parents[3] / 'config/model-info.json'
-        self.history_data_path = {}
-        for p in history_data_path.glob("????-??-??"):
-            self.history_data_path[p.name] = p
+        self.history_data_path = {
+            snapshot.date: snapshot.path
+            for snapshot in SnapshotCatalog.load(history_data_path).snapshots()
+        }
+        self.downloads_index = DownloadsIndex(history_data_path / 'downloads-index.db')
         self.model_info_path = model_info_path
         self.dataset_info_path = dataset_info_path
         self.model_infos = self._init_info(model_info_path)
         self.dataset_infos = self._init_info(dataset_info_path)
+        self.classifier = InfoClassifier(
+            self.model_infos, self.dataset_infos, min_confidence
+        ) if pre_classify else None
         self.models_buffer = []
         self.models_buffer_counter = defaultdict(int)
         self.datasets_buffer = []
@@ -390,37 +410,9 @@ class MSInfoProcessor(PipelineStep):
         return info
     
     def _get_last_month_downloads_of(self, date_crawl: str) -> dict[str, int]:
-        date_crawl = datetime.strptime(date_crawl, r"%Y-%m-%d")
-        last_month_date = date_crawl - timedelta(days=30)
-        
-        min_diff = None
-        closest_date = None
-        
-        for date in self.history_data_path.keys():
-            cur_date = datetime.strptime(date, r"%Y-%m-%d")
-            diff = abs((cur_date - last_month_date).days)
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_date = date
-        
-        last_month_downloads = {}
-        if min_diff > 15:
-            return last_month_downloads
-        
-        p = self.history_data_path[closest_date] / 'ModelScope/raw-models-info.jsonl'
-        if p.exists():
-            with jsonlines.open(p, 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['model_name']}"
-                    last_month_downloads[key] = item['total_downloads']
-        p = self.history_data_path[closest_date] / 'ModelScope/raw-datasets-info.jsonl'
-        if p.exists():
-            with jsonlines.open(p, 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['dataset_name']}"
-                    last_month_downloads[key] = item['total_downloads']
-
-        return last_month_downloads
+        return self.downloads_index.last_month_downloads(
+            'ModelScope', date_crawl, self.history_data_path
+        )
     
     def parse_input(self, input_data: PipelineData | None = None):
         self.required_keys = [
@@ -461,6 +453,8 @@ class MSInfoProcessor(PipelineStep):
                 is_large_model = False
             else:
                 model_info = self.model_infos.get(model_key, None)
+                if model_info is None and self.classifier:
+                    model_info = self.classifier.model_info(repo, model_name)
                 if model_info:
                     modality = model_info['modality']
                     is_large_model = model_info['is_large_model']
@@ -519,6 +513,8 @@ class MSInfoProcessor(PipelineStep):
             last_month_downloads = self.last_month_downloads_of[date_crawl].get(dataset_key, None)
             
             dataset_info = self.dataset_infos.get(dataset_key, None)
+            if dataset_info is None and self.classifier:
+                dataset_info = self.classifier.dataset_info(repo, dataset_name)
             if dataset_info:
                 modality = dataset_info['modality']
                 lifecycle = dataset_info['lifecycle']
@@ -664,6 +660,8 @@ class MSInfoProcessor(PipelineStep):
                     })
             
     def flush(self, update_infos: bool = True) -> Optional[PipelineResult]:
+        if self.classifier:
+            logger.info(f"Local pre-classification: {dict(self.classifier.counter)}")
         if len(self.models_buffer) > 0:
             urls = [inp['link'] for inp in self.models_buffer]
             model_infos = gen_model_info_modelscope(urls)
@@ -710,6 +708,9 @@ class MSInfoProcessor(PipelineStep):
                         "error_msg": error_msg
                     })
 
+        # Every record is processed, the downloads of the previous snapshots are not needed.
+        self.downloads_index.close()
+
     
 class OpenDataLabInfoProcessor(PipelineStep):
     
@@ -726,6 +727,8 @@ class OpenDataLabInfoProcessor(PipelineStep):
         ai_gen: bool = True,
         buffer_size: int = 8,
         max_retries: int = 3,
+        pre_classify: bool = True,
+        min_confidence: float = 0.9,
     ):
         self.ai_gen = ai_gen
         self.buffer_size = buffer_size
@@ -740,11 +743,16 @@ class OpenDataLabInfoProcessor(PipelineStep):
             dataset_info_path = Path(dataset_info_path)
         else:
             dataset_info_path = curr_path.parents[3] / 'config/dataset-info.json'
-        self.history_data_path = {}
-        for p in history_data_path.glob("????-??-??"):
-            self.history_data_path[p.name] = p
+        self.history_data_path = {
+            snapshot.date: snapshot.path
+            for snapshot in SnapshotCatalog.load(history_data_path).snapshots()
+        }
+        self.downloads_index = DownloadsIndex(history_data_path / 'downloads-index.db')
         self.dataset_info_path = dataset_info_path
         self.dataset_infos = self._init_info(dataset_info_path)
+        self.classifier = InfoClassifier(
+            dataset_infos=self.dataset_infos, min_confidence=min_confidence
+        ) if pre_classify else None
         self.datasets_buffer = []
         self.datasets_buffer_counter = defaultdict(int)
         self.last_month_downloads_of = {}
@@ -755,31 +763,9 @@ class OpenDataLabInfoProcessor(PipelineStep):
         return info
     
     def _get_last_month_downloads_of(self, date_crawl: str) -> dict[str, int]:
-        date_crawl = datetime.strptime(date_crawl, r"%Y-%m-%d")
-        last_month_date = date_crawl - timedelta(days=30)
-        
-        min_diff = None
-        closest_date = None
-        
-        for date in self.history_data_path.keys():
-            cur_date = datetime.strptime(date, r"%Y-%m-%d")
-            diff = abs((cur_date - last_month_date).days)
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_date = date
-        
-        last_month_downloads = {}
-        if min_diff > 15:
-            return last_month_downloads
-        
-        p = self.history_data_path[closest_date] / 'OpenDataLab/raw-datasets-info.jsonl'
-        if p.exists():
-            with jsonlines.open(p, 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['dataset_name']}"
-                    last_month_downloads[key] = item['total_downloads']
-        
-        return last_month_downloads
+        return self.downloads_index.last_month_downloads(
+            'OpenDataLab', date_crawl, self.history_data_path
+        )
     
     def parse_input(self, input_data: PipelineData | None = None):
         self.data = input_data.data.copy()
@@ -806,6 +792,8 @@ class OpenDataLabInfoProcessor(PipelineStep):
                 is_valid = False
             else:
                 dataset_info = self.dataset_infos.get(dataset_key, None)
+                if dataset_info is None and self.classifier:
+                    dataset_info = self.classifier.dataset_info(repo, dataset_name)
                 if dataset_info:
                     modality = dataset_info['modality']
                     lifecycle = dataset_info['lifecycle']
@@ -901,6 +889,8 @@ class OpenDataLabInfoProcessor(PipelineStep):
                     })
             
     def flush(self, update_infos: bool = True) -> Optional[PipelineResult]:
+        if self.classifier:
+            logger.info(f"Local pre-classification: {dict(self.classifier.counter)}")
         if len(self.datasets_buffer) > 0:
             urls = [inp['link'] for inp in self.datasets_buffer]
             dataset_infos = gen_dataset_info_huggingface(urls)
@@ -924,6 +914,9 @@ class OpenDataLabInfoProcessor(PipelineStep):
                         "error_msg": error_msg
                     })
 
+        # Every record is processed, the downloads of the previous snapshots are not needed.
+        self.downloads_index.close()
+
 
 class BAAIDataInfoProcessor(PipelineStep):
     
@@ -940,6 +933,8 @@ class BAAIDataInfoProcessor(PipelineStep):
         ai_gen: bool = True,
         buffer_size: int = 8,
         max_retries: int = 3,
+        pre_classify: bool = True,
+        min_confidence: float = 0.9,
     ):
         self.ai_gen = ai_gen
         self.buffer_size = buffer_size
@@ -954,11 +949,16 @@ class BAAIDataInfoProcessor(PipelineStep):
             dataset_info_path = Path(dataset_info_path)
         else:
             dataset_info_path = curr_path.parents[3] / 'config/dataset-info.json'
-        self.history_data_path = {}
-        for p in history_data_path.glob("????-??-??"):
-            self.history_data_path[p.name] = p
+        self.history_data_path = {
+            snapshot.date: snapshot.path
+            for snapshot in SnapshotCatalog.load(history_data_path).snapshots()
+        }
+        self.downloads_index = DownloadsIndex(history_data_path / 'downloads-index.db')
         self.dataset_info_path = dataset_info_path
         self.dataset_infos = self._init_info(dataset_info_path)
+        self.classifier = InfoClassifier(
+            dataset_infos=self.dataset_infos, min_confidence=min_confidence
+        ) if pre_classify else None
         self.datasets_buffer = []
         self.datasets_buffer_counter = defaultdict(int)
         self.last_month_downloads_of = {}
@@ -969,31 +969,9 @@ class BAAIDataInfoProcessor(PipelineStep):
         return info
     
     def _get_last_month_downloads_of(self, date_crawl: str) -> dict[str, int]:
-        date_crawl = datetime.strptime(date_crawl, r"%Y-%m-%d")
-        last_month_date = date_crawl - timedelta(days=30)
-        
-        min_diff = None
-        closest_date = None
-        
-        for date in self.history_data_path.keys():
-            cur_date = datetime.strptime(date, r"%Y-%m-%d")
-            diff = abs((cur_date - last_month_date).days)
-            if min_diff is None or diff < min_diff:
-                min_diff = diff
-                closest_date = date
-        
-        last_month_downloads = {}
-        if min_diff > 15:
-            return last_month_downloads
-        
-        p = self.history_data_path[closest_date] / 'BAAIData/raw-datasets-info.jsonl'
-        if p.exists():
-            with jsonlines.open(p, 'r') as f:
-                for item in f:
-                    key = f"{item['repo']}/{item['dataset_name']}"
-                    last_month_downloads[key] = item['total_downloads']
-        
-        return last_month_downloads
+        return self.downloads_index.last_month_downloads(
+            'BAAIData', date_crawl, self.history_data_path
+        )
     
     def parse_input(self, input_data: PipelineData | None = None):
         self.data = input_data.data.copy()
@@ -1020,6 +998,8 @@ class BAAIDataInfoProcessor(PipelineStep):
                 is_valid = False
             else:
                 dataset_info = self.dataset_infos.get(dataset_key, None)
+                if dataset_info is None and self.classifier:
+                    dataset_info = self.classifier.dataset_info(repo, dataset_name)
                 if dataset_info:
                     modality = dataset_info['modality']
                     lifecycle = dataset_info['lifecycle']
@@ -1110,6 +1090,8 @@ class BAAIDataInfoProcessor(PipelineStep):
                     })
             
     def flush(self, update_infos: bool = True) -> Optional[PipelineResult]:
+        if self.classifier:
+            logger.info(f"Local pre-classification: {dict(self.classifier.counter)}")
         if len(self.datasets_buffer) > 0:
             urls = [inp['link'] for inp in self.datasets_buffer]
             dataset_infos = gen_dataset_info_huggingface(urls)
@@ -1135,6 +1117,9 @@ class BAAIDataInfoProcessor(PipelineStep):
         if update_infos:
             with open(self.dataset_info_path, 'w') as f:
                 json.dump(self.dataset_infos, f, indent=4, ensure_ascii=False)
+
+        # Every record is processed, the downloads of the previous snapshots are not needed.
+        self.downloads_index.close()
     
 @deprecated("MultiSourceInfoMerge PipelineStep is deprecated. Use MultiSourceInfoMergeExecutor instead.")
 class MultiSourceInfoMerge(PipelineStep):
@@ -1148,9 +1133,9 @@ class MultiSourceInfoMerge(PipelineStep):
         category: Literal['datasets', 'models'] | None = None
     ):
         if category == 'datasets' or category is None:
-            self.datasets_buffer = defaultdict(list)
+            self.datasets_buffer = MergeAggregator(DATASET_MERGE, group_by='repo')
         if category == 'models' or category is None:
-            self.models_buffer = defaultdict(list) 
+            self.models_buffer = MergeAggregator(MODEL_MERGE, group_by='repo')
         
     def parse_input(self, input_data: PipelineData | None = None):
         self.required_keys = [
@@ -1176,7 +1161,7 @@ class MultiSourceInfoMerge(PipelineStep):
                 ])
             case ('ModelScope', 'models'):
                 self.required_keys.extend([
-                    'model_name', 'community', 'community'
+                    'model_name', 'community'
                 ])
             case ('ModelScope', 'datasets'):
                 self.required_keys.extend([
@@ -1204,20 +1189,12 @@ class MultiSourceInfoMerge(PipelineStep):
     def run(self) -> PipelineResult:
         try:
             if self.category == 'models':
-                name = self.input['model_name']
-                key = f"{self.input['repo']}/{name}"
-                self.models_buffer[key].append(self.input)
-                data = self.input.copy()
-                data.update(self.data)
-                yield PipelineData({data, None, None})
+                self.models_buffer.add(self.input)
             else:
-                name = self.input['dataset_name']
-                key = f"{self.input['repo']}/{name}"
-                self.datasets_buffer[key].append(self.input)
-                data = self.input.copy()
-                data.update(self.data)
-                yield PipelineData({data, None, None})
-            
+                self.datasets_buffer.add(self.input)
+            data = self.input.copy()
+            data.update(self.data)
+            yield PipelineData(data, None, None)
         except Exception as e:
             yield PipelineData(None, None, {
                 "type": type(e),
@@ -1229,42 +1206,9 @@ class MultiSourceInfoMerge(PipelineStep):
             model_records = []
             dataset_records = []
             if hasattr(self, "models_buffer"):
-                for _, models in self.models_buffer.items():
-                    item = {
-                        "org": models[0]['org'],
-                        "repo": models[0]['repo'],
-                        "model_name": models[0]['model_name'],
-                        "modality": models[0]['modality'],
-                        "downloads_last_month": sum(model['downloads_last_month']
-                                                    for model in models
-                                                    if model['downloads_last_month'] > 0),
-                        "likes": sum(model['likes'] for model in models),
-                        "community": sum(model['community'] for model in models
-                                         if 'community' in model),
-                        "descendants": sum(model['descendants'] for model in models
-                                           if 'descendants' in model),
-                        "date_crawl": models[0]['date_crawl'],
-                    }
-                    model_records.append(item)
+                model_records = self.models_buffer.results()
             if hasattr(self, "datasets_buffer"):
-                for _, datasets in self.datasets_buffer.items():
-                    item = {
-                        "org": datasets[0]['org'],
-                        "repo": datasets[0]['repo'],
-                        "dataset_name": datasets[0]['dataset_name'],
-                        "modality": datasets[0]['modality'],
-                        "lifecycle": datasets[0]['lifecycle'],
-                        "downloads_last_month": sum(dataset['downloads_last_month']
-                                                    for dataset in datasets
-                                                    if dataset['downloads_last_month'] > 0),
-                        "likes": sum(dataset['likes'] for dataset in datasets),
-                        "community": sum(dataset['community'] for dataset in datasets
-                                         if 'community' in dataset),
-                        "dataset_usage": sum(dataset['dataset_usage'] for dataset in datasets
-                                             if 'dataset_usage' in dataset),
-                        "date_crawl": datasets[0]['date_crawl'],
-                    }
-                    dataset_records.append(item)
+                dataset_records = self.datasets_buffer.results()
             yield PipelineData({
                 'model_records': model_records,
                 'dataset_records': dataset_records,
@@ -1,7 +1,8 @@
 import json
 import traceback
-import jsonlines
 from .base import PipelineStep, PipelineResult, PipelineData
+from ..codec import exists, plain_path
+from ..parquet import iter_records
 from pathlib import Path
 from collections import defaultdict
 
@@ -99,17 +100,27 @@ class JsonlineReader(PipelineStep):
         self,
         path: Path,
         required_keys: list[str] | None = None,
-        drop_keys: list[str] | None = None
+        drop_keys: list[str] | None = None,
+        stream: bool = False,
+        chunk_size: int | None = None,
     ):
+        """With `stream=False` the whole file is yielded once as `content`. With `stream=True`
+        records are read lazily and yielded one by one (merged with the input data), or as
+        `content` chunks of `chunk_size` records."""
         self.required_keys = required_keys
         if drop_keys:
             self.drop_keys = drop_keys
         else:
             self.drop_keys = []
         self.path = path
-        assert self.path.suffix == '.jsonl', 'The path must end with a filename that has a `.jsonl` suffix.'
-        assert self.path.exists(), f'{self.path} not exists.'
+        assert plain_path(self.path).suffix == '.jsonl', \
+            'The path must end with a filename that has a `.jsonl` suffix.'
+        assert exists(self.path), f'{self.path} not exists.'
+        assert chunk_size is None or chunk_size > 0, 'chunk_size must be positive.'
         self.input = self.path
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.data = {}
         
     def parse_input(self, input_data: PipelineData | None = None):
         if input_data is None:
@@ -117,16 +128,47 @@ class JsonlineReader(PipelineStep):
             return 
         self.data = input_data.data.copy()
         
+    def _records(self):
+        # Read the parquet copy instead when it is up to date.
+        for line in iter_records(self.input, self.required_keys):
+            if self.required_keys is not None:
+                for k in self.required_keys:
+                    if k not in line:
+                        raise KeyError(f"key '{k}' not found in {self.input} of {self.__class__}")
+            for k in self.drop_keys:
+                line.pop(k, None)
+            yield line
+        
     def run(self) -> PipelineResult:
-        content = []
         try:
-            with jsonlines.open(self.input, 'r') as reader:
-                for line in reader:
+            if not self.stream:
+                content = list(self._records())
+                yield PipelineData({
+                    "content": content,
+                    "total_lines": len(content)
+                }, {"total_lines": len(content)}, None)
+            elif self.chunk_size is None:
+                for line in self._records():
+                    line.update(self.data)
+                    yield PipelineData(line, None, None)
+            else:
+                total_lines = 0
+                content = []
+                for line in self._records():
                     content.append(line)
-            yield PipelineData({
-                "content": content,
-                "total_lines": len(content)
-            }, {"total_lines": len(content)}, None)
+                    if len(content) >= self.chunk_size:
+                        total_lines += len(content)
+                        yield PipelineData({
+                            "content": content,
+                            "total_lines": len(content)
+                        }, {"total_lines": total_lines}, None)
+                        content = []
+                if content or total_lines == 0:
+                    total_lines += len(content)
+                    yield PipelineData({
+                        "content": content,
+                        "total_lines": len(content)
+                    }, {"total_lines": total_lines}, None)
         except Exception as e:
             error_msg = traceback.format_exc()
             yield PipelineData(None, None, {
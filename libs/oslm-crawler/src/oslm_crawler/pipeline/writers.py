@@ -1,6 +1,13 @@
-import jsonlines
+import os
+import sqlite3
+import time
 import traceback
+import pyarrow as pa
+import pyarrow.parquet as pq
 from .base import PipelineStep, PipelineResult, PipelineData
+from ..codec import jsonl_writer, open_text, plain_path, remove_variants
+from ..parquet import schema_for, to_table
+from ..records import Record
 from pathlib import Path
 from loguru import logger
 
@@ -15,18 +22,136 @@ class JsonlineWriter(PipelineStep):
         path: str,
         required_keys: list[str] | None = None,
         drop_keys: list[str] | None = None,
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        atomic: bool = False,
     ):
+        """Records are flushed every `buffer_size` records, or after `flush_interval` seconds
+        since the last flush. With `atomic`, records go to a temporary file which replaces `path`
+        on `close()`, so the previous artifact stays intact until the new one is complete.
+        A `.jsonl.zst` or `.jsonl.gz` path writes a compressed artifact."""
         self.required_keys = required_keys
         if drop_keys:
             self.drop_keys = drop_keys
         else:
             self.drop_keys = []
         self.path = Path(path)
-        assert self.path.suffix == '.jsonl', 'The path must end with a filename that has a `.jsonl` suffix.'
+        assert plain_path(self.path).suffix == '.jsonl', \
+            'The path must end with a filename that has a `.jsonl` suffix.'
+        assert buffer_size > 0, 'buffer_size must be positive.'
         self.path.parent.mkdir(exist_ok=True)
-        self.path.touch()
-        self.f = open(self.path, 'w')
-        self.writer = jsonlines.Writer(self.f)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.atomic = atomic
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        if atomic:
+            self.tmp_path = self.path.with_name(self.path.name + '.tmp')
+            self.f = open_text(self.tmp_path, 'w', self.path.suffix)
+        else:
+            remove_variants(self.path)
+            self.f = open_text(self.path, 'w')
+        self.writer = jsonl_writer(self.f)
+    
+    def _project(self, data: dict) -> dict:
+        required_data = {}
+        for k in self.required_keys:
+            if k not in data:
+                raise KeyError(f"key '{k}' not found in input_data.data "
+                               f"{list(data.keys())} of {self.__class__}")
+            required_data[k] = data[k]
+        return required_data
+    
+    def parse_input(self, input_data: PipelineData | None = None):
+        if self.required_keys is None:
+            self.required_keys = list(input_data.data.keys())
+        self.required_keys = [x for x in self.required_keys if x not in self.drop_keys]
+        self.data = input_data.data.copy()
+        self.input = self._project(self.data)
+        
+    def flush(self):
+        if self.buffer:
+            self.writer.write_all(self.buffer)
+            self.buffer.clear()
+        self.f.flush()
+        self.last_flush = time.monotonic()
+        
+    def _append(self, records: list[dict]):
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.buffer_size or (
+            self.flush_interval is not None
+            and time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+        
+    def run(self) -> PipelineResult:
+        try:
+            self._append([self.input])
+            yield PipelineData(self.data, None, None)
+        except Exception:
+            logger.exception(f"Error write jsonline data:\n {self.input}")
+            yield PipelineData(None, None, {
+                'input': self.input,
+                'error_msg': traceback.format_exc(),
+            })
+            
+    def write_many(self, records: list[dict] | list[Record]) -> int:
+        """Write a batch of records and return the number written. Typed records are encoded as
+        they are when all of their fields are kept."""
+        if not records:
+            return 0
+        typed = isinstance(records[0], Record)
+        if self.required_keys is None:
+            self.required_keys = list(records[0].field_names() if typed else records[0].keys())
+        self.required_keys = [x for x in self.required_keys if x not in self.drop_keys]
+        if typed and tuple(self.required_keys) == records[0].field_names():
+            self._append(records)
+        elif typed:
+            self._append([{k: getattr(r, k) for k in self.required_keys} for r in records])
+        else:
+            self._append([self._project(data) for data in records])
+        return len(records)
+        
+    def close(self) -> bool:
+        try:
+            self.flush()
+            self.writer.close()
+            self.f.close()
+            if self.atomic:
+                os.replace(self.tmp_path, self.path)
+                remove_variants(self.path)
+            return True
+        except Exception:
+            logger.exception(f'Error when close JsonlineWriter with path={self.path}')
+            return False
+        
+        
+class ParquetWriter(PipelineStep):
+    
+    ptype = "✍️ WRITER"
+    required_keys = []
+    
+    def __init__(
+        self,
+        path: str,
+        required_keys: list[str] | None = None,
+        drop_keys: list[str] | None = None,
+        schema: pa.Schema | None = None,
+        row_group_size: int = 10000,
+    ):
+        self.required_keys = required_keys
+        if drop_keys:
+            self.drop_keys = drop_keys
+        else:
+            self.drop_keys = []
+        self.path = Path(path)
+        assert self.path.suffix == '.parquet', 'The path must end with a filename that has a `.parquet` suffix.'
+        self.path.parent.mkdir(exist_ok=True)
+        self.tmp_path = self.path.with_suffix('.parquet.tmp')
+        self.schema = schema if schema is not None else schema_for(self.path)
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.writer = None
     
     def parse_input(self, input_data: PipelineData | None = None):
         if self.required_keys is None:
@@ -41,13 +166,24 @@ class JsonlineWriter(PipelineStep):
             required_data[k] = self.data[k]
         self.input = required_data
         
+    def _write_row_group(self):
+        if self.writer is None:
+            table = to_table(self.buffer, self.schema)
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression='zstd')
+        else:
+            table = to_table(self.buffer, self.schema).select(self.schema.names)
+        self.writer.write_table(table)
+        self.buffer.clear()
+        
     def run(self) -> PipelineResult:
         try:
-            self.writer.write(self.input)
-            self.f.flush()
+            self.buffer.append(self.input)
+            if len(self.buffer) >= self.row_group_size:
+                self._write_row_group()
             yield PipelineData(self.data, None, None)
         except Exception:
-            logger.exception(f"Error write jsonline data:\n {self.input}")
+            logger.exception(f"Error write parquet data:\n {self.input}")
             yield PipelineData(None, None, {
                 'input': self.input,
                 'error_msg': traceback.format_exc(),
@@ -55,11 +191,13 @@ class JsonlineWriter(PipelineStep):
         
     def close(self) -> bool:
         try:
+            if self.buffer or self.writer is None:
+                self._write_row_group()
             self.writer.close()
-            self.f.close()
+            os.replace(self.tmp_path, self.path)
             return True
         except Exception:
-            logger.exception(f'Error when close JsonlineWriter with path={self.path}')
+            logger.exception(f'Error when close ParquetWriter with path={self.path}')
             return False
         
         
@@ -73,9 +211,18 @@ class ModelDatasetJsonlineWriter(PipelineStep):
         dataset_path: str,
         model_drop_keys: list[str] | None = None,
         dataset_drop_keys: list[str] | None = None,
+        buffer_size: int = 1,
+        flush_interval: float | None = None,
+        atomic: bool = False,
     ):
-        self.model_writer = JsonlineWriter(model_path, drop_keys=model_drop_keys)
-        self.dataset_writer = JsonlineWriter(dataset_path, drop_keys=dataset_drop_keys)
+        self.model_writer = JsonlineWriter(
+            model_path, drop_keys=model_drop_keys, buffer_size=buffer_size,
+            flush_interval=flush_interval, atomic=atomic,
+        )
+        self.dataset_writer = JsonlineWriter(
+            dataset_path, drop_keys=dataset_drop_keys, buffer_size=buffer_size,
+            flush_interval=flush_interval, atomic=atomic,
+        )
     
     def parse_input(self, input_data: PipelineData | None = None):
         if 'model_name' in input_data.data or input_data.data.get('category', None) == 'models':
@@ -94,9 +241,15 @@ class ModelDatasetJsonlineWriter(PipelineStep):
             case "datasets":
                 yield next(self.dataset_writer.run())
                 
+    def write_many(self, records: list[dict]) -> int:
+        models = [data for data in records if 'model_name' in data]
+        datasets = [data for data in records if 'model_name' not in data]
+        return self.model_writer.write_many(models) + self.dataset_writer.write_many(datasets)
+                
     def close(self) -> bool:
-        self.model_writer.close()
-        self.dataset_writer.close()
+        model_closed = self.model_writer.close()
+        dataset_closed = self.dataset_writer.close()
+        return model_closed and dataset_closed
 
         
 class ListWriter(PipelineStep):
@@ -145,19 +298,218 @@ class ListWriter(PipelineStep):
         return True
     
 
-# TODO database writer    
+def _is_locked(e: sqlite3.Error) -> bool:
+    return getattr(e, 'sqlite_errorcode', 0) & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
 class DBWriter(PipelineStep):
     
     ptype = "✍️ WRITER"
+    required_keys = []
     
     def __init__(
         self,
-        conn,
+        conn: sqlite3.Connection | str | Path,
+        table: str,
+        drop_keys: list[str] | None = None,
+        buffer_size: int = 1000,
+        timeout: float = 60,
+        max_buffer_size: int | None = None,
     ):
-        raise NotImplementedError
-    
+        """Upsert records into `table` of a sqlite database, given as a connection or a path.
+        Records are flushed every `buffer_size` records, each flush in one transaction, and
+        replace the rows with the same primary key (a view, whose triggers store the records,
+        gets plain inserts). Only the keys of the first record that are columns of `table` are
+        written, so the other columns of existing rows are kept.
+
+        A flush rejected by the database is retried row by row: the rows that still fail, e.g.
+        on a constraint, are dropped and reported by `run` and `take_errors`, the others are
+        written. A flush that finds the database locked for `timeout` seconds keeps its records
+        buffered for the next one, up to `max_buffer_size` records (10 * `buffer_size` by
+        default), beyond which they are dropped and reported as well."""
+        assert buffer_size > 0, 'buffer_size must be positive.'
+        self.own_conn = not isinstance(conn, sqlite3.Connection)
+        # The pipelines of several snapshots may write to the same database.
+        self.conn = sqlite3.connect(conn, timeout=timeout) if self.own_conn else conn
+        self.table = table
+        if drop_keys:
+            self.drop_keys = drop_keys
+        else:
+            self.drop_keys = []
+        info = self.conn.execute(f"pragma table_info({table})").fetchall()
+        if not info:
+            raise RuntimeError(f"Table {table} not found in the database.")
+        self.table_columns = [row[1] for row in info]
+        self.primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5] > 0]
+        self.buffer_size = buffer_size
+        self.max_buffer_size = max_buffer_size or 10 * buffer_size
+        # Rows to write, with the records they come from.
+        self.buffer: list[tuple[tuple, dict]] = []
+        self.errors: list[dict] = []
+        self.columns = None
+        
+    def _init_columns(self, data: dict):
+        self.columns = [
+            c for c in self.table_columns if c in data and c not in self.drop_keys
+        ]
+        missing = [k for k in self.primary_key if k not in self.columns]
+        if missing:
+            raise KeyError(f"Primary key {missing} of {self.table} not found in {list(data.keys())}")
+        values = ', '.join('?' * len(self.columns))
+        self.sql = f"insert into {self.table} ({', '.join(self.columns)}) values ({values})"
+        if self.primary_key:
+            updates = [c for c in self.columns if c not in self.primary_key]
+            self.sql += f" on conflict ({', '.join(self.primary_key)}) do " + (
+                "update set " + ', '.join(f"{c} = excluded.{c}" for c in updates)
+                if updates else "nothing"
+            )
+        
     def parse_input(self, input_data: PipelineData | None = None):
-        raise NotImplementedError
+        self.data = input_data.data.copy()
+        if self.columns is None:
+            self._init_columns(self.data)
+        self.input = tuple(self.data.get(c) for c in self.columns)
+        
+    def flush(self) -> bool:
+        """Write the buffered rows, and return False if the database stayed locked."""
+        if not self.buffer:
+            return True
+        try:
+            try:
+                with self.conn:
+                    self.conn.executemany(self.sql, [row for row, _ in self.buffer])
+            except sqlite3.DatabaseError as e:
+                if _is_locked(e):
+                    raise
+                self._flush_rows()
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            if len(self.buffer) < self.max_buffer_size:
+                logger.warning(f"{self.table} is locked, {len(self.buffer)} records stay buffered")
+                return False
+            logger.error(f"{self.table} is locked, dropping {len(self.buffer)} buffered records")
+            self.errors += [
+                {'input': data, 'error_msg': traceback.format_exc()} for _, data in self.buffer
+            ]
+        self.buffer.clear()
+        return True
+
+    def _flush_rows(self):
+        # Each row in its own savepoint, so that the failing ones are skipped and the others
+        # are committed together. A lock still rolls the whole flush back.
+        errors = []
+        with self.conn:
+            self.conn.execute("savepoint flush")
+            for row, data in self.buffer:
+                self.conn.execute("savepoint row")
+                try:
+                    self.conn.execute(self.sql, row)
+                except sqlite3.DatabaseError as e:
+                    if _is_locked(e):
+                        raise
+                    logger.error(f"Error write data to {self.table}: {e}\n {data}")
+                    errors.append({'input': data, 'error_msg': traceback.format_exc()})
+                    self.conn.execute("rollback to row")
+                self.conn.execute("release row")
+            self.conn.execute("release flush")
+        self.errors += errors
+
+    def take_errors(self) -> list[dict]:
+        """The records dropped since the last call, with their errors."""
+        errors, self.errors = self.errors, []
+        return errors
+
+    def _append(self, rows: list[tuple[tuple, dict]]):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+        
+    def run(self) -> PipelineResult:
+        # The flush may drop records buffered before this one, each is reported.
+        try:
+            self._append([(self.input, self.data)])
+            errors = self.take_errors()
+            for error in errors:
+                yield PipelineData(None, None, error)
+            if all(error['input'] is not self.data for error in errors):
+                yield PipelineData(self.data, None, None)
+        except Exception:
+            logger.exception(f"Error write data to {self.table}:\n {self.data}")
+            yield PipelineData(None, None, {
+                'input': self.data,
+                'error_msg': traceback.format_exc(),
+            })
+            
+    def write_many(self, records: list[dict] | list[Record]) -> int:
+        """Write a batch of records and return the number written."""
+        if not records:
+            return 0
+        if isinstance(records[0], Record):
+            records = [r.to_dict() for r in records]
+        if self.columns is None:
+            self._init_columns(records[0])
+        self._append([(tuple(data.get(c) for c in self.columns), data) for data in records])
+        return len(records)
+    
+    def close(self) -> bool:
+        """Flush the buffered records, and return False if some could not be written. The
+        records still buffered because of a lock are then dropped and left in `take_errors`."""
+        try:
+            written = self.flush()
+            if not written:
+                self.errors += [
+                    {'input': data, 'error_msg': f"{self.table} is locked"} for _, data in self.buffer
+                ]
+                self.buffer.clear()
+            if self.own_conn:
+                self.conn.close()
+            return written
+        except Exception:
+            logger.exception(f'Error when close DBWriter with table={self.table}')
+            return False
+        
+        
+class ModelDatasetDBWriter(PipelineStep):
+    
+    ptype = "✍️ WRITER"
     
+    def __init__(
+        self,
+        conn: sqlite3.Connection | str | Path,
+        model_table: str,
+        dataset_table: str,
+        buffer_size: int = 1000,
+    ):
+        self.own_conn = not isinstance(conn, sqlite3.Connection)
+        # The pipelines of several snapshots may write to the same database.
+        self.conn = sqlite3.connect(conn, timeout=60) if self.own_conn else conn
+        self.model_writer = DBWriter(self.conn, model_table, buffer_size=buffer_size)
+        self.dataset_writer = DBWriter(self.conn, dataset_table, buffer_size=buffer_size)
+        
+    def parse_input(self, input_data: PipelineData | None = None):
+        if 'model_name' in input_data.data:
+            self.next_write = "models"
+            self.model_writer.parse_input(input_data)
+        elif 'dataset_name' in input_data.data:
+            self.next_write = "datasets"
+            self.dataset_writer.parse_input(input_data)
+        else:
+            raise RuntimeError(f"'model_name' or 'dataset_name' not found in {input_data.data.keys()}")
+        
     def run(self) -> PipelineResult:
-        yield PipelineData(None, str(NotImplementedError()), None)
+        match self.next_write:
+            case "models":
+                yield from self.model_writer.run()
+            case "datasets":
+                yield from self.dataset_writer.run()
+
+    def take_errors(self) -> list[dict]:
+        return self.model_writer.take_errors() + self.dataset_writer.take_errors()
+                
+    def close(self) -> bool:
+        model_closed = self.model_writer.close()
+        dataset_closed = self.dataset_writer.close()
+        if self.own_conn:
+            self.conn.close()
+        return model_closed and dataset_closed
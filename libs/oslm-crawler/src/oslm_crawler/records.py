@@ -0,0 +1,176 @@
+"""
+Typed records shared by the crawlers, writers, Parquet files and the sqlite database. The
+processors still exchange dicts (see `pipeline.base.PipelineData`).
+
+Every entity is a slotted dataclass deriving from `Record`, so an instance costs a fixed number
+of pointers instead of a per-record dict. Records convert directly to and from JSON lines (orjson
+serializes dataclasses natively), Parquet columns (`oslm_crawler.parquet.records_to_table`) and
+sqlite rows: `to_row()` returns the values in field order, which is also the column order of the
+corresponding table, and `from_row()` builds a record from such a row.
+"""
+from dataclasses import dataclass, fields
+from functools import cache
+from typing import Any, Literal, Optional, Self
+
+ModelModality = Literal['Language', 'Speech', 'Vision', 'Multimodal', 'Protein', 'Vector', '3D', 'Embodied']
+DatasetModality = Literal['Language', 'Speech', 'Vision', 'Multimodal', 'Embodied']
+Lifecycle = Literal['Pre-training', 'Fine-tuning', 'Preference', 'Evaluation']
+
+
+@cache
+def _field_names(cls) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+
+@cache
+def _init_names(cls) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(cls) if f.init)
+
+
+class Record:
+
+    __slots__ = ()
+
+    @classmethod
+    def field_names(cls) -> tuple[str, ...]:
+        return _field_names(cls)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Self:
+        """Build a record from a dict, ignoring keys that are not fields."""
+        return cls(**{k: data[k] for k in _init_names(cls) if k in data})
+
+    @classmethod
+    def from_row(cls, row) -> Self:
+        return cls(*row)
+
+    def to_row(self) -> tuple:
+        return tuple(getattr(self, k) for k in _field_names(type(self)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {k: getattr(self, k) for k in _field_names(type(self))}
+
+
+@dataclass(slots=True)
+class ModelRecord(Record):
+    org: str
+    repo: str
+    model_name: str
+    modality: Optional[ModelModality]
+    downloads_last_month: int
+    likes: int
+    community: int
+    descendants: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DatasetRecord(Record):
+    org: str
+    repo: str
+    dataset_name: str
+    modality: Optional[DatasetModality]
+    lifecycle: Lifecycle
+    downloads_last_month: int
+    likes: int
+    community: int
+    dataset_usage: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+
+
+@dataclass(slots=True)
+class HFModelRecord(Record):
+    org: str
+    repo: str
+    model_name: str
+    modality: Optional[ModelModality]
+    downloads_last_month: int
+    likes: int
+    community: int
+    descendants: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
+    img_path: Optional[str] = None
+
+
+@dataclass(slots=True)
+class HFDatasetRecord(Record):
+    org: str
+    repo: str
+    dataset_name: str
+    modality: Optional[DatasetModality]
+    lifecycle: Lifecycle
+    downloads_last_month: int
+    likes: int
+    community: int
+    dataset_usage: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
+    img_path: Optional[str] = None
+
+
+@dataclass(slots=True)
+class MSModelRecord(Record):
+    org: str
+    repo: str
+    model_name: str
+    modality: Optional[ModelModality]
+    downloads_last_month: int
+    total_downloads: int
+    likes: int
+    community: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
+    img_path: Optional[str] = None
+
+
+@dataclass(slots=True)
+class MSDatasetRecord(Record):
+    org: str
+    repo: str
+    dataset_name: str
+    modality: Optional[DatasetModality]
+    lifecycle: Lifecycle
+    downloads_last_month: int
+    total_downloads: int
+    likes: int
+    community: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
+    img_path: Optional[str] = None
+
+
+@dataclass(slots=True)
+class OpenDataLabRecord(Record):
+    org: str
+    repo: str
+    dataset_name: str
+    modality: Optional[DatasetModality]
+    lifecycle: Lifecycle
+    downloads_last_month: int
+    total_downloads: int
+    likes: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
+
+
+@dataclass(slots=True)
+class BAAIDataRecord(Record):
+    org: str
+    repo: str
+    dataset_name: str
+    modality: Optional[DatasetModality]
+    lifecycle: Lifecycle
+    downloads_last_month: int
+    total_downloads: int
+    likes: int
+    date_crawl: str
+    date_enter_db: Optional[str] = None
+    link: Optional[str] = None
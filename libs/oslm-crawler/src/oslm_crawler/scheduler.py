@@ -0,0 +1,78 @@
+"""
+Ranking of many snapshots at once.
+
+Apart from the `delta rank` columns and the `*-summary-delta.csv` tables, the merge, summaries
+and rankings of a snapshot only depend on its own inputs. `RankingScheduler` runs those stages
+for every snapshot in a process pool (the `ranking` stage with `delta=False`), then runs the
+cheap `delta` stage of each snapshot in date order, once the tables of the previous snapshot are
+final. The snapshot manifest is only written by the parent process.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from loguru import logger
+from .catalog import Snapshot, SnapshotCatalog
+from .parquet import export_snapshot
+
+
+def _run_stages(pipeline_cls, data_dir: Path, log_path: Path, stages: list[tuple[str, dict]]) -> str:
+    proc = pipeline_cls(data_dir, log_path)
+    for stage, kargs in stages:
+        proc = proc.step(stage, **kargs)
+    export_snapshot(data_dir)
+    return data_dir.name
+
+
+class RankingScheduler:
+
+    def __init__(
+        self,
+        pipeline_cls,
+        stages: list[tuple[str, dict]],
+        log_dir: str | Path,
+        workers: int | None = None,
+    ):
+        """`pipeline_cls` is `MergeAndRankingPipeline` or `AccumulateAndRankingPipeline`, and
+        `stages` the `(stage, kargs)` to run for each snapshot before the deltas."""
+        self.pipeline_cls = pipeline_cls
+        self.stages = [
+            (stage, kargs | {'delta': False} if stage == 'ranking' else kargs)
+            for stage, kargs in stages
+        ]
+        self.log_dir = Path(log_dir)
+        self.workers = workers or os.cpu_count() or 1
+
+    def compute(self, snapshots: list[Snapshot]):
+        """Run the stages of `snapshots`, in parallel when there are several workers."""
+        if not snapshots:
+            return
+        catalog = SnapshotCatalog.load(snapshots[0].path.parent)
+        tasks = [
+            (self.pipeline_cls, snapshot.path, self.log_dir / f"{snapshot.date}.log", self.stages)
+            for snapshot in snapshots
+        ]
+        workers = min(self.workers, len(tasks))
+        if workers == 1:
+            for task in tasks:
+                catalog.update(_run_stages(*task))
+            return
+        logger.info(f"Rank {len(tasks)} snapshots with {workers} processes.")
+        # Spawn rather than fork: pyarrow and pandas may already run threads in this process.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            futures = [executor.submit(_run_stages, *task) for task in tasks]
+            for future in as_completed(futures):
+                date = future.result()
+                catalog.update(date)
+                logger.info(f"Snapshot {date} ranked.")
+
+    def apply_delta(self, snapshot: Snapshot) -> Snapshot:
+        """Compare `snapshot` with its previous snapshot and return its updated catalog entry."""
+        proc = self.pipeline_cls(snapshot.path, self.log_dir / f"{snapshot.date}.log")
+        proc.step('delta').done()
+        return SnapshotCatalog.load(snapshot.path.parent).get(snapshot.date)
+
+    def run(self, snapshots: list[Snapshot]) -> list[Snapshot]:
+        self.compute(snapshots)
+        return [self.apply_delta(snapshot) for snapshot in snapshots]
@@ -0,0 +1,194 @@
+"""
+In-process ranking service for the Streamlit pages and ad-hoc analysis.
+
+`gen-rank` only materializes the rankings of the configured orgs and weights. `RankingService`
+keeps the records and summaries of recently used snapshots in memory and computes the dimension
+and overall rankings on demand, for any subset of orgs, any weights and any subset of the
+dimensions, with the same functions as the ranking pipelines (`oslm_crawler.summary`):
+
+    service = RankingService()
+    ranks = service.rank('2025-09-07', orgs=['BAAI', 'Meta', ...], dimensions=['data', 'model'])
+    ranks['overall']
+
+Summaries are cached per snapshot and summary config hash, so only the first request of a
+snapshot reads its files. `refresh()` drops the snapshots whose inputs changed on disk.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+import yaml
+from loguru import logger
+from .catalog import SnapshotCatalog
+from .parquet import read_frame
+from .summary import (
+    normalize_summary, rank_overall, read_other_source_datasets, select_summary,
+    summarize_datasets, summarize_models,
+)
+
+DIMENSIONS = ['data', 'model', 'infra', 'eval']
+
+# Records and precomputed summaries a ranking is computed from.
+SUMMARY_INPUTS = {
+    False: {
+        'datasets': 'merged-datasets-info.jsonl',
+        'models': 'merged-models-info.jsonl',
+    },
+    True: {
+        'datasets': 'accumulated-datasets-info.jsonl',
+        'models': 'accumulated-models-info.jsonl',
+    },
+}
+SHARED_INPUTS = {
+    'other': 'other-source-datasets.jsonl',
+    'infra': 'infra-summary.csv',
+    'eval': 'eval-summary.csv',
+}
+
+
+def _config_hash(dimension: str, config: dict) -> str:
+    # Only the metrics of a dimension change its summary, not their weights or method.
+    encoded = json.dumps([dimension, sorted(config[1])], ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def default_ranking_config() -> dict:
+    config_path = Path(__file__).parents[2] / 'config/default_task.yaml'
+    with config_path.open('r') as f:
+        return yaml.safe_load(f)['RankingPipeline']['ranking']
+
+
+class _SnapshotFrames:
+    """Records of one snapshot, with the checksums of the files they were read from."""
+
+    def __init__(self, catalog: SnapshotCatalog, date: str, accumulated: bool):
+        snapshot = catalog.get(date)
+        if snapshot is None:
+            raise KeyError(f"Unknown snapshot: {date}")
+        self.inputs = SUMMARY_INPUTS[accumulated] | SHARED_INPUTS
+        self.checksums = self._checksums(catalog, date)
+        path = snapshot.path
+        self.datasets = read_frame(path / self.inputs['datasets'])
+        self.models = read_frame(path / self.inputs['models'])
+        self.other = read_other_source_datasets(path)
+        self.infra = pd.read_csv(path / self.inputs['infra'], index_col='org')
+        self.eval = pd.read_csv(path / self.inputs['eval'], index_col='org')
+        self.summaries: dict[tuple[str, str], pd.DataFrame] = {}
+
+    def _checksums(self, catalog: SnapshotCatalog, date: str) -> dict[str, Optional[str]]:
+        snapshot = catalog.get(date)
+        checksums = {}
+        for name in self.inputs.values():
+            info = snapshot.artifact(name) if snapshot else None
+            checksums[name] = info['sha256'] if info else None
+        return checksums
+
+    def is_current(self, catalog: SnapshotCatalog, date: str) -> bool:
+        return self._checksums(catalog, date) == self.checksums
+
+
+class RankingService:
+
+    def __init__(
+        self,
+        data_path: str | Path | None = None,
+        config: dict | None = None,
+        max_snapshots: int = 8,
+    ):
+        """`config` is the `ranking` section of the task config, it provides the defaults of
+        `rank()`. At most `max_snapshots` snapshots are kept in memory."""
+        self.catalog = SnapshotCatalog.load(data_path)
+        self.config = default_ranking_config() if config is None else config
+        self.max_snapshots = max_snapshots
+        self._frames: OrderedDict[tuple[str, bool], _SnapshotFrames] = OrderedDict()
+
+    def _load(self, date: str, accumulated: bool) -> _SnapshotFrames:
+        key = (date, accumulated)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            return self._frames[key]
+        logger.debug(f"Load snapshot {date} (accumulated: {accumulated}) into the ranking service.")
+        frames = _SnapshotFrames(self.catalog, date, accumulated)
+        self._frames[key] = frames
+        while len(self._frames) > self.max_snapshots:
+            self._frames.popitem(last=False)
+        return frames
+
+    def refresh(self):
+        """Re-scan the snapshots and drop the cached ones whose inputs changed."""
+        self.catalog.refresh()
+        for date, accumulated in list(self._frames):
+            if not self._frames[date, accumulated].is_current(self.catalog, date):
+                del self._frames[date, accumulated]
+
+    def summary(
+        self,
+        date: str,
+        dimension: str,
+        config: dict | None = None,
+        accumulated: bool = False,
+    ) -> pd.DataFrame:
+        """Summary of `dimension` for every org of the snapshot (not normalized)."""
+        if config is None:
+            config = self.config[f'{dimension}_config']
+        frames = self._load(date, accumulated)
+        key = (dimension, _config_hash(dimension, config))
+        if key not in frames.summaries:
+            if dimension in ('infra', 'eval'):
+                summary = select_summary(getattr(frames, dimension), config, ['all'])
+            else:
+                orgs = frames.infra.index.union(frames.eval.index)
+                if dimension == 'data':
+                    orgs = orgs.union(frames.datasets['org'].dropna().unique())
+                    summary = summarize_datasets(
+                        frames.datasets, config[1], orgs, self._downloads(accumulated), frames.other)
+                elif dimension == 'model':
+                    orgs = orgs.union(frames.models['org'].dropna().unique())
+                    summary = summarize_models(
+                        frames.models, config[1], orgs, self._downloads(accumulated))
+                else:
+                    raise KeyError(f"Unknown dimension: {dimension}, expected one of {DIMENSIONS}")
+            frames.summaries[key] = summary
+        return frames.summaries[key]
+
+    @staticmethod
+    def _downloads(accumulated: bool) -> str:
+        return 'accumulated_downloads' if accumulated else 'downloads_last_month'
+
+    def rank(
+        self,
+        date: str,
+        orgs: list[str] | None = None,
+        dimensions: list[str] | None = None,
+        configs: dict[str, list] | None = None,
+        ranking_weights: dict[str, float | int | str] | None = None,
+        accumulated: bool = False,
+    ) -> dict[str, pd.DataFrame]:
+        """Rank `orgs` (default: the configured `target_orgs`) in each of `dimensions` (default:
+        all four) and overall.
+
+        `configs` overrides the `[method, weights]` config of some dimensions and
+        `ranking_weights` the overall weights. Summaries are normalized among the ranked orgs
+        only, as if `target_orgs` had been set to them. Return the normalized summary with
+        score and rank of every dimension and the overall ranking under 'overall'.
+        """
+        dimensions = DIMENSIONS if dimensions is None else dimensions
+        configs = configs or {}
+        if ranking_weights is None:
+            ranking_weights = self.config['ranking_weights']
+        if orgs is None:
+            orgs = self.config.get('target_orgs', ['all'])
+            if orgs[0] == 'all':
+                orgs = self.summary(date, 'infra', accumulated=accumulated).index
+
+        res = {}
+        for dimension in dimensions:
+            config = configs.get(dimension, self.config[f'{dimension}_config'])
+            summary = self.summary(date, dimension, config, accumulated)
+            selected = pd.Index(orgs).intersection(summary.index, sort=False)
+            res[dimension] = normalize_summary(summary.loc[selected], config)
+        res['overall'] = rank_overall(
+            res, {d: w for d, w in ranking_weights.items() if d in dimensions})
+        return res
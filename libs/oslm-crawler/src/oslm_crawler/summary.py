@@ -0,0 +1,230 @@
+"""
+Summary tables of the ranking pipelines.
+
+The data and model summaries have one column per key of the ranking config (`num_language`,
+`downloads_pretraining`, `likes`, ...). Instead of filtering the records again for every key,
+`summarize_datasets` and `summarize_models` aggregate them once over (org, modality, lifecycle),
+counting records and summing the downloads and counters together, and then select the requested
+columns from that table. Both `MergeAndRankingPipeline` (monthly downloads) and
+`AccumulateAndRankingPipeline` (accumulated downloads) use this engine, as well as
+`oslm_crawler.service.RankingService`, which ranks cached summaries on demand with
+`normalize_summary` and `rank_overall`.
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .codec import resolve
+from .parquet import read_frame
+
+LIFECYCLES = {
+    'pretraining': 'Pre-training',
+    'finetuning': 'Fine-tuning',
+    'preference': 'Preference',
+}
+
+# TODO data process tool operators
+DATA_OPERATORS = {
+    "BAAI": 24,
+    "Ali": 105,
+}
+
+# TODO chips model
+ADAPTED_CHIPS = {
+    "BAAI": 4,
+    "Baidu": 2,
+    "Huawei": 2,
+    "Meta": 2,
+    "Google": 2,
+    "ByteDance": 2,
+}
+
+
+def read_other_source_datasets(data_dir: Path) -> pd.DataFrame | None:
+    """Datasets collected by hand from other sources, only counted in the `num_*` columns."""
+    # TODO temp handle other source dataset
+    data_path = resolve(data_dir / 'other-source-datasets.jsonl')
+    if not data_path.exists():
+        return None
+    return read_frame(data_path)
+
+
+class GroupedSummary:
+    """Record counts and column sums of a frame per (org, *dims), computed in a single pass
+    and aligned on `target_orgs`.
+
+    Rows whose dimension is missing are kept so that the per-org totals cover every record;
+    they are only left out when selecting a single modality or lifecycle.
+    """
+
+    def __init__(self, df: pd.DataFrame, dims: list[str], sums: list[str], target_orgs):
+        dims = [dim for dim in dims if dim in df.columns]
+        agg = {'count': ('org', 'size')} | {col: (col, 'sum') for col in sums}
+        grouped = df.groupby(['org', *dims], dropna=False, sort=False).agg(**agg)
+        self.grouped = grouped[grouped.index.get_level_values('org').notna()]
+        self.dims = dims
+        self.target_orgs = target_orgs
+        self._totals = None
+        self._tables = {}
+
+    def _zeros(self, value: str) -> pd.Series:
+        return pd.Series(0, index=self.target_orgs, dtype=self.grouped[value].dtype)
+
+    def total(self, value: str) -> pd.Series:
+        """Sum of `value` (or the record count) per org."""
+        if self._totals is None:
+            totals = self.grouped
+            if self.dims:
+                totals = totals.groupby(level='org', sort=False).sum()
+            self._totals = totals.reindex(self.target_orgs, fill_value=0)
+        return self._totals[value]
+
+    def select(self, dim: str, label: str, value: str) -> pd.Series:
+        """Sum of `value` (or the record count) per org over the records whose `dim` is
+        `label`."""
+        if dim not in self.dims:
+            return self._zeros(value)
+        if (dim, value) not in self._tables:
+            grouped = self.grouped[value]
+            if len(self.dims) > 1:
+                grouped = grouped.groupby(level=['org', dim], sort=False).sum()
+            table = grouped.unstack(dim, fill_value=0)
+            self._tables[dim, value] = table.reindex(self.target_orgs, fill_value=0)
+        table = self._tables[dim, value]
+        if label not in table.columns:
+            return self._zeros(value)
+        return table[label]
+
+
+def _split_key(key: str) -> tuple[str, str]:
+    """Map a `num_*`/`downloads_*` key to the dimension and label it selects."""
+    suffix = key.split("_")[-1]
+    if suffix in LIFECYCLES:
+        return 'lifecycle', LIFECYCLES[suffix]
+    return 'modality', suffix.title()
+
+
+def _target_orgs(df: pd.DataFrame, target_orgs: list):
+    if target_orgs[0] == 'all':
+        return df['org'].unique()
+    return target_orgs
+
+
+def _frame(columns: dict[str, pd.Series], target_orgs) -> pd.DataFrame:
+    res = pd.DataFrame(index=target_orgs)
+    if columns:
+        res = pd.concat([s.set_axis(res.index) for s in columns.values()], axis=1, keys=list(columns))
+    res.index.name = 'org'
+    return res
+
+
+def summarize_datasets(
+    df: pd.DataFrame,
+    weights: dict[str, float | int],
+    target_orgs: list,
+    downloads: str = 'downloads_last_month',
+    other: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """Build the data summary of the orgs for the keys of `weights`, summing downloads from
+    the `downloads` column and adding the record counts of `other` to the `num_*` columns."""
+    target_orgs = _target_orgs(df, target_orgs)
+    sums = [downloads] + (['dataset_usage'] if 'dataset_usage' in weights else [])
+    summary = GroupedSummary(df, ['modality', 'lifecycle'], sums, target_orgs)
+    if other is not None:
+        other = GroupedSummary(other, ['modality', 'lifecycle'], [], target_orgs)
+    columns = {}
+
+    for key in weights.keys():
+        if key.startswith('num'):
+            dim, label = _split_key(key)
+            columns[key] = summary.select(dim, label, 'count')
+            if other is not None:
+                columns[key] = columns[key] + other.select(dim, label, 'count')
+        elif key.startswith("downloads"):
+            dim, label = _split_key(key)
+            columns[key] = summary.select(dim, label, downloads)
+        elif key == 'dataset_usage':
+            columns[key] = summary.total('dataset_usage')
+        elif key == 'operators':
+            columns[key] = pd.Series(DATA_OPERATORS).reindex(target_orgs, fill_value=0)
+        else:
+            raise RuntimeError(f"Unrecognized field {key}")
+
+    return _frame(columns, target_orgs)
+
+
+def summarize_models(
+    df: pd.DataFrame,
+    weights: dict[str, float | int],
+    target_orgs: list,
+    downloads: str = 'downloads_last_month',
+) -> pd.DataFrame:
+    """Build the model summary of the orgs for the keys of `weights`, summing downloads from
+    the `downloads` column."""
+    target_orgs = _target_orgs(df, target_orgs)
+    counters = {'descendants': 'descendants', 'likes': 'likes', 'issue': 'community'}
+    sums = [downloads] + [col for key, col in counters.items() if key in weights]
+    summary = GroupedSummary(df, ['modality'], sums, target_orgs)
+    columns = {}
+
+    for key in weights.keys():
+        if key.startswith('num') and key != 'num_adapted_chips':
+            columns[key] = summary.select('modality', key.split("_")[-1].title(), 'count')
+        elif key.startswith('downloads'):
+            columns[key] = summary.select('modality', key.split("_")[-1].title(), downloads)
+        elif key in counters:
+            columns[key] = summary.total(counters[key])
+        elif key == 'num_adapted_chips':
+            columns[key] = pd.Series(ADAPTED_CHIPS).reindex(target_orgs, fill_value=1)
+        else:
+            raise RuntimeError(f"Unrecognized field {key}")
+
+    return _frame(columns, target_orgs)
+
+
+def select_summary(df: pd.DataFrame, config: dict, target_orgs: list) -> pd.DataFrame:
+    """Restrict a precomputed summary (infra or eval) to the configured columns and orgs."""
+    weights: dict[str, float | int] = config[1]
+    if target_orgs[0] == 'all':
+        target_orgs = df.index.unique()
+    df = df[df.columns.intersection(weights.keys())]
+    df = df[df.index.isin(target_orgs)]
+    return df
+
+
+def parse_weights(weights: dict[str, float | int | str]) -> dict[str, float | int]:
+    """Weights may be written as expressions in the config, e.g. '0.6*0.02'."""
+    return {k: v if isinstance(v, (int, float)) else eval(v) for k, v in weights.items()}
+
+
+def normalize_summary(summary: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Scale every column of `summary` by its maximum and score and rank the orgs with the
+    configured method."""
+    df = summary.div(summary.max())
+    weights = parse_weights({k: v for k, v in config[1].items() if k in summary.columns})
+    if config[0] == 'average':
+        df['score'] = df.mean(axis=1)
+        df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
+    elif config[0] == 'weight':
+        df['score'] = df.mul(weights).sum(axis=1)
+        df['rank'] = df['score'].rank(ascending=False, method='dense').astype(int)
+    else:
+        raise RuntimeError(f'Unrecognized method: {config[0]}, accept `average` or `weight`')
+    return df
+
+
+def rank_overall(
+    normalizations: dict[str, pd.DataFrame],
+    ranking_weights: dict[str, float | int | str],
+) -> pd.DataFrame:
+    """Combine the ranks of the dimensions (`data`, `model`, ...) of the orgs ranked in all of
+    them into the overall ranking."""
+    orgs = None
+    for df in normalizations.values():
+        orgs = df.index if orgs is None else orgs.intersection(df.index)
+    overall = pd.DataFrame(index=orgs)
+    overall.index.name = 'org'
+    for dimension, df in normalizations.items():
+        overall[dimension] = 1 / np.log2(df['rank'] + 1)
+    overall['score'] = overall.mul(parse_weights(ranking_weights)).sum(axis=1)
+    overall['rank'] = overall['score'].rank(ascending=False, method='dense').astype(int)
+    return overall
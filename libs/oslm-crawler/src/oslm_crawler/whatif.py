@@ -0,0 +1,170 @@
+"""
+What-if rankings over many weight configurations.
+
+A ranking run writes the normalized summary of every dimension (`data-rank.csv`,
+`model-rank.csv`, ...): the metric matrix the dimension score is computed from. `WhatIfRanking`
+loads these matrices once and scores a whole grid of weight vectors with one matrix product,
+so trying hundreds of `ranking_weights` or `*_config` weightings does not re-run
+`MergeAndRankingPipeline` (which re-reads the merged files and rewrites every CSV).
+
+A grid maps weight names to lists of candidate values; every combination is one scenario:
+
+    ranking_weights:
+      data: [0.1, '0.5/3', 0.3]
+      model: [0.4, 0.5]
+    model_config:
+      downloads_language: [0.2, 0.3]
+
+Dimensions without a grid keep the ranks of the last run, weights left out of a grid keep the
+configured value (equal weights for a dimension ranked by `average`).
+"""
+import itertools
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['data', 'model', 'infra', 'eval']
+RESULT_COLUMNS = ['score', 'rank', 'delta rank']
+RANK_FILES = {
+    'data': 'data-rank.csv',
+    'model': 'model-rank.csv',
+    'infra': 'infra-rank.csv',
+    'eval': 'eval-rank.csv',
+    'overall': 'overall-rank.csv',
+}
+ACCUMULATED_RANK_FILES = RANK_FILES | {
+    'data': 'data-accumulated-rank.csv',
+    'model': 'model-accumulated-rank.csv',
+    'overall': 'overall-accumulated-rank.csv',
+}
+
+
+def parse_weight(value: float | int | str) -> float:
+    """Weights may be written as expressions in the config, e.g. '0.6*0.02'."""
+    return float(value if isinstance(value, (int, float)) else eval(value))
+
+
+def weight_grid(grid: dict[str, list], base: dict[str, float | int | str]) -> pd.DataFrame:
+    """Cartesian product of the candidate values in `grid`, one row per weight vector. The
+    columns are the keys of `base`, whose values fill the weights missing from `grid`."""
+    unknown = set(grid) - set(base)
+    if unknown:
+        raise KeyError(f"Unknown weights: {sorted(unknown)}, expected some of {list(base)}")
+    candidates = [
+        [parse_weight(v) for v in grid[k]] if k in grid else [parse_weight(base[k])]
+        for k in base
+    ]
+    return pd.DataFrame(list(itertools.product(*candidates)), columns=list(base))
+
+
+def dense_rank(scores: pd.DataFrame) -> pd.DataFrame:
+    """Rank the orgs (rows) of every scenario (column), the best score being 1. Scores are
+    rounded first so that ties do not depend on the summation order of the matrix product."""
+    return scores.round(12).rank(ascending=False, method='dense').astype(int)
+
+
+def rank_stability(ranks: pd.DataFrame, top: int = 10) -> pd.DataFrame:
+    """Summarize the ranks of every org (row) across the scenarios (columns)."""
+    res = pd.DataFrame({
+        'best': ranks.min(axis=1),
+        'worst': ranks.max(axis=1),
+        'median': ranks.median(axis=1),
+        'mean': ranks.mean(axis=1),
+        'std': ranks.std(axis=1, ddof=0),
+        f'top{top}': (ranks <= top).mean(axis=1),
+    })
+    res.index.name = 'org'
+    return res.sort_values(['median', 'mean', 'best'])
+
+
+class WhatIfRanking:
+
+    def __init__(
+        self,
+        metrics: dict[str, pd.DataFrame],
+        ranks: dict[str, pd.Series],
+        config: dict,
+    ):
+        # Normalized metrics (orgs x metrics) and last computed ranks of every dimension.
+        self.metrics = metrics
+        self.ranks = ranks
+        self.config = config
+        orgs = None
+        for dimension in DIMENSIONS:
+            index = metrics[dimension].index
+            orgs = index if orgs is None else orgs.intersection(index)
+        self.orgs = orgs
+
+    @classmethod
+    def load(cls, data_dir: str | Path, config: dict, accumulated: bool = False):
+        """Load the rank tables of a snapshot. `config` is the `ranking` section of the task
+        config, it provides the weights that a grid does not vary."""
+        data_dir = Path(data_dir)
+        files = ACCUMULATED_RANK_FILES if accumulated else RANK_FILES
+        metrics, ranks = {}, {}
+        for dimension in DIMENSIONS + ['overall']:
+            df = pd.read_csv(data_dir / files[dimension], index_col='org')
+            ranks[dimension] = df['rank']
+            metrics[dimension] = df.drop(columns=RESULT_COLUMNS, errors='ignore')
+        return cls(metrics, ranks, config)
+
+    def base_weights(self, dimension: str) -> dict[str, float | int | str]:
+        """Configured weights of `dimension` ('ranking' for the overall weights)."""
+        if dimension == 'ranking':
+            return {d: self.config['ranking_weights'].get(d, 0) for d in DIMENSIONS}
+        method, weights = self.config[f'{dimension}_config']
+        columns = self.metrics[dimension].columns
+        if method == 'average':
+            return {k: 1 / len(columns) for k in columns}
+        return {k: weights.get(k, 0) for k in columns}
+
+    def scores(self, dimension: str, weights: pd.DataFrame) -> pd.DataFrame:
+        """Scores of the orgs of `dimension` for every weight vector (row) of `weights`, as
+        an orgs x scenarios frame."""
+        metrics = self.metrics[dimension].fillna(0)
+        weights = weights.reindex(columns=metrics.columns, fill_value=0)
+        return pd.DataFrame(metrics.to_numpy() @ weights.to_numpy().T, index=metrics.index)
+
+    def dimension_ranks(self, dimension: str, weights: pd.DataFrame) -> pd.DataFrame:
+        return dense_rank(self.scores(dimension, weights))
+
+    def evaluate(self, grid: dict[str, dict[str, list]]) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Rank the orgs for every scenario of `grid` (see the module docstring).
+
+        Return the scenarios, one row of weights per scenario with columns such as
+        `ranking.data` or `model.downloads_language`, and the overall ranks of the orgs
+        (orgs x scenarios).
+        """
+        unknown = set(grid) - {'ranking_weights', *(f'{d}_config' for d in DIMENSIONS)}
+        if unknown:
+            raise KeyError(f"Unrecognized grid sections: {sorted(unknown)}")
+
+        # Rank every dimension once per weight vector of its grid, then combine the
+        # per-dimension rank gains for every scenario.
+        overall_weights = weight_grid(grid.get('ranking_weights', {}), self.base_weights('ranking'))
+        gains, grids = {}, {}
+        for dimension in DIMENSIONS:
+            if f'{dimension}_config' in grid:
+                grids[dimension] = weight_grid(grid[f'{dimension}_config'], self.base_weights(dimension))
+                ranks = self.dimension_ranks(dimension, grids[dimension])
+            else:
+                ranks = self.ranks[dimension].to_frame()
+            gains[dimension] = 1 / np.log2(ranks.loc[self.orgs].to_numpy() + 1)
+
+        sizes = [len(overall_weights)] + [gains[d].shape[1] for d in DIMENSIONS]
+        index = np.indices(sizes).reshape(len(sizes), -1)
+        weights = overall_weights.to_numpy()[index[0]]
+        scores = sum(
+            gains[d][:, index[i + 1]] * weights[:, i] for i, d in enumerate(DIMENSIONS)
+        )
+        ranks = dense_rank(pd.DataFrame(scores, index=self.orgs))
+
+        scenarios = overall_weights.add_prefix('ranking.').iloc[index[0]].reset_index(drop=True)
+        for i, dimension in enumerate(DIMENSIONS):
+            if dimension in grids:
+                varied = grids[dimension].loc[:, grids[dimension].nunique() > 1]
+                varied = varied.add_prefix(f'{dimension}.').iloc[index[i + 1]]
+                scenarios = scenarios.join(varied.reset_index(drop=True))
+        scenarios.index.name = 'scenario'
+        ranks.columns.name = 'scenario'
+        return scenarios, ranks
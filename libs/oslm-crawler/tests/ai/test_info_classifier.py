@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+from oslm_crawler.ai.info_classifier import InfoClassifier
+
+
+def test_info_classifier_holdout():
+
+    config_path = Path(__file__).parents[2] / 'config'
+    with (config_path / 'model-info.json').open('r') as f:
+        model_infos = json.load(f)
+    with (config_path / 'dataset-info.json').open('r') as f:
+        dataset_infos = json.load(f)
+
+    keys = sorted(model_infos)
+    train = {k: model_infos[k] for i, k in enumerate(keys) if i % 5}
+    test = {k: model_infos[k] for i, k in enumerate(keys) if i % 5 == 0}
+    classifier = InfoClassifier(train, dataset_infos)
+
+    covered, agreed = 0, 0
+    for key, info in test.items():
+        if info.get('is_large_model') is None:
+            continue
+        repo, model_name = key.split('/', 1)
+        res = classifier.model_info(repo, model_name)
+        if res is None:
+            continue
+        covered += 1
+        if info['is_large_model']:
+            agreed += res['is_large_model'] and res['modality'] == info['modality']
+        else:
+            agreed += not res['is_large_model']
+
+    assert covered > 0.3 * len(test)
+    assert agreed / covered > 0.9
+    assert classifier.counter['models_local'] == covered
+
+
+def test_info_classifier_fallback():
+
+    classifier = InfoClassifier({}, {})
+    assert classifier.model_info('unknown-org', 'foo') is None
+    assert classifier.dataset_info('unknown-org', 'bar') is None
+    assert classifier.counter['models_fallback'] == 1
+    assert classifier.counter['datasets_fallback'] == 1
+    res = classifier.classify_model('openai', 'whisper-large-v3')
+    assert res.info == {'modality': 'Speech', 'is_large_model': True}
+    assert res.method == 'rule'
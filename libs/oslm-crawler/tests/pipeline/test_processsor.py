@@ -1,11 +1,27 @@
 import random
 import json
+import shutil
 from pprint import pprint
 from pathlib import Path
 from oslm_crawler.pipeline.base import PipelineData
 from oslm_crawler.pipeline.readers import JsonlineReader, OrgLinksReader
 from oslm_crawler.pipeline.processors import HFInfoProcessor, MSInfoProcessor
 from oslm_crawler.pipeline.processors import OpenDataLabInfoProcessor, BAAIDataInfoProcessor
+from oslm_crawler.downloads_index import SOURCE_FILES
+
+
+def copy_history(data_path: Path, tmp_path: Path) -> Path:
+    # The processors keep their catalog manifest and downloads index in the history directory,
+    # which is a copy of the raw files they index, not the data directory of the repo.
+    history_path = tmp_path / 'data'
+    for snapshot in data_path.glob('????-??-??'):
+        for source, files in SOURCE_FILES.items():
+            for file_name, _ in files:
+                p = snapshot / source / file_name
+                if p.exists():
+                    (history_path / snapshot.name / source).mkdir(parents=True, exist_ok=True)
+                    shutil.copy(p, history_path / snapshot.name / source / file_name)
+    return history_path
 
 
 def test_hfinfo_processor():
@@ -63,7 +79,7 @@ def test_hfinfo_processor():
     assert len(all_res) <= len(all_infos)
     
     
-def test_msinfo_processor():
+def test_msinfo_processor(tmp_path):
     
     data_path = Path(__file__).parents[2] / 'data'
     lst = list(sorted(data_path.glob('????-??-??')))
@@ -104,7 +120,7 @@ def test_msinfo_processor():
             other_infos.append(info)
     all_infos.extend(random.sample(other_infos, min(len(other_infos), 24)))
     
-    msinfo_processor = MSInfoProcessor()
+    msinfo_processor = MSInfoProcessor(history_data_path=copy_history(data_path, tmp_path))
     all_res = []
     for info in all_infos:
         info['repo_org_mapper'] = repo_org_mapper
@@ -118,7 +134,7 @@ def test_msinfo_processor():
     assert len(all_res) <= len(all_infos)
     
     
-def test_odlinfo_processor():
+def test_odlinfo_processor(tmp_path):
     data_path = Path(__file__).parents[2] / 'data'
     lst = list(sorted(data_path.glob('????-??-??')))
     assert len(lst) > 0, 'No valid data'
@@ -141,7 +157,7 @@ def test_odlinfo_processor():
             other_infos.append(info)
     all_infos.extend(random.sample(other_infos, min(len(other_infos), 24)))
     
-    msinfo_processor = OpenDataLabInfoProcessor()
+    msinfo_processor = OpenDataLabInfoProcessor(history_data_path=copy_history(data_path, tmp_path))
     all_res = []
     for info in all_infos:
         msinfo_processor.parse_input(PipelineData(info, None, None))
@@ -154,7 +170,7 @@ def test_odlinfo_processor():
     assert len(all_res) <= len(all_infos)
     
     
-def test_baaiinfo_processor():
+def test_baaiinfo_processor(tmp_path):
     data_path = Path(__file__).parents[2] / 'data'
     lst = list(sorted(data_path.glob('????-??-??')))
     assert len(lst) > 0, 'No valid data'
@@ -177,7 +193,7 @@ def test_baaiinfo_processor():
             other_infos.append(info)
     all_infos.extend(random.sample(other_infos, min(len(other_infos), 24)))
     
-    msinfo_processor = BAAIDataInfoProcessor()
+    msinfo_processor = BAAIDataInfoProcessor(history_data_path=copy_history(data_path, tmp_path))
     all_res = []
     for info in all_infos:
         msinfo_processor.parse_input(PipelineData(info, None, None))
@@ -0,0 +1,33 @@
+import jsonlines
+from oslm_crawler.pipeline.readers import JsonlineReader
+from oslm_crawler.pipeline.base import PipelineData
+
+
+def test_jsonline_reader(tmp_path):
+    tmp_path = tmp_path / 'tmp.jsonl'
+    records = [{"repo": "BAAI", "model_name": f"model-{i}", "likes": i} for i in range(5)]
+    with jsonlines.open(tmp_path, 'w') as f:
+        f.write_all(records)
+
+    res = next(JsonlineReader(tmp_path).run())
+    assert res.data['content'] == records
+    assert res.data['total_lines'] == 5
+
+    reader = JsonlineReader(tmp_path, drop_keys=['likes'], stream=True)
+    reader.parse_input(PipelineData({"repo_org_mapper": {"BAAI": "BAAI"}}, None, None))
+    res = list(reader.run())
+    assert [x.data for x in res] == [
+        {"repo": "BAAI", "model_name": f"model-{i}", "repo_org_mapper": {"BAAI": "BAAI"}}
+        for i in range(5)
+    ]
+
+    reader = JsonlineReader(tmp_path, required_keys=['model_name'], stream=True, chunk_size=2)
+    res = list(reader.run())
+    assert [x.data['total_lines'] for x in res] == [2, 2, 1]
+    assert res[-1].message['total_lines'] == 5
+    assert [y for x in res for y in x.data['content']] == [
+        {"model_name": f"model-{i}"} for i in range(5)
+    ]
+
+    res = list(JsonlineReader(tmp_path, required_keys=['dataset_name'], stream=True).run())
+    assert len(res) == 1 and res[0].error is not None
@@ -1,6 +1,12 @@
+import sqlite3
 import jsonlines
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from oslm_crawler.pipeline.writers import JsonlineWriter
+from oslm_crawler.codec import iter_jsonl, jsonl_writer
+from oslm_crawler.core import _write_db
+from oslm_crawler.pipeline.writers import DBWriter, JsonlineWriter, ParquetWriter
 from oslm_crawler.pipeline.base import PipelineData
 
 def test_jsonline_writer():
@@ -22,4 +28,162 @@ def test_jsonline_writer():
         assert 'def' in res.keys()
         assert 'repo_org_mapper' not in res.keys()
     tmp_path.unlink()
-    
\ No newline at end of file
+    
+
+def test_parquet_writer(tmp_path):
+    tmp_path = tmp_path / 'merged-models-info.parquet'
+    writer = ParquetWriter(tmp_path, drop_keys=['repo_org_mapper'], row_group_size=2)
+    for i in range(5):
+        writer.parse_input(PipelineData({
+            "org": "BAAI",
+            "model_name": f"model-{i}",
+            "likes": i,
+            "repo_org_mapper": {"BAAI": "BAAI"},
+        }, None, None))
+        next(writer.run())
+    assert not tmp_path.exists()
+    assert writer.close()
+    res = pq.read_table(tmp_path)
+    assert res.num_rows == 5
+    assert res.schema.field('likes').type == pa.int64()
+    assert 'repo_org_mapper' not in res.column_names
+    assert res.column('model_name').to_pylist() == [f"model-{i}" for i in range(5)]
+
+
+def test_buffered_atomic_jsonline_writer(tmp_path):
+    tmp_path = tmp_path / 'tmp.jsonl'
+    with jsonlines.open(tmp_path, 'w') as f:
+        f.write({"old": True})
+    writer = JsonlineWriter(tmp_path, drop_keys=['repo_org_mapper'], buffer_size=3, atomic=True)
+    for i in range(2):
+        writer.parse_input(PipelineData({"abc": i, "repo_org_mapper": {}}, None, None))
+        next(writer.run())
+    assert writer.write_many([{"abc": i, "repo_org_mapper": {}} for i in range(2, 5)]) == 3
+    assert writer.buffer == []
+    # The previous artifact is kept until the writer is closed.
+    with jsonlines.open(tmp_path, 'r') as f:
+        assert list(f) == [{"old": True}]
+    writer.parse_input(PipelineData({"abc": 5, "repo_org_mapper": {}}, None, None))
+    next(writer.run())
+    assert writer.close()
+    with jsonlines.open(tmp_path, 'r') as f:
+        assert list(f) == [{"abc": i} for i in range(6)]
+    assert not writer.tmp_path.exists()
+
+
+def test_db_writer(tmp_path):
+    db_path = tmp_path / 'oslm.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("create table models (org text, model_name text, likes integer, "
+                     "date_enter_db text, primary key (org, model_name))")
+        conn.execute("insert into models values ('BAAI', 'model-0', 0, '2025-01-01')")
+        conn.execute("create table log (model_name text)")
+        conn.execute("create view log_view as select model_name from log")
+        conn.execute("create trigger log_insert instead of insert on log_view "
+                     "begin insert into log values (new.model_name); end")
+
+    writer = DBWriter(db_path, 'models', drop_keys=['likes'], buffer_size=2)
+    for i in range(3):
+        writer.parse_input(PipelineData({
+            "org": "BAAI",
+            "model_name": f"model-{i}",
+            "likes": i,
+            "repo_org_mapper": {"BAAI": "BAAI"},
+        }, None, None))
+        assert next(writer.run()).error is None
+    # Each full buffer is committed at once.
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("select count(*) from models").fetchone()[0] == 2
+    assert writer.close()
+    with sqlite3.connect(db_path) as conn:
+        # Existing rows are upserted, the columns missing from the records are kept.
+        assert conn.execute("select * from models order by model_name").fetchall() == [
+            ('BAAI', 'model-0', 0, '2025-01-01'),
+            ('BAAI', 'model-1', None, None),
+            ('BAAI', 'model-2', None, None),
+        ]
+
+    with sqlite3.connect(db_path) as conn:
+        writer = DBWriter(conn, 'log_view')
+        assert writer.write_many([{"model_name": "model-0"}, {"model_name": "model-1"}]) == 2
+        assert writer.close()
+        assert conn.execute("select count(*) from log").fetchone()[0] == 2
+    with pytest.raises(KeyError):
+        DBWriter(db_path, 'models').write_many([{"model_name": "model-3"}])
+
+
+def test_db_writer_rejected_rows(tmp_path):
+    db_path = tmp_path / 'oslm.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("create table models (org text, model_name text, likes integer not null, "
+                     "primary key (org, model_name))")
+
+    # The rejected record is reported and dropped, the following ones are written.
+    writer = DBWriter(db_path, 'models', buffer_size=1)
+    with open(tmp_path / 'errors.jsonl', 'w') as error_f:
+        error_writer = jsonl_writer(error_f)
+        for i, likes in enumerate([None, 1, 2, 3]):
+            data = PipelineData({"org": "BAAI", "model_name": f"model-{i}", "likes": likes}, None, None)
+            _write_db(writer, data, error_writer, error_f)
+        error_writer.close()
+    errors = list(iter_jsonl(tmp_path / 'errors.jsonl'))
+    assert [e['input']['model_name'] for e in errors] == ['model-0']
+    assert 'NOT NULL' in errors[0]['error_msg']
+    assert writer.close()
+    assert writer.take_errors() == []
+
+    # In a batch, only the failing rows are dropped.
+    writer = DBWriter(db_path, 'models', buffer_size=10)
+    writer.write_many([
+        {"org": "Meta", "model_name": f"model-{i}", "likes": None if i == 2 else i} for i in range(5)
+    ])
+    assert writer.close()
+    assert [e['input']['model_name'] for e in writer.take_errors()] == ['model-2']
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("select org, model_name from models order by org, model_name").fetchall() == [
+            ('BAAI', 'model-1'), ('BAAI', 'model-2'), ('BAAI', 'model-3'),
+            ('Meta', 'model-0'), ('Meta', 'model-1'), ('Meta', 'model-3'), ('Meta', 'model-4'),
+        ]
+
+
+def test_db_writer_locked(tmp_path):
+    db_path = tmp_path / 'oslm.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("create table models (org text, model_name text, primary key (org, model_name))")
+    locker = sqlite3.connect(db_path, isolation_level=None)
+    locker.execute("begin immediate")
+
+    def write(error_f, *names):
+        error_writer = jsonl_writer(error_f)
+        for name in names:
+            data = PipelineData({"org": "BAAI", "model_name": name}, None, None)
+            _write_db(writer, data, error_writer, error_f)
+        error_writer.close()
+
+    def count():
+        with sqlite3.connect(db_path) as conn:
+            return conn.execute("select count(*) from models").fetchone()[0]
+
+    # The records stay buffered while the database is locked, and are written once released.
+    writer = DBWriter(db_path, 'models', buffer_size=1, timeout=0.05, max_buffer_size=3)
+    with open(tmp_path / 'errors.jsonl', 'w') as error_f:
+        write(error_f, 'model-0', 'model-1')
+        locker.rollback()
+        write(error_f, 'model-2')
+    assert list(iter_jsonl(tmp_path / 'errors.jsonl')) == []
+    assert count() == 3
+
+    # Up to max_buffer_size records, then they are dropped and reported.
+    locker.execute("begin immediate")
+    with open(tmp_path / 'errors.jsonl', 'w') as error_f:
+        write(error_f, 'model-3', 'model-4', 'model-5', 'model-6')
+    errors = list(iter_jsonl(tmp_path / 'errors.jsonl'))
+    assert [e['input']['model_name'] for e in errors] == ['model-3', 'model-4', 'model-5']
+    assert 'database is locked' in errors[0]['error_msg']
+
+    # close() fails and reports the records it could not write.
+    assert not writer.close()
+    assert [e['input']['model_name'] for e in writer.take_errors()] == ['model-6']
+    locker.rollback()
+    locker.close()
+    assert count() == 3
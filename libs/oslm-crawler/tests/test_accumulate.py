@@ -0,0 +1,53 @@
+from oslm_crawler.accumulate import (
+    Accumulator, AccumulateCheckpoints, MODEL_ACCUMULATE, accumulation_history
+)
+from oslm_crawler.catalog import SnapshotCatalog
+from oslm_crawler.core import AccumulateAndRankingPipeline
+from oslm_crawler.codec import iter_jsonl, open_jsonl
+
+DATES = ['2025-01-07', '2025-02-07', '2025-03-07', '2025-04-07']
+
+
+def model(name, downloads, likes, date):
+    return {'org': 'BAAI', 'repo': 'BAAI', 'model_name': name, 'modality': 'Language',
+            'downloads_last_month': downloads, 'likes': likes, 'community': 0,
+            'descendants': 1, 'date_crawl': date}
+
+
+def write_snapshots(tmp_path):
+    for i, date in enumerate(DATES):
+        (tmp_path / date).mkdir()
+        with open_jsonl(tmp_path / date / 'merged-models-info.jsonl', 'w') as f:
+            f.write_all([model('bge', 10 * i, 5 - i, date), model(f'new-{i}', i, i, date)])
+        (tmp_path / date / 'merged-datasets-info.jsonl').write_text('')
+
+
+def accumulate(tmp_path, date):
+    AccumulateAndRankingPipeline(tmp_path / date, tmp_path / 'logs/running.log').step('accumulate')
+    return list(iter_jsonl(tmp_path / date / 'accumulated-models-info.jsonl'))
+
+
+def test_accumulate_checkpoints(tmp_path):
+    write_snapshots(tmp_path)
+    catalog = SnapshotCatalog.load(tmp_path)
+    history = accumulation_history(catalog, '2025-04-07')
+    accumulate(tmp_path, '2025-03-07')
+    # The first snapshot is not accumulated, 2025-04-07 resumes from 2025-03-07.
+    assert AccumulateCheckpoints(tmp_path).latest(history) == 1
+    res = accumulate(tmp_path, '2025-04-07')
+    assert AccumulateCheckpoints(tmp_path).latest(history) == 2
+    assert [r['model_name'] for r in res] == ['bge', 'new-1', 'new-2', 'new-3']
+    assert res[0]['accumulated_downloads'] == 10 + 20 + 30
+    assert res[0]['likes'] == 4
+
+    scratch = Accumulator(MODEL_ACCUMULATE)
+    for date in DATES[1:]:
+        scratch.update(iter_jsonl(tmp_path / date / 'merged-models-info.jsonl'))
+    assert scratch.results() == res
+
+    with open_jsonl(tmp_path / '2025-02-07/merged-models-info.jsonl', 'w') as f:
+        f.write_all([model('bge', 100, 1, '2025-02-07')])
+    catalog.update('2025-02-07')
+    history = accumulation_history(catalog, '2025-04-07')
+    assert AccumulateCheckpoints(tmp_path).latest(history) is None
+    assert accumulate(tmp_path, '2025-04-07')[0]['accumulated_downloads'] == 100 + 20 + 30
@@ -0,0 +1,93 @@
+import json
+from oslm_crawler.catalog import SnapshotCatalog, REQUIRED_ARTIFACTS
+
+
+def test_snapshot_catalog(tmp_path):
+
+    for date in ['2025-01-07', '2025-02-07']:
+        for artifact in REQUIRED_ARTIFACTS:
+            p = tmp_path / date / artifact
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text('a,b\n1,2\n' if p.suffix == '.csv' else '{}\n{}\n')
+    (tmp_path / '2025-03-07/HuggingFace').mkdir(parents=True)
+    (tmp_path / '2025-03-07/HuggingFace/raw-models-info.jsonl').write_text('{}\n')
+
+    catalog = SnapshotCatalog.load(tmp_path)
+    assert catalog is SnapshotCatalog.load(tmp_path)
+    assert catalog.dates() == ['2025-01-07', '2025-02-07', '2025-03-07']
+    assert catalog.dates(complete=True) == ['2025-01-07', '2025-02-07']
+    assert catalog.dates(require='overall-rank.csv') == ['2025-01-07', '2025-02-07']
+    snapshot = catalog.get('2025-03-07')
+    assert snapshot.sources == ['HuggingFace']
+    assert not snapshot.complete
+    assert catalog.get('2025-01-07').rows('overall-rank.csv') == 1
+    assert catalog.get('2025-01-07').rows('merged-models-info.jsonl') == 2
+    assert catalog.nearest('2025-03-07').date == '2025-02-07'
+    assert catalog.nearest('2025-01-07') is None
+
+    with (tmp_path / 'manifest.json').open('r') as f:
+        manifest = json.load(f)
+    assert set(manifest['snapshots']) == set(catalog.dates())
+
+    (tmp_path / '2025-03-07/overall-rank.csv').write_text('a,b\n1,2\n3,4\n')
+    snapshot = catalog.update('2025-03-07')
+    assert snapshot.rows('overall-rank.csv') == 2
+    assert SnapshotCatalog(tmp_path).get('2025-03-07').has('overall-rank.csv')
+
+
+def test_compact_snapshots(tmp_path):
+    from oslm_crawler.merge import MergeAggregator, MODEL_MERGE
+    from oslm_crawler.parquet import export_parquet, iter_records
+
+    records = [
+        {'org': 'BAAI', 'repo': 'BAAI', 'model_name': 'bge', 'modality': 'Vector',
+         'downloads_last_month': 10, 'likes': 1, 'community': 0, 'descendants': 2,
+         'date_crawl': '2025-01-07'},
+    ]
+    for date in ['2025-01-07', '2025-02-07']:
+        for artifact in REQUIRED_ARTIFACTS:
+            p = tmp_path / date / artifact
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text('a,b\n1,2\n' if p.suffix == '.csv' else '\n'.join(map(json.dumps, records)) + '\n')
+    old = tmp_path / '2025-01-07/merged-models-info.jsonl'
+    export_parquet(old)
+
+    catalog = SnapshotCatalog.load(tmp_path)
+    compacted = catalog.compact(keep=1)
+    assert old.with_name(old.name + '.zst') in compacted
+    assert not old.exists()
+    assert not (tmp_path / '2025-02-07/merged-models-info.jsonl.zst').exists()
+
+    snapshot = catalog.get('2025-01-07')
+    assert snapshot.complete
+    assert snapshot.rows('merged-models-info.jsonl') == 1
+    assert list(iter_records(old)) == records
+    assert list(iter_records(tmp_path / '2025-01-07/HuggingFace/processed-models-info.jsonl')) == records
+    merged = MergeAggregator(MODEL_MERGE).update_from([
+        tmp_path / date / 'HuggingFace/processed-models-info.jsonl' for date in catalog.dates()
+    ])
+    assert merged.total == 2
+
+
+def test_catalog_reload(tmp_path, monkeypatch):
+    from oslm_crawler import catalog as catalog_module
+
+    for date in ['2025-01-07', '2025-02-07']:
+        (tmp_path / date).mkdir()
+        (tmp_path / date / 'merged-models-info.jsonl').write_text('{}\n')
+    SnapshotCatalog.load(tmp_path)
+
+    # Another process reuses the checksums of the manifest instead of reading the artifacts.
+    def describe(path):
+        raise AssertionError(f"{path} hashed again")
+
+    monkeypatch.setattr(catalog_module, '_describe', describe)
+    assert SnapshotCatalog(tmp_path).refresh().dates() == ['2025-01-07', '2025-02-07']
+
+    # A snapshot directory added later is seen by the cached catalog.
+    monkeypatch.undo()
+    (tmp_path / '2025-03-07').mkdir()
+    (tmp_path / '2025-03-07/merged-models-info.jsonl').write_text('{}\n{}\n')
+    catalog = SnapshotCatalog.load(tmp_path)
+    assert catalog.dates() == ['2025-01-07', '2025-02-07', '2025-03-07']
+    assert catalog.get('2025-03-07').rows('merged-models-info.jsonl') == 2
@@ -0,0 +1,60 @@
+import pytest
+from collections import namedtuple
+from oslm_crawler import codec
+
+
+@pytest.mark.parametrize('name', list(codec.CODECS))
+def test_codec_round_trip(tmp_path, name):
+    records = [
+        {"repo": "BAAI", "model_name": f"模型-{i}", "likes": i, "metadata": {"likes": str(i)}}
+        for i in range(3)
+    ]
+    previous = codec.get_codec()
+    codec.set_codec(name)
+    try:
+        with codec.open_jsonl(tmp_path / 'tmp.jsonl', 'w') as f:
+            f.write_all(records)
+        for other in codec.CODECS:
+            codec.set_codec(other)
+            with codec.open_jsonl(tmp_path / 'tmp.jsonl', 'r') as f:
+                assert list(f) == records
+            assert list(codec.iter_jsonl(tmp_path / 'tmp.jsonl')) == records
+            assert codec.loads(codec.dumps(records[0])) == records[0]
+            assert codec.loads(codec.dumps(records, pretty=True)) == records
+
+        Record = namedtuple('Record', ['repo', 'model_name', 'likes', 'metadata'])
+        res = list(codec.iter_jsonl(tmp_path / 'tmp.jsonl', Record))
+        assert res[2] == Record("BAAI", "模型-2", 2, {"likes": "2"})
+    finally:
+        codec.set_codec(previous.name)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        codec.set_codec('unknown')
+
+
+@pytest.mark.parametrize('suffix', codec.COMPRESSED_SUFFIXES)
+def test_compressed_jsonl(tmp_path, suffix):
+    records = [{"repo": "BAAI", "model_name": f"bge-{i}", "likes": i} for i in range(5)]
+    path = tmp_path / 'raw-models-info.jsonl'
+    with codec.open_jsonl(path, 'w') as f:
+        f.write_all(records)
+    target = codec.compact_jsonl(path, suffix)
+    assert target.name == f'raw-models-info.jsonl{suffix}'
+    assert not path.exists() and codec.exists(path)
+    assert codec.resolve(path) == target
+    assert list(codec.iter_jsonl(path)) == records
+    with codec.open_jsonl(path, 'r') as f:
+        assert list(f) == records
+
+    with codec.open_jsonl(target, 'a') as f:
+        f.write({"repo": "BAAI", "model_name": "bge-5", "likes": 5})
+    assert len(list(codec.iter_jsonl(path))) == 6
+
+    from oslm_crawler.pipeline.writers import JsonlineWriter
+    writer = JsonlineWriter(str(path), buffer_size=2, atomic=True)
+    writer.write_many(records[:2])
+    assert writer.close()
+    assert not target.exists()
+    assert list(codec.iter_jsonl(path)) == records[:2]
@@ -0,0 +1,61 @@
+import jsonlines
+from oslm_crawler.downloads_index import DownloadsIndex, SOURCE_FILES, nearest_snapshot
+
+DATES = ['2025-01-07', '2025-02-07', '2025-03-07', '2025-05-07']
+
+
+def write_snapshots(data_path):
+    # A few raw records per source and snapshot, the downloads grow every month.
+    for month, date in enumerate(DATES):
+        for source, files in SOURCE_FILES.items():
+            for file_name, name_field in files:
+                p = data_path / date / source / file_name
+                p.parent.mkdir(parents=True, exist_ok=True)
+                with jsonlines.open(p, 'w') as f:
+                    f.write_all({
+                        'repo': f'repo-{i % 2}',
+                        name_field: f'{source}-{i}',
+                        'total_downloads': 100 * i + month,
+                    } for i in range(3 + month))
+
+
+def test_downloads_index(tmp_path):
+
+    data_path = tmp_path / 'data'
+    write_snapshots(data_path)
+    history_data_path = {p.name: p for p in data_path.glob('????-??-??')}
+    index = DownloadsIndex(data_path / 'downloads-index.db')
+
+    for source, files in SOURCE_FILES.items():
+        for date in sorted(history_data_path):
+            expected = {}
+            closest_date = nearest_snapshot(date, history_data_path.keys())
+            if closest_date is not None:
+                for file_name, name_field in files:
+                    p = history_data_path[closest_date] / source / file_name
+                    with jsonlines.open(p, 'r') as f:
+                        for item in f:
+                            expected[f"{item['repo']}/{item[name_field]}"] = item['total_downloads']
+            assert index.last_month_downloads(source, date, history_data_path) == expected
+    assert index.last_month_downloads('ModelScope', '2025-03-07', history_data_path)['repo-0/ModelScope-2'] == 201
+    assert index.last_month_downloads('ModelScope', '2025-05-07', history_data_path) == {}
+
+    # Unchanged snapshots are not ingested twice.
+    index.backfill(data_path)
+    assert index.backfill(data_path) == 0
+    index.close()
+    index.close()
+
+    # The connection is opened again on use, the processors close it after every flush.
+    with DownloadsIndex(data_path / 'downloads-index.db') as reopened:
+        assert reopened.backfill(data_path) == 0
+    assert reopened._conn is None
+    assert reopened.dates('ModelScope') == DATES
+    reopened.close()
+
+
+def test_nearest_snapshot():
+    dates = ['2025-01-14', '2025-02-14', '2025-03-07']
+    assert nearest_snapshot('2025-03-07', dates) == '2025-02-14'
+    assert nearest_snapshot('2025-02-14', dates) == '2025-01-14'
+    assert nearest_snapshot('2025-01-14', dates) is None
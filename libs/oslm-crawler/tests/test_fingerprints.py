@@ -0,0 +1,33 @@
+from oslm_crawler.catalog import SnapshotCatalog, REQUIRED_ARTIFACTS
+from oslm_crawler.fingerprints import RankFingerprints, RANK_OUTPUTS, previous_snapshot
+
+
+def test_rank_fingerprints(tmp_path):
+    for date in ['2025-01-07', '2025-02-07']:
+        for artifact in [*REQUIRED_ARTIFACTS, *RANK_OUTPUTS, 'infra-summary.csv']:
+            p = tmp_path / date / artifact
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text('a,b\n1,2\n' if p.suffix == '.csv' else '{}\n')
+    catalog = SnapshotCatalog.load(tmp_path)
+    config = {'data_dir': 'all', 'ranking': {'ranking_weights': {'data': 0.5, 'model': 0.5}}}
+
+    fingerprints = RankFingerprints(tmp_path)
+    previous = catalog.get('2025-01-07')
+    snapshot = catalog.get('2025-02-07')
+    assert previous_snapshot(catalog, '2025-02-07') == previous
+    fingerprint = fingerprints.compute(snapshot, previous, config)
+    assert not fingerprints.is_current(snapshot, fingerprint)
+    fingerprints.record(snapshot, fingerprint)
+    assert RankFingerprints(tmp_path).is_current(snapshot, fingerprint)
+    assert fingerprints.compute(snapshot, previous, config | {'force': True}) == fingerprint
+
+    other = {'data_dir': 'all', 'ranking': {'ranking_weights': {'data': 0.4, 'model': 0.6}}}
+    assert fingerprints.compute(snapshot, previous, other) != fingerprint
+
+    (tmp_path / '2025-01-07/model-rank.csv').write_text('a,b\n1,3\n')
+    previous = catalog.update('2025-01-07')
+    assert fingerprints.compute(snapshot, previous, config) != fingerprint
+
+    (tmp_path / '2025-02-07/overall-rank.csv').write_text('a,b\n1,3\n')
+    snapshot = catalog.update('2025-02-07')
+    assert not fingerprints.is_current(snapshot, fingerprint)
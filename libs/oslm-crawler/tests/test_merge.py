@@ -0,0 +1,57 @@
+import jsonlines
+from collections import defaultdict
+from pathlib import Path
+from oslm_crawler.merge import MergeAggregator, MODEL_MERGE, DATASET_MERGE
+from oslm_crawler.pipeline.base import PipelineData
+from oslm_crawler.pipeline.processors import MultiSourceInfoMerge
+
+
+def test_merge_aggregator():
+
+    data_path = Path(__file__).parents[1] / 'data'
+    lst = list(sorted(data_path.glob('????-??-??')))
+    assert len(lst) > 0, 'No valid data'
+
+    for spec, counter in [(MODEL_MERGE, 'descendants'), (DATASET_MERGE, 'dataset_usage')]:
+        category = 'models' if spec is MODEL_MERGE else 'datasets'
+        paths = [p / f'processed-{category}-info.jsonl' for p in lst[-1].iterdir()]
+        buffer = defaultdict(list)
+        for p in paths:
+            if not p.exists():
+                continue
+            with jsonlines.open(p, 'r') as reader:
+                for data in reader:
+                    buffer[f"{data['org']}/{data[spec.name_field]}"].append(data)
+
+        merger = MergeAggregator(spec).update_from(paths)
+        assert len(merger) == len(buffer)
+        for item, records in zip(merger.results(), buffer.values()):
+            assert list(item.keys()) == list(spec.fields)
+            for field in spec.first:
+                assert item[field] == records[0][field]
+            assert item['downloads_last_month'] == sum(
+                r['downloads_last_month'] for r in records if r['downloads_last_month'] > 0)
+            assert item['likes'] == sum(r['likes'] for r in records)
+            assert item[counter] == sum(r[counter] for r in records if counter in r)
+
+
+def test_multi_source_info_merge():
+
+    merge = MultiSourceInfoMerge('models')
+    records = [
+        {'org': 'BAAI', 'repo': 'BAAI', 'model_name': 'bge-m3', 'modality': 'Vector',
+         'downloads_last_month': 10, 'likes': 1, 'date_crawl': '2025-01-01',
+         'source': source, 'community': 2, **extra}
+        for source, extra in [('HuggingFace', {'descendants': 3}), ('ModelScope', {})]
+    ]
+    records[1]['downloads_last_month'] = -5
+    for record in records:
+        merge.parse_input(PipelineData(record, None, None))
+        res = next(merge.run())
+        assert res.error is None and res.data['source'] == record['source']
+    res = next(merge.flush())
+    assert res.data['model_records'] == [{
+        'org': 'BAAI', 'repo': 'BAAI', 'model_name': 'bge-m3', 'modality': 'Vector',
+        'downloads_last_month': 10, 'likes': 2, 'community': 4, 'descendants': 3,
+        'date_crawl': '2025-01-01',
+    }]
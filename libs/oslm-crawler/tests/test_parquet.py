@@ -0,0 +1,36 @@
+import os
+import shutil
+import jsonlines
+from pathlib import Path
+from oslm_crawler.parquet import export_snapshot, iter_records, read_frame, is_fresh, parquet_path
+
+
+def test_export_snapshot(tmp_path):
+
+    data_path = Path(__file__).parents[1] / 'data'
+    lst = list(sorted(data_path.glob('????-??-??')))
+    assert len(lst) > 0, 'No valid data'
+    snapshot_dir = shutil.copytree(lst[-1], tmp_path / lst[-1].name)
+
+    written = export_snapshot(snapshot_dir)
+    assert len(written) == len(list(snapshot_dir.rglob('*.jsonl')))
+    assert export_snapshot(snapshot_dir) == []
+
+    for p in snapshot_dir.rglob('*.jsonl'):
+        assert is_fresh(p)
+        with jsonlines.open(p, 'r') as f:
+            expected = list(f)
+        res = list(iter_records(p))
+        assert len(res) == len(expected)
+        for x, y in zip(expected, res):
+            assert x == {k: y[k] for k in x}
+        assert list(read_frame(p).columns) == list(expected[0].keys())
+
+    # A rewritten jsonl file is read again until it is exported.
+    p = snapshot_dir / 'merged-models-info.jsonl'
+    with jsonlines.open(p, 'w') as f:
+        f.write(expected_item := {'org': 'BAAI', 'model_name': 'new'})
+    stat = parquet_path(p).stat()
+    os.utime(p, (stat.st_atime, stat.st_mtime + 1))
+    assert not is_fresh(p)
+    assert list(iter_records(p)) == [expected_item]
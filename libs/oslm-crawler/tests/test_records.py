@@ -0,0 +1,70 @@
+import pytest
+from oslm_crawler import codec
+from oslm_crawler.records import ModelRecord, HFModelRecord
+from oslm_crawler.parquet import iter_records, records_to_table, write_parquet
+from oslm_crawler.pipeline.writers import JsonlineWriter
+from oslm_crawler.crawler.huggingface import HFModelInfo
+
+
+def make_records(n=3):
+    return [
+        ModelRecord('BAAI', 'BAAI', f'bge-{i}', 'Vector', i * 10, i, 0, 1, '2025-07-01')
+        for i in range(n)
+    ]
+
+
+def test_record_is_slotted():
+    record = make_records(1)[0]
+    assert not hasattr(record, '__dict__')
+    with pytest.raises(AttributeError):
+        record.unknown = 1
+
+
+def test_record_dict_and_row():
+    record = make_records(1)[0]
+    assert ModelRecord.from_row(record.to_row()) == record
+    data = record.to_dict() | {'link': 'https://huggingface.co/BAAI/bge-0'}
+    assert ModelRecord.from_dict(data) == record
+    assert list(data)[:len(ModelRecord.field_names())] == list(ModelRecord.field_names())
+
+
+@pytest.mark.parametrize('name', list(codec.CODECS))
+def test_record_jsonl(tmp_path, name):
+    records = make_records()
+    previous = codec.get_codec()
+    codec.set_codec(name)
+    try:
+        writer = JsonlineWriter(str(tmp_path / 'merged-models-info.jsonl'), buffer_size=10)
+        assert writer.write_many(records) == 3
+        writer.close()
+        res = list(iter_records(tmp_path / 'merged-models-info.jsonl', record_type=ModelRecord))
+        assert res == records
+    finally:
+        codec.set_codec(previous.name)
+
+
+def test_record_parquet(tmp_path):
+    records = make_records()
+    table = records_to_table(records)
+    assert table.column_names == list(ModelRecord.field_names())
+    assert table.column('likes').to_pylist() == [0, 1, 2]
+
+    path = tmp_path / 'merged-models-info.jsonl'
+    with codec.open_jsonl(path, 'w') as f:
+        f.write_all(records)
+    write_parquet([r.to_dict() for r in records], path.with_suffix('.parquet'))
+    assert list(iter_records(path, record_type=ModelRecord)) == records
+    res = list(iter_records(path, record_type=HFModelRecord))
+    assert res[1].model_name == 'bge-1' and res[1].link is None
+
+
+def test_crawler_info_is_record():
+    info = HFModelInfo(
+        date_crawl='2025-07-01',
+        link='https://huggingface.co/BAAI/bge-m3',
+        metadata={'downloads_last_month': '1,234', 'likes': '5', 'community': '2', 'tree': []},
+    )
+    assert not hasattr(info, '__dict__')
+    data = info.to_dict()
+    assert (data['repo'], data['model_name'], data['downloads_last_month']) == ('BAAI', 'bge-m3', 1234)
+    assert codec.loads(codec.dumps(info)) == data
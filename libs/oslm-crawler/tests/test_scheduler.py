@@ -0,0 +1,39 @@
+import shutil
+import yaml
+from pathlib import Path
+from oslm_crawler.catalog import SnapshotCatalog
+from oslm_crawler.core import MergeAndRankingPipeline
+from oslm_crawler.scheduler import RankingScheduler
+
+DATES = ['2025-07-07', '2025-08-07', '2025-09-07']
+
+
+def copy_snapshots(target: Path) -> list:
+    data_path = Path(__file__).parents[1] / 'data'
+    for date in DATES:
+        shutil.copytree(data_path / date, target / date,
+                        ignore=shutil.ignore_patterns('*.parquet', '*.tmp'))
+    return SnapshotCatalog.load(target).snapshots()
+
+
+def test_ranking_scheduler(tmp_path):
+    config_path = Path(__file__).parents[1] / 'config/default_task.yaml'
+    with config_path.open('r') as f:
+        config = yaml.safe_load(f)['RankingPipeline']
+    stages = [(stage, config[stage]) for stage in ['merge_models', 'merge_datasets', 'ranking']]
+
+    serial = copy_snapshots(tmp_path / 'serial')
+    for snapshot in serial:
+        proc = MergeAndRankingPipeline(snapshot.path, tmp_path / 'logs/serial.log')
+        for stage, kargs in stages:
+            proc = proc.step(stage, **kargs)
+        proc.done()
+
+    parallel = copy_snapshots(tmp_path / 'parallel')
+    RankingScheduler(MergeAndRankingPipeline, stages, tmp_path / 'logs', workers=2).run(parallel)
+
+    for snapshot in serial:
+        for path in sorted(snapshot.path.glob('*.csv')):
+            other = tmp_path / 'parallel' / snapshot.date / path.name
+            assert path.read_bytes() == other.read_bytes(), path.name
+    assert (tmp_path / 'parallel/2025-09-07/model-summary-delta.csv').exists()
@@ -0,0 +1,51 @@
+import shutil
+import pandas as pd
+import yaml
+from pathlib import Path
+from oslm_crawler.core import MergeAndRankingPipeline
+from oslm_crawler.service import RankingService
+
+DATE = '2025-09-07'
+RANK_FILES = {'data': 'data-rank.csv', 'model': 'model-rank.csv', 'infra': 'infra-rank.csv',
+              'eval': 'eval-rank.csv', 'overall': 'overall-rank.csv'}
+
+
+def ranking_config():
+    config_path = Path(__file__).parents[1] / 'config/default_task.yaml'
+    with config_path.open('r') as f:
+        return yaml.safe_load(f)['RankingPipeline']['ranking']
+
+
+def test_ranking_service(tmp_path):
+    data_path = Path(__file__).parents[1] / 'data'
+    shutil.copytree(data_path / DATE, tmp_path / DATE,
+                    ignore=shutil.ignore_patterns('*.parquet', '*.tmp'))
+    config = ranking_config()
+    MergeAndRankingPipeline(tmp_path / DATE, tmp_path / 'logs/running.log').step(
+        'ranking', **(config | {'delta': False})).done()
+
+    service = RankingService(tmp_path, config)
+    res = service.rank(DATE)
+    for dimension, name in RANK_FILES.items():
+        expected = pd.read_csv(tmp_path / DATE / name, index_col='org')
+        pd.testing.assert_frame_equal(res[dimension], expected, check_dtype=False,
+                                      check_exact=False, rtol=1e-12)
+
+    # A subset of orgs and dimensions is normalized and ranked among themselves only.
+    orgs = ['BAAI', 'Meta', 'Google', 'Ali']
+    res = service.rank(DATE, orgs=orgs, dimensions=['data', 'model'])
+    assert list(res) == ['data', 'model', 'overall']
+    assert list(res['overall'].index) == orgs
+    assert list(res['overall'].columns) == ['data', 'model', 'score', 'rank']
+    assert (res['data'].drop(columns=['score', 'rank']).max() <= 1).all()
+    assert res['overall']['rank'].min() == 1
+
+    # Summaries are cached and dropped once the inputs change.
+    frames = service._load(DATE, False)
+    assert service._load(DATE, False) is frames
+    service.refresh()
+    assert service._load(DATE, False) is frames
+    (tmp_path / DATE / 'infra-summary.csv').write_text(
+        (tmp_path / DATE / 'infra-summary.csv').read_text() + '\n')
+    service.refresh()
+    assert service._load(DATE, False) is not frames
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from oslm_crawler.summary import summarize_datasets, summarize_models
+
+
+def dataset(org, modality, lifecycle, downloads, usage=0):
+    return {'org': org, 'modality': modality, 'lifecycle': lifecycle,
+            'accumulated_downloads': downloads, 'dataset_usage': usage}
+
+
+def model(org, modality, downloads, likes=0):
+    return {'org': org, 'modality': modality, 'downloads_last_month': downloads,
+            'likes': likes, 'community': 1, 'descendants': 0}
+
+
+def test_summarize_datasets():
+    df = pd.DataFrame([
+        dataset('BAAI', 'Language', 'Pre-training', 10, 1),
+        dataset('BAAI', 'Language', 'Fine-tuning', 5, 2),
+        dataset('BAAI', None, 'Pre-training', 7, 4),
+        dataset('Meta', 'Vision', 'Preference', 3),
+    ])
+    other = pd.DataFrame([dataset('Meta', 'Language', 'Pre-training', 0)])
+    weights = {'num_language': 0, 'num_speech': 0, 'num_pretraining': 0,
+               'downloads_language': 0, 'downloads_pretraining': 0, 'dataset_usage': 0,
+               'operators': 0}
+    res = summarize_datasets(df, weights, ['BAAI', 'Meta', 'Google'],
+                             'accumulated_downloads', other)
+
+    assert list(res.columns) == list(weights)
+    assert res.index.name == 'org'
+    assert res.to_dict('index') == {
+        'BAAI': {'num_language': 2, 'num_speech': 0, 'num_pretraining': 2,
+                 'downloads_language': 15, 'downloads_pretraining': 17, 'dataset_usage': 7,
+                 'operators': 24},
+        'Meta': {'num_language': 1, 'num_speech': 0, 'num_pretraining': 1,
+                 'downloads_language': 0, 'downloads_pretraining': 0, 'dataset_usage': 0,
+                 'operators': 0},
+        'Google': {k: 0 for k in weights},
+    }
+    assert all(dtype == 'int64' for dtype in res.dtypes)
+
+
+def test_summarize_models():
+    df = pd.DataFrame([
+        model('BAAI', 'Language', 10, likes=3),
+        model('BAAI', 'Vision', 5),
+        model('BAAI', None, 1, likes=2),
+        model('Meta', 'Language', 4),
+    ])
+    weights = {'num_language': 0, 'downloads_vision': 0, 'likes': 0, 'issue': 0,
+               'num_adapted_chips': 0}
+    res = summarize_models(df, weights, ['all'])
+
+    assert res.to_dict('index') == {
+        'BAAI': {'num_language': 1, 'downloads_vision': 5, 'likes': 5, 'issue': 3,
+                 'num_adapted_chips': 4},
+        'Meta': {'num_language': 1, 'downloads_vision': 0, 'likes': 0, 'issue': 1,
+                 'num_adapted_chips': 2},
+    }
+    with pytest.raises(RuntimeError, match='Unrecognized field'):
+        summarize_models(df, {'stars': 0}, ['all'])
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from oslm_crawler.whatif import DIMENSIONS, WhatIfRanking, rank_stability, weight_grid
+
+ORGS = ['BAAI', 'Meta', 'Google', 'Ali']
+CONFIG = {
+    'data_config': ['average', {'num_language': 0, 'downloads_language': 0}],
+    'model_config': ['weight', {'num_language': 0.3, 'downloads_language': '0.5+0.2'}],
+    'infra_config': ['average', {'num_operators': 0}],
+    'eval_config': ['average', {'num_leaderboards': 0}],
+    'ranking_weights': {'data': '0.5/3', 'model': 0.5, 'infra': '0.5/3', 'eval': '0.5/3'},
+}
+WEIGHTS = {'num_language': 0.3, 'downloads_language': 0.7}
+
+
+def rank(score):
+    return score.rank(ascending=False, method='dense').astype(int)
+
+
+def write_rank_tables(tmp_path):
+    rng = np.random.default_rng(0)
+    ranks = {}
+    for dimension in DIMENSIONS:
+        columns = list(CONFIG[f'{dimension}_config'][1])
+        df = pd.DataFrame(rng.random((len(ORGS), len(columns))), index=ORGS, columns=columns)
+        df.index.name = 'org'
+        method, weights = CONFIG[f'{dimension}_config']
+        if method == 'average':
+            df['score'] = df.mean(axis=1)
+        else:
+            df['score'] = df.mul({k: WEIGHTS[k] for k in weights}).sum(axis=1)
+        df['rank'] = rank(df['score'])
+        df.to_csv(tmp_path / f'{dimension}-rank.csv')
+        ranks[dimension] = df['rank']
+    overall = pd.DataFrame({d: 1 / np.log2(ranks[d] + 1) for d in DIMENSIONS})
+    overall['score'] = overall.mul({'data': 0.5 / 3, 'model': 0.5, 'infra': 0.5 / 3,
+                                    'eval': 0.5 / 3}).sum(axis=1)
+    overall['rank'] = rank(overall['score'])
+    overall.to_csv(tmp_path / 'overall-rank.csv')
+    return ranks, overall
+
+
+def test_weight_grid():
+    grid = weight_grid({'data': [0.1, '0.5/2']}, CONFIG['ranking_weights'])
+    assert list(grid.columns) == DIMENSIONS
+    assert grid['data'].tolist() == [0.1, 0.25]
+    assert grid['model'].tolist() == [0.5, 0.5]
+    with pytest.raises(KeyError):
+        weight_grid({'infra_score': [1]}, CONFIG['ranking_weights'])
+
+
+def test_whatif_ranking(tmp_path):
+    ranks, overall = write_rank_tables(tmp_path)
+    ranking = WhatIfRanking.load(tmp_path, CONFIG)
+
+    # Without a grid, the ranks of the last run are reproduced.
+    scenarios, res = ranking.evaluate({})
+    assert len(scenarios) == 1
+    assert res[0].tolist() == overall['rank'].tolist()
+    for dimension in DIMENSIONS:
+        weights = weight_grid({}, ranking.base_weights(dimension))
+        assert ranking.dimension_ranks(dimension, weights)[0].tolist() == ranks[dimension].tolist()
+
+    # Every scenario matches ranking each weighting one by one.
+    grid = {'ranking_weights': {'data': [0.1, 0.9], 'model': [0.2, 0.5, 0.8]},
+            'model_config': {'num_language': [0, 1]}}
+    scenarios, res = ranking.evaluate(grid)
+    assert len(scenarios) == res.shape[1] == 12
+    assert list(scenarios.columns) == ['ranking.data', 'ranking.model', 'ranking.infra',
+                                       'ranking.eval', 'model.num_language']
+    model = pd.read_csv(tmp_path / 'model-rank.csv', index_col='org')
+    for i, scenario in scenarios.iterrows():
+        model_rank = rank(model['num_language'] * scenario['model.num_language']
+                          + model['downloads_language'] * 0.7)
+        gains = pd.DataFrame({d: 1 / np.log2(ranks[d] + 1) for d in DIMENSIONS})
+        gains['model'] = 1 / np.log2(model_rank + 1)
+        weights = {d: scenario[f'ranking.{d}'] for d in DIMENSIONS}
+        assert res[i].tolist() == rank(gains.mul(weights).sum(axis=1)).tolist()
+
+    stability = rank_stability(res, top=1)
+    assert set(stability.index) == set(ORGS)
+    assert (stability['best'] <= stability['worst']).all()
+    assert stability['top1'].sum() >= 1
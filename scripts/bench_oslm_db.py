@@ -0,0 +1,126 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = []
+# ///
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from insightswarm.database.oslm_sqlite import OSLMSqliteController
+
+MODEL_MODALITIES = ['Language', 'Speech', 'Vision', 'Multimodal', 'Protein', 'Vector', '3D', 'Embodied']
+DATASET_MODALITIES = ['Language', 'Speech', 'Vision', 'Multimodal', 'Embodied']
+LIFECYCLES = ['Pre-training', 'Fine-tuning', 'Preference', 'Evaluation']
+
+
+def snapshot_dates(years):
+    # One snapshot per month; the first one is the baseline the database skips.
+    return [date(2025 + m // 12, m % 12 + 1, 7).isoformat() for m in range(12 * years + 1)]
+
+
+# Per-source artifacts: the share of the merged repos found on each source.
+SOURCE_FILES = {
+    'HuggingFace/processed-models-info.jsonl': ('models', 1),
+    'HuggingFace/processed-datasets-info.jsonl': ('datasets', 1),
+    'ModelScope/processed-models-info.jsonl': ('models', 4),
+    'ModelScope/processed-datasets-info.jsonl': ('datasets', 4),
+    'OpenDataLab/processed-datasets-info.jsonl': ('datasets', 8),
+    'BAAIData/processed-datasets-info.jsonl': ('datasets', 8),
+}
+
+
+def write_jsonl(path, records):
+    path.parent.mkdir(exist_ok=True)
+    with path.open('w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def write_snapshots(data_dir, years, models, datasets, orgs, seed):
+    """Every month, the same repos are crawled again with grown counters and about 2% new
+    repos are published. The merged files and every per-source file are written."""
+    rng = random.Random(seed)
+    num_rows = 0
+    for month, date_crawl in enumerate(snapshot_dates(years)):
+        path = data_dir / date_crawl
+        path.mkdir()
+        num_models = models + models * month // 50
+        num_datasets = datasets + datasets * month // 50
+        records = {
+            'models': [{
+                'org': f'org-{i % orgs}', 'repo': f'repo-{i % orgs}', 'model_name': f'model-{i}',
+                'modality': MODEL_MODALITIES[i % len(MODEL_MODALITIES)],
+                'downloads_last_month': rng.randint(0, 100_000), 'likes': i % 1000 + month,
+                'community': i % 100, 'descendants': i % 50, 'date_crawl': date_crawl,
+            } for i in range(num_models)],
+            'datasets': [{
+                'org': f'org-{i % orgs}', 'repo': f'repo-{i % orgs}', 'dataset_name': f'dataset-{i}',
+                'modality': DATASET_MODALITIES[i % len(DATASET_MODALITIES)],
+                'lifecycle': LIFECYCLES[i % len(LIFECYCLES)],
+                'downloads_last_month': rng.randint(0, 100_000), 'likes': i % 1000 + month,
+                'community': i % 100, 'dataset_usage': i % 50, 'date_crawl': date_crawl,
+            } for i in range(num_datasets)],
+        }
+        write_jsonl(path / 'merged-models-info.jsonl', records['models'])
+        write_jsonl(path / 'merged-datasets-info.jsonl', records['datasets'])
+        source_rows = 0
+        for artifact, (kind, step) in SOURCE_FILES.items():
+            write_jsonl(path / artifact, [
+                record | {'total_downloads': record['downloads_last_month'] * (month + 1),
+                          'link': f"https://example.com/{record['repo']}/{i}"}
+                for i, record in enumerate(records[kind][::step])
+            ])
+            source_rows += len(records[kind][::step])
+        if month > 0:
+            num_rows += num_models + num_datasets + source_rows
+    return num_rows
+
+
+def dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [
+            sorted(conn.execute(f"select * from {table}").fetchall(), key=repr)
+            for table in (
+                'models', 'datasets', 'status', 'models_monthly', 'datasets_monthly',
+                *(f'{table}_info' for table in OSLMSqliteController.source_tables),
+            )
+        ]
+    finally:
+        conn.close()
+
+
+def main(years, models, datasets, orgs):
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        data_dir = tmp / 'data'
+        data_dir.mkdir()
+        num_rows = write_snapshots(data_dir, years, models, datasets, orgs, seed=0)
+        print(f"{years} years of monthly snapshots, {num_rows} rows")
+
+        results = {}
+        for name, bulk in (('default', False), ('bulk', True)):
+            db_path = tmp / f'{name}.db'
+            controller = OSLMSqliteController(data_dir, db_path)
+            start = time.perf_counter()
+            controller.init(bulk)
+            elapsed = time.perf_counter() - start
+            controller.conn.close()
+            results[name] = dump(db_path)
+            print(f"  {name:8s} {elapsed:8.2f} s  {num_rows / elapsed:10.0f} rows/s")
+        assert results['default'] == results['bulk'], "Bulk load differs from the default load"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the default and bulk loads of the oslm sqlite database on synthetic snapshots.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--models", type=int, default=5000, help="Models of the first snapshot")
+    parser.add_argument("--datasets", type=int, default=2000, help="Datasets of the first snapshot")
+    parser.add_argument("--orgs", type=int, default=400)
+    args = parser.parse_args()
+    main(args.years, args.models, args.datasets, args.orgs)
@@ -1,5 +1,4 @@
 import argparse
-from .database.oslm_sqlite import OSLMSqliteController
 
 
 def main() -> None:
@@ -17,6 +16,9 @@ def main() -> None:
     
     db_parser = sub_parser.add_parser("db", parents=[parent_parser])
     db_parser.add_argument("--init", choices=['oslm-sqlite'])
+    db_parser.add_argument("--update", choices=['oslm-sqlite'])
+    db_parser.add_argument("--bulk", action="store_true",
+                           help="Load all pending snapshots in one transaction per table")
     db_parser.set_defaults(func=db_run)
     
     args = parser.parse_args()
@@ -38,10 +40,19 @@ def mcp_run(args):
 
 
 def db_run(args):
+    # oslm-crawler is an optional dependency (the `oslm` extra), only the database needs it.
+    from .database.oslm_sqlite import OSLMSqliteController
     if args.init:
         match args.init:
             case "oslm-sqlite":
                 controller = OSLMSqliteController()
-                controller.init()
+                controller.init(args.bulk)
+            case _:
+                raise NotImplementedError()
+    if args.update:
+        match args.update:
+            case "oslm-sqlite":
+                controller = OSLMSqliteController()
+                controller.update(args.bulk)
             case _:
                 raise NotImplementedError()
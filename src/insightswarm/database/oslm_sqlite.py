@@ -1,13 +1,28 @@
 import sqlite3
-import jsonlines
+from contextlib import contextmanager
 from loguru import logger
 from pathlib import Path
 from .oslm_record import ModelRecord, DatasetRecord
 from .oslm_record import HFModelRecord, HFDatasetRecord
 from .oslm_record import MSModelRecord, MSDatasetRecord
 from .oslm_record import OpenDataLabRecord, BAAIDataRecord
+from oslm_crawler import codec
+from oslm_crawler.catalog import SnapshotCatalog
+from oslm_crawler.parquet import iter_records
+
 
 class OSLMSqliteController:
+
+    # Rows per executemany call and connection settings of the bulk-load mode. The journal is
+    # kept in memory and writes are not synced: a crash during a bulk load may corrupt the
+    # database, which is then rebuilt with `init`.
+    bulk_buffer_size = 50000
+    bulk_pragmas = {
+        'journal_mode': 'memory',
+        'synchronous': 'off',
+        'cache_size': -262144,
+        'temp_store': 'memory',
+    }
     
     create_status_table = """
 create table if not exists status (
@@ -46,22 +61,261 @@ create table if not exists datasets (
     date_enter_db text,
     primary key (org, dataset_name, date_crawl)
 )
+"""
+
+    # Secondary indexes for the DISTINCT scans of the MCP schema tool and the org, modality and
+    # month filters of agent queries. org alone is served by the primary keys.
+    models_indexes = {
+        'models_date_crawl': 'models (date_crawl, org, modality)',
+        'models_modality': 'models (modality, date_crawl)',
+    }
+    datasets_indexes = {
+        'datasets_date_crawl': 'datasets (date_crawl, org, modality, lifecycle)',
+        'datasets_modality': 'datasets (modality, date_crawl)',
+        'datasets_lifecycle': 'datasets (lifecycle, date_crawl)',
+    }
+
+    # Monthly aggregates per org and modality (and lifecycle), refreshed for the crawl dates of
+    # every load, so that typical aggregations do not scan the record tables.
+    create_models_monthly_table = """
+create table if not exists models_monthly (
+    org text not null,
+    modality text,
+    date_crawl text not null,
+    num_models integer,
+    downloads_last_month integer,
+    likes integer,
+    community integer,
+    descendants integer
+)
+"""
+    create_models_monthly_index = """
+create index if not exists models_monthly_key on models_monthly (date_crawl, org, modality)
+"""
+    create_datasets_monthly_table = """
+create table if not exists datasets_monthly (
+    org text not null,
+    modality text,
+    lifecycle text,
+    date_crawl text not null,
+    num_datasets integer,
+    downloads_last_month integer,
+    likes integer,
+    community integer,
+    dataset_usage integer
+)
+"""
+    create_datasets_monthly_index = """
+create index if not exists datasets_monthly_key on datasets_monthly (date_crawl, org, modality, lifecycle)
+"""
+
+    # Per-source tables. The strings of the records are stored once in the dimension tables,
+    # with integer keys, and every crawl adds one narrow row per entity to the fact table of its
+    # source. An entity is a model or dataset of one source, identified by its repo and name;
+    # `date_enter_db` is the first crawl it was found in. The `*_info` views join the
+    # dimensions back for querying.
+    create_orgs_table = """
+create table if not exists orgs (
+    org_id integer primary key,
+    org text not null unique
+)
+"""
+    create_repos_table = """
+create table if not exists repos (
+    repo_id integer primary key,
+    repo text not null unique
+)
+"""
+    create_modalities_table = """
+create table if not exists modalities (
+    modality_id integer primary key,
+    modality text not null unique
+)
+"""
+    create_lifecycles_table = """
+create table if not exists lifecycles (
+    lifecycle_id integer primary key,
+    lifecycle text not null unique
+)
+"""
+    create_entities_table = """
+create table if not exists entities (
+    entity_id integer primary key,
+    source text not null,
+    repo_id integer not null references repos (repo_id),
+    name text not null,
+    link text,
+    date_enter_db text,
+    unique (source, repo_id, name)
+)
 """
     create_hf_models_table = """
+create table if not exists hf_models (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    downloads_last_month integer,
+    likes integer,
+    community integer,
+    descendants integer,
+    primary key (entity_id, date_crawl)
+) without rowid
 """
     create_hf_datasets_table = """
+create table if not exists hf_datasets (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    lifecycle_id integer references lifecycles (lifecycle_id),
+    downloads_last_month integer,
+    likes integer,
+    community integer,
+    dataset_usage integer,
+    primary key (entity_id, date_crawl)
+) without rowid
 """
     create_ms_models_table = """
+create table if not exists ms_models (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    downloads_last_month integer,
+    total_downloads integer,
+    likes integer,
+    community integer,
+    primary key (entity_id, date_crawl)
+) without rowid
 """
     create_ms_datasets_table = """
+create table if not exists ms_datasets (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    lifecycle_id integer references lifecycles (lifecycle_id),
+    downloads_last_month integer,
+    total_downloads integer,
+    likes integer,
+    community integer,
+    primary key (entity_id, date_crawl)
+) without rowid
 """
     create_odl_datasets_table = """
+create table if not exists odl_datasets (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    lifecycle_id integer references lifecycles (lifecycle_id),
+    downloads_last_month integer,
+    total_downloads integer,
+    likes integer,
+    primary key (entity_id, date_crawl)
+) without rowid
 """
     create_baai_datasets_table = """
+create table if not exists baai_datasets (
+    entity_id integer not null references entities (entity_id),
+    date_crawl text not null,
+    org_id integer references orgs (org_id),
+    modality_id integer references modalities (modality_id),
+    lifecycle_id integer references lifecycles (lifecycle_id),
+    downloads_last_month integer,
+    total_downloads integer,
+    likes integer,
+    primary key (entity_id, date_crawl)
+) without rowid
+"""
+    create_source_fact_index = """
+create index if not exists {table}_date_crawl on {table} (date_crawl, org_id, modality_id)
+"""
+    create_source_view = """
+create view if not exists {table}_info as
+select o.org, r.repo, e.name as {name}, m.modality, {lifecycle}{measures}, f.date_crawl, e.date_enter_db, e.link
+from {table} f
+join entities e on e.entity_id = f.entity_id
+join repos r on r.repo_id = e.repo_id
+left join orgs o on o.org_id = f.org_id
+left join modalities m on m.modality_id = f.modality_id
+{lifecycle_join}"""
+
+    # Records written to a `*_info` view are stored like the staged ones.
+    create_source_insert_trigger = """
+create trigger if not exists {table}_info_insert instead of insert on {table}_info
+begin
+    insert or ignore into orgs (org) select new.org where new.org is not null;
+    insert or ignore into repos (repo) select new.repo where new.repo is not null;
+    insert or ignore into modalities (modality) select new.modality where new.modality is not null;
+    {insert_lifecycle}insert into entities (source, repo_id, name, link, date_enter_db)
+    select '{table}', repo_id, new.{name}, new.link, new.date_crawl from repos where repo = new.repo
+    on conflict (source, repo_id, name) do update set
+        link = coalesce(excluded.link, entities.link),
+        date_enter_db = min(entities.date_enter_db, excluded.date_enter_db);
+    insert into {table} (entity_id, date_crawl, org_id, modality_id, {lifecycle}{measures})
+    select e.entity_id, new.date_crawl,
+        (select org_id from orgs where org = new.org),
+        (select modality_id from modalities where modality = new.modality),
+        {new_lifecycle_id}{new_measures}
+    from entities e join repos r on r.repo_id = e.repo_id
+    where e.source = '{table}' and r.repo = new.repo and e.name = new.{name}
+    on conflict (entity_id, date_crawl) do update set
+        org_id = excluded.org_id,
+        modality_id = excluded.modality_id,
+        {updates};
+end
+"""
+
+    # Per-source artifact of every snapshot and the record type it is read as.
+    source_tables = {
+        'hf_models': ('HuggingFace/processed-models-info.jsonl', HFModelRecord),
+        'hf_datasets': ('HuggingFace/processed-datasets-info.jsonl', HFDatasetRecord),
+        'ms_models': ('ModelScope/processed-models-info.jsonl', MSModelRecord),
+        'ms_datasets': ('ModelScope/processed-datasets-info.jsonl', MSDatasetRecord),
+        'odl_datasets': ('OpenDataLab/processed-datasets-info.jsonl', OpenDataLabRecord),
+        'baai_datasets': ('BAAIData/processed-datasets-info.jsonl', BAAIDataRecord),
+    }
+    # Record fields that are not measures of the fact tables.
+    dimension_fields = (
+        'org', 'repo', 'model_name', 'dataset_name', 'modality', 'lifecycle',
+        'date_crawl', 'date_enter_db', 'link', 'img_path',
+    )
+
+    # A snapshot of a source is staged in a temporary table with the fields of its record type,
+    # its new dimension values and entities are inserted, then its facts are upserted.
+    insert_dimension_table = """
+insert or ignore into {dimension} ({column})
+select distinct {column} from staging_{table} where {column} is not null
+"""
+    # The staging table has no index: the joins are driven from it (`cross join` keeps it the
+    # outer loop) and look up the dimensions and entities by their unique keys.
+    upsert_entities_table = """
+insert into entities (source, repo_id, name, link, date_enter_db)
+select '{table}', r.repo_id, s.{name}, s.link, s.date_crawl
+from staging_{table} s cross join repos r on r.repo = s.repo where true
+on conflict (source, repo_id, name) do update set
+    link = coalesce(excluded.link, entities.link),
+    date_enter_db = min(entities.date_enter_db, excluded.date_enter_db)
+"""
+    upsert_source_table = """
+insert into {table} (entity_id, date_crawl, org_id, modality_id, {lifecycle}{measures})
+select e.entity_id, s.date_crawl, o.org_id, m.modality_id, {lifecycle_id}{staged_measures}
+from staging_{table} s
+cross join repos r on r.repo = s.repo
+cross join entities e on e.source = '{table}' and e.repo_id = r.repo_id and e.name = s.{name}
+left join orgs o on o.org = s.org
+left join modalities m on m.modality = s.modality
+{lifecycle_join}where true
+on conflict (entity_id, date_crawl) do update set
+    org_id = excluded.org_id,
+    modality_id = excluded.modality_id,
+    {updates}
 """
 
     insert_status_table = """
-insert into status (table_name, first_date_crawl, last_date_crawl)
+insert or ignore into status (table_name, first_date_crawl, last_date_crawl)
 values (?, ?, ?)
 """
     insert_models_table = """
@@ -74,7 +328,169 @@ values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 """
 
     update_status_table = """
-update status set last_date_crawl = ? where table_name = ?
+update status set first_date_crawl = coalesce(first_date_crawl, ?), last_date_crawl = ?
+where table_name = ?
+"""
+    select_status_table = """
+select last_date_crawl from status where table_name = ?
+"""
+
+    # The aggregates of the crawl dates in the staging table are replaced after a bulk load.
+    delete_models_monthly_table = """
+delete from models_monthly where date_crawl in (select date_crawl from staging_models)
+"""
+    refresh_models_monthly_table = """
+insert into models_monthly (org, modality, date_crawl, num_models, downloads_last_month, likes, community, descendants)
+select org, modality, date_crawl, count(*), ifnull(sum(downloads_last_month), 0), ifnull(sum(likes), 0),
+       ifnull(sum(community), 0), ifnull(sum(descendants), 0)
+from models where date_crawl in (select date_crawl from staging_models)
+group by org, modality, date_crawl
+"""
+    rebuild_models_monthly_table = """
+insert into models_monthly (org, modality, date_crawl, num_models, downloads_last_month, likes, community, descendants)
+select org, modality, date_crawl, count(*), ifnull(sum(downloads_last_month), 0), ifnull(sum(likes), 0),
+       ifnull(sum(community), 0), ifnull(sum(descendants), 0)
+from models group by org, modality, date_crawl
+"""
+    delete_datasets_monthly_table = """
+delete from datasets_monthly where date_crawl in (select date_crawl from staging_datasets)
+"""
+    refresh_datasets_monthly_table = """
+insert into datasets_monthly (org, modality, lifecycle, date_crawl, num_datasets, downloads_last_month, likes, community, dataset_usage)
+select org, modality, lifecycle, date_crawl, count(*), ifnull(sum(downloads_last_month), 0), ifnull(sum(likes), 0),
+       ifnull(sum(community), 0), ifnull(sum(dataset_usage), 0)
+from datasets where date_crawl in (select date_crawl from staging_datasets)
+group by org, modality, lifecycle, date_crawl
+"""
+    rebuild_datasets_monthly_table = """
+insert into datasets_monthly (org, modality, lifecycle, date_crawl, num_datasets, downloads_last_month, likes, community, dataset_usage)
+select org, modality, lifecycle, date_crawl, count(*), ifnull(sum(downloads_last_month), 0), ifnull(sum(likes), 0),
+       ifnull(sum(community), 0), ifnull(sum(dataset_usage), 0)
+from datasets group by org, modality, lifecycle, date_crawl
+"""
+
+    # Triggers keep the database consistent whoever writes the record tables, e.g. the
+    # `DBWriter` of the crawler pipelines: a record inserted without date_enter_db gets the
+    # earliest crawl of its entity, and the monthly aggregates follow every insert, update and
+    # delete. Bulk loads drop the aggregate triggers and refresh the aggregates afterwards.
+    entity_names = {'models': 'model_name', 'datasets': 'dataset_name'}
+    monthly_columns = {
+        'models': (
+            ['org', 'modality', 'date_crawl'], 'num_models',
+            ['downloads_last_month', 'likes', 'community', 'descendants'],
+        ),
+        'datasets': (
+            ['org', 'modality', 'lifecycle', 'date_crawl'], 'num_datasets',
+            ['downloads_last_month', 'likes', 'community', 'dataset_usage'],
+        ),
+    }
+    create_date_enter_db_trigger = """
+create trigger if not exists {table}_date_enter_db after insert on {table}
+when new.date_enter_db is null
+begin
+    update {table} set date_enter_db = min(ifnull(
+        (select min(date_enter_db) from {table} where org = new.org and {name} = new.{name}),
+        new.date_crawl), new.date_crawl)
+    where org = new.org and {name} = new.{name} and (date_enter_db is null or date_enter_db > new.date_crawl);
+end
+"""
+    create_keep_date_enter_db_trigger = """
+create trigger if not exists {table}_keep_date_enter_db after update of date_enter_db on {table}
+when new.date_enter_db is null
+begin
+    update {table} set date_enter_db = ifnull(old.date_enter_db, new.date_crawl)
+    where org = new.org and {name} = new.{name} and date_crawl = new.date_crawl;
+end
+"""
+    # A missing (null) measure counts as 0, in the triggers as in the aggregates rebuilt with
+    # ifnull(sum(...), 0), so that both give the same totals.
+    add_monthly = """
+    insert into {table}_monthly ({groups}, {count}, {measures})
+    select {new_groups}, 0, {zeros}
+    where not exists (select 1 from {table}_monthly where {match_new});
+    update {table}_monthly set {count} = {count} + 1, {add_new} where {match_new};"""
+    subtract_monthly = """
+    update {table}_monthly set {count} = {count} - 1, {subtract_old} where {match_old};
+    delete from {table}_monthly where {match_old} and {count} = 0;"""
+    create_monthly_insert_trigger = """
+create trigger if not exists {table}_monthly_insert after insert on {table}
+begin{add}
+end
+"""
+    create_monthly_update_trigger = """
+create trigger if not exists {table}_monthly_update after update of {groups}, {measures} on {table}
+begin{subtract}{add}
+end
+"""
+    create_monthly_delete_trigger = """
+create trigger if not exists {table}_monthly_delete after delete on {table}
+begin{subtract}
+end
+"""
+
+    # Rows of one snapshot are staged in a temporary table and upserted together, so that
+    # date_enter_db is derived from the rows already in the database (or, for new entries,
+    # from the earliest crawl in the snapshot) and re-ingesting a snapshot is idempotent.
+    create_staging_models_table = """
+create temp table if not exists staging_models as select * from models where 0
+"""
+    create_staging_models_index = """
+create index if not exists temp.staging_models_key on staging_models (org, model_name)
+"""
+    drop_staging_models_index = """
+drop index if exists temp.staging_models_key
+"""
+    create_staging_datasets_table = """
+create temp table if not exists staging_datasets as select * from datasets where 0
+"""
+    create_staging_datasets_index = """
+create index if not exists temp.staging_datasets_key on staging_datasets (org, dataset_name)
+"""
+    drop_staging_datasets_index = """
+drop index if exists temp.staging_datasets_key
+"""
+    insert_staging_models_table = """
+insert into staging_models (org, repo, model_name, modality, downloads_last_month, likes, community, descendants, date_crawl, date_enter_db)
+values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+    insert_staging_datasets_table = """
+insert into staging_datasets (org, repo, dataset_name, modality, lifecycle, downloads_last_month, likes, community, dataset_usage, date_crawl, date_enter_db)
+values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+    upsert_models_table = """
+insert into models (org, repo, model_name, modality, downloads_last_month, likes, community, descendants, date_crawl, date_enter_db)
+select s.org, s.repo, s.model_name, s.modality, s.downloads_last_month, s.likes, s.community, s.descendants, s.date_crawl,
+    coalesce(
+        (select min(m.date_enter_db) from models m where m.org = s.org and m.model_name = s.model_name),
+        min(s.date_crawl) over (partition by s.org, s.model_name)
+    )
+from staging_models s where true
+on conflict (org, model_name, date_crawl) do update set
+    repo = excluded.repo,
+    modality = excluded.modality,
+    downloads_last_month = excluded.downloads_last_month,
+    likes = excluded.likes,
+    community = excluded.community,
+    descendants = excluded.descendants,
+    date_enter_db = excluded.date_enter_db
+"""
+    upsert_datasets_table = """
+insert into datasets (org, repo, dataset_name, modality, lifecycle, downloads_last_month, likes, community, dataset_usage, date_crawl, date_enter_db)
+select s.org, s.repo, s.dataset_name, s.modality, s.lifecycle, s.downloads_last_month, s.likes, s.community, s.dataset_usage, s.date_crawl,
+    coalesce(
+        (select min(d.date_enter_db) from datasets d where d.org = s.org and d.dataset_name = s.dataset_name),
+        min(s.date_crawl) over (partition by s.org, s.dataset_name)
+    )
+from staging_datasets s where true
+on conflict (org, dataset_name, date_crawl) do update set
+    repo = excluded.repo,
+    modality = excluded.modality,
+    lifecycle = excluded.lifecycle,
+    downloads_last_month = excluded.downloads_last_month,
+    likes = excluded.likes,
+    community = excluded.community,
+    dataset_usage = excluded.dataset_usage,
+    date_enter_db = excluded.date_enter_db
 """
     
     def __init__(
@@ -94,7 +510,7 @@ update status set last_date_crawl = ? where table_name = ?
         assert self.data_dir.exists()
         assert self.db_path.parent.exists()
         
-        self.buffer_size = 64        
+        self.buffer_size = buffer_size
         self.conn = sqlite3.connect(self.db_path)
         self.cursor = self.conn.cursor()
         try:
@@ -103,98 +519,316 @@ update status set last_date_crawl = ? where table_name = ?
         except Exception:
             logger.exception("Exception when create status table.")
         
-    def init(self):
+    def init(self, bulk: bool = False):
+        self.update(bulk)
+    
+    def update(self, bulk: bool = False):
+        """Load the snapshots newer than the last one loaded into each table (all of them
+        for a new database). Re-loading a snapshot replaces its rows.
+
+        With `bulk`, the snapshots of every table are loaded in one transaction with large
+        batches and the pragmas of `bulk_pragmas`, and the tables are analyzed afterwards. It is
+        rolled back if the load fails. This is meant for building the database from scratch or
+        catching up many months at once.
+        """
         self._init_models_table()
         self._init_datasets_table()
-    
-    def update(self):
-        pass
+        for table in self.source_tables:
+            getattr(self, f'_init_{table}_table')()
+        # Pick up the snapshot directories added since the catalog was loaded.
+        SnapshotCatalog.load(self.data_dir).refresh()
+        if not bulk:
+            self._update_table('models', 'merged-models-info.jsonl', ModelRecord)
+            self._update_table('datasets', 'merged-datasets-info.jsonl', DatasetRecord)
+            for table in self.source_tables:
+                self._update_source_table(table)
+            return
+        with self._bulk_load():
+            self._bulk_update_table('models', 'merged-models-info.jsonl', ModelRecord)
+            self._bulk_update_table('datasets', 'merged-datasets-info.jsonl', DatasetRecord)
+            for table in self.source_tables:
+                self._update_source_table(table, bulk=True)
+            self.cursor.execute("analyze")
+
+    @contextmanager
+    def _bulk_load(self):
+        # The whole load is one transaction, including the indexes and triggers dropped during
+        # the upserts: a failed load leaves the database as it was.
+        self.conn.commit()
+        saved = {
+            name: self.cursor.execute(f"pragma {name}").fetchone()[0]
+            for name in self.bulk_pragmas
+        }
+        for name, value in self.bulk_pragmas.items():
+            self.cursor.execute(f"pragma {name} = {value}")
+        try:
+            self.cursor.execute("begin")
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            for name, value in saved.items():
+                self.cursor.execute(f"pragma {name} = {value}")
+
+    def _snapshot_paths(self) -> list[Path]:
+        return [snapshot.path for snapshot in SnapshotCatalog.load(self.data_dir).snapshots()[1:]]
+
+    def _last_date_crawl(self, table: str) -> str | None:
+        row = self.cursor.execute(self.select_status_table, (table,)).fetchone()
+        return row[0] if row else None
+
+    def _pending_paths(self, table: str, artifact: str | None = None) -> list[Path]:
+        # The load stops before the first snapshot missing `artifact` (e.g. crawled but not
+        # merged yet), so that the status of the table does not move past it.
+        last_date_crawl = self._last_date_crawl(table)
+        paths = []
+        for path in self._snapshot_paths():
+            if last_date_crawl is not None and path.name <= last_date_crawl:
+                continue
+            if artifact is not None and not codec.exists(path / artifact):
+                logger.warning(f"{path / artifact} not found, table {table} stops before {path.name}.")
+                break
+            paths.append(path)
+        if not paths:
+            logger.info(f"Table {table} is up to date ({last_date_crawl}).")
+        return paths
+
+    def _stage(self, insert_staging: str, data_path: Path, record_type, buffer_size: int):
+        logger.info(f"Processing {str(data_path)}...")
+        buffer: list[tuple] = []
+        for record in iter_records(data_path, record_type=record_type):
+            buffer.append(record.to_row())
+            if len(buffer) >= buffer_size:
+                self.cursor.executemany(insert_staging, buffer)
+                buffer.clear()
+        if len(buffer) > 0:
+            self.cursor.executemany(insert_staging, buffer)
+            buffer.clear()
+
+    def _update_table(self, table: str, artifact: str, record_type):
+        self.cursor.execute(getattr(self, f'create_staging_{table}_table'))
+        self.cursor.execute(getattr(self, f'create_staging_{table}_index'))
+        paths = self._pending_paths(table, artifact)
+        if not paths:
+            return
+
+        for path in paths:
+            self.cursor.execute(f"delete from staging_{table}")
+            self._stage(getattr(self, f'insert_staging_{table}_table'), path / artifact, record_type,
+                        self.buffer_size)
+            self.cursor.execute(getattr(self, f'upsert_{table}_table'))
+            self.cursor.execute(self.update_status_table, (path.name, path.name, table))
+            self.conn.commit()
         
+        logger.info(f"Update {table} table done, last snapshot: {paths[-1].name}.")
+
+    def _bulk_update_table(self, table: str, artifact: str, record_type):
+        # Stage every pending snapshot before indexing the staging table, then upsert them in a
+        # single statement with the secondary indexes and aggregate triggers of the table dropped:
+        # date_enter_db is the earliest crawl over all of them, as if they had been loaded one by one.
+        self.cursor.execute(getattr(self, f'create_staging_{table}_table'))
+        self.cursor.execute(getattr(self, f'drop_staging_{table}_index'))
+        paths = self._pending_paths(table, artifact)
+        if not paths:
+            return
+
+        self.cursor.execute(f"delete from staging_{table}")
+        buffer_size = max(self.buffer_size, self.bulk_buffer_size)
+        for path in paths:
+            self._stage(getattr(self, f'insert_staging_{table}_table'), path / artifact, record_type,
+                        buffer_size)
+        self.cursor.execute(getattr(self, f'create_staging_{table}_index'))
+        self._drop_indexes(table)
+        self._drop_monthly_triggers(table)
+        self.cursor.execute(getattr(self, f'upsert_{table}_table'))
+        self._create_indexes(table)
+        self._refresh_monthly(table)
+        self._create_triggers(table)
+        self.cursor.execute(self.update_status_table, (paths[0].name, paths[-1].name, table))
+        self.cursor.execute(f"delete from staging_{table}")
+
+        logger.info(f"Bulk load {table} table done, last snapshot: {paths[-1].name}.")
+
+    def _create_indexes(self, table: str):
+        for name, columns in getattr(self, f'{table}_indexes').items():
+            self.cursor.execute(f"create index if not exists {name} on {columns}")
+
+    def _drop_indexes(self, table: str):
+        for name in getattr(self, f'{table}_indexes'):
+            self.cursor.execute(f"drop index if exists {name}")
+
+    def _create_triggers(self, table: str):
+        name = self.entity_names[table]
+        self.cursor.execute(self.create_date_enter_db_trigger.format(table=table, name=name))
+        self.cursor.execute(self.create_keep_date_enter_db_trigger.format(table=table, name=name))
+        groups, count, measures = self.monthly_columns[table]
+        parts = {
+            'table': table,
+            'groups': ', '.join(groups),
+            'count': count,
+            'measures': ', '.join(measures),
+            'new_groups': ', '.join(f'new.{c}' for c in groups),
+            'zeros': ', '.join('0' for _ in measures),
+            'match_new': ' and '.join(f'{c} is new.{c}' for c in groups),
+            'match_old': ' and '.join(f'{c} is old.{c}' for c in groups),
+            'add_new': ', '.join(f'{c} = ifnull({c}, 0) + ifnull(new.{c}, 0)' for c in measures),
+            'subtract_old': ', '.join(f'{c} = ifnull({c}, 0) - ifnull(old.{c}, 0)' for c in measures),
+        }
+        parts['add'] = self.add_monthly.format(**parts)
+        parts['subtract'] = self.subtract_monthly.format(**parts)
+        for trigger in ('insert', 'update', 'delete'):
+            self.cursor.execute(getattr(self, f'create_monthly_{trigger}_trigger').format(**parts))
+
+    def _drop_monthly_triggers(self, table: str):
+        for trigger in ('insert', 'update', 'delete'):
+            self.cursor.execute(f"drop trigger if exists {table}_monthly_{trigger}")
+
+    def _refresh_monthly(self, table: str):
+        self.cursor.execute(getattr(self, f'delete_{table}_monthly_table'))
+        self.cursor.execute(getattr(self, f'refresh_{table}_monthly_table'))
+
+    def _init_monthly(self, table: str):
+        # Databases built before the aggregates were introduced have them rebuilt once.
+        empty = self.cursor.execute(f"select not exists (select 1 from {table}_monthly)").fetchone()[0]
+        loaded = self.cursor.execute(f"select exists (select 1 from {table})").fetchone()[0]
+        if empty and loaded:
+            logger.info(f"Build {table}_monthly table...")
+            self.cursor.execute(getattr(self, f'rebuild_{table}_monthly_table'))
+
     def _init_models_table(self):
         try:
             self.cursor.execute(self.create_models_table)
+            self.cursor.execute(self.create_models_monthly_table)
+            self.cursor.execute(self.create_models_monthly_index)
+            self._create_indexes('models')
             self.cursor.execute(self.insert_status_table, ("models", None, None))
+            self._init_monthly('models')
+            self._create_triggers('models')
             self.conn.commit()
         except Exception:
             logger.exception("Exception when create models table.")
-            
-        date_enter_db_map = {}
-        buffer: list[ModelRecord] = []
-        for path in sorted(self.data_dir.glob("????-??-??"))[1:]:
-            data_path = path / 'merged-models-info.jsonl'
-            logger.info(f"Processing {str(data_path)}...")
-            with jsonlines.open(data_path, 'r') as f:
-                for item in f:
-                    key = f"{item['org']}/{item['model_name']}"
-                    date_crawl = item['date_crawl']
-                    date_enter_db = date_enter_db_map.get(key)
-                    if date_enter_db is None:
-                        date_enter_db_map[key] = date_crawl
-                        date_enter_db = date_crawl
-                    buffer.append(ModelRecord(date_enter_db=date_enter_db, **item))
-
-                    if len(buffer) >= self.buffer_size:
-                        self.cursor.executemany(self.insert_models_table, buffer)
-                        buffer.clear()
-            if len(buffer) > 0:
-                self.cursor.executemany(self.insert_models_table, buffer)
-                buffer.clear()
-            self.cursor.execute(self.update_status_table, (date_crawl, "models"))
-            self.conn.commit()
-        
-        logger.info("Init models table done.")
     
     def _init_datasets_table(self):
         try:
             self.cursor.execute(self.create_datasets_table)
+            self.cursor.execute(self.create_datasets_monthly_table)
+            self.cursor.execute(self.create_datasets_monthly_index)
+            self._create_indexes('datasets')
             self.cursor.execute(self.insert_status_table, ("datasets", None, None))
+            self._init_monthly('datasets')
+            self._create_triggers('datasets')
             self.conn.commit()
         except Exception:
             logger.exception("Exception when create datasets table.")
-            
-        date_enter_db_map = {}
-        buffer: list[DatasetRecord] = []
-        for path in sorted(self.data_dir.glob("????-??-??"))[1:]:
-            data_path = path / 'merged-datasets-info.jsonl'
-            logger.info(f"Processing {str(data_path)}...")
-            with jsonlines.open(data_path, 'r') as f:
-                for item in f:
-                    key = f"{item['org']}/{item['dataset_name']}"
-                    date_crawl = item['date_crawl']
-                    date_enter_db = date_enter_db_map.get(key)
-                    if date_enter_db is None:
-                        date_enter_db_map[key] = date_crawl
-                        date_enter_db = date_crawl
-                    buffer.append(DatasetRecord(date_enter_db=date_enter_db, **item))
-
-                    if len(buffer) >= self.buffer_size:
-                        self.cursor.executemany(self.insert_datasets_table, buffer)
-                        buffer.clear()
-            if len(buffer) > 0:
-                self.cursor.executemany(self.insert_datasets_table, buffer)
-                buffer.clear()
-            self.cursor.execute(self.update_status_table, (date_crawl, "datasets"))
-            self.conn.commit()
-        
-        logger.info("Init datasets table done.")
     
     def _init_hf_models_table(self):
-        pass
+        self._init_source_table('hf_models')
 
     def _init_hf_datasets_table(self):
-        pass
+        self._init_source_table('hf_datasets')
 
     def _init_ms_models_table(self):
-        pass
+        self._init_source_table('ms_models')
 
     def _init_ms_datasets_table(self):
-        pass
+        self._init_source_table('ms_datasets')
 
     def _init_odl_datasets_table(self):
-        pass
+        self._init_source_table('odl_datasets')
 
     def _init_baai_datasets_table(self):
-        pass
-    
+        self._init_source_table('baai_datasets')
+
+    def _init_source_table(self, table: str):
+        try:
+            for dimension in ('orgs', 'repos', 'modalities', 'lifecycles', 'entities'):
+                self.cursor.execute(getattr(self, f'create_{dimension}_table'))
+            self.cursor.execute(getattr(self, f'create_{table}_table'))
+            self.cursor.execute(self.create_source_fact_index.format(table=table))
+            self.cursor.execute(self.create_source_view.format(**self._source_view_parts(table)))
+            self.cursor.execute(
+                self.create_source_insert_trigger.format(**self._source_upsert_parts(table)))
+            self.cursor.execute(self.insert_status_table, (table, None, None))
+            self.conn.commit()
+        except Exception:
+            logger.exception(f"Exception when create {table} table.")
+
+    def _source_fields(self, table: str) -> tuple[str, list[str], bool]:
+        """Name field, measures and whether the records of `table` have a lifecycle."""
+        fields = self.source_tables[table][1].field_names()
+        name = 'model_name' if 'model_name' in fields else 'dataset_name'
+        measures = [f for f in fields if f not in self.dimension_fields]
+        return name, measures, 'lifecycle' in fields
+
+    def _source_view_parts(self, table: str) -> dict[str, str]:
+        name, measures, lifecycle = self._source_fields(table)
+        return {
+            'table': table,
+            'name': name,
+            'lifecycle': 'l.lifecycle, ' if lifecycle else '',
+            'measures': ', '.join(f'f.{m}' for m in measures),
+            'lifecycle_join': (
+                'left join lifecycles l on l.lifecycle_id = f.lifecycle_id\n' if lifecycle else ''),
+        }
+
+    def _source_upsert_parts(self, table: str) -> dict[str, str]:
+        name, measures, lifecycle = self._source_fields(table)
+        updated = (['lifecycle_id'] if lifecycle else []) + measures
+        return {
+            'table': table,
+            'name': name,
+            'lifecycle': 'lifecycle_id, ' if lifecycle else '',
+            'measures': ', '.join(measures),
+            'lifecycle_id': 'l.lifecycle_id, ' if lifecycle else '',
+            'staged_measures': ', '.join(f's.{m}' for m in measures),
+            'lifecycle_join': 'left join lifecycles l on l.lifecycle = s.lifecycle\n' if lifecycle else '',
+            'updates': ',\n    '.join(f'{c} = excluded.{c}' for c in updated),
+            'insert_lifecycle': (
+                'insert or ignore into lifecycles (lifecycle) '
+                'select new.lifecycle where new.lifecycle is not null;\n    ' if lifecycle else ''),
+            'new_lifecycle_id': (
+                '(select lifecycle_id from lifecycles where lifecycle = new.lifecycle), '
+                if lifecycle else ''),
+            'new_measures': ', '.join(f'new.{m}' for m in measures),
+        }
+
+    def _update_source_table(self, table: str, bulk: bool = False):
+        artifact, record_type = self.source_tables[table]
+        name, _, lifecycle = self._source_fields(table)
+        fields = record_type.field_names()
+        self.cursor.execute(f"create temp table if not exists staging_{table} ({', '.join(fields)})")
+        insert_staging = (
+            f"insert into staging_{table} ({', '.join(fields)}) "
+            f"values ({', '.join('?' * len(fields))})"
+        )
+        dimensions = [('orgs', 'org'), ('repos', 'repo'), ('modalities', 'modality')]
+        if lifecycle:
+            dimensions.append(('lifecycles', 'lifecycle'))
+        upsert = self.upsert_source_table.format(**self._source_upsert_parts(table))
+        buffer_size = max(self.buffer_size, self.bulk_buffer_size) if bulk else self.buffer_size
+        paths = self._pending_paths(table, artifact)
+        if not paths:
+            return
+
+        for path in paths:
+            self.cursor.execute(f"delete from staging_{table}")
+            self._stage(insert_staging, path / artifact, record_type, buffer_size)
+            for dimension, column in dimensions:
+                self.cursor.execute(self.insert_dimension_table.format(
+                    dimension=dimension, column=column, table=table))
+            self.cursor.execute(self.upsert_entities_table.format(table=table, name=name))
+            self.cursor.execute(upsert)
+            self.cursor.execute(self.update_status_table, (path.name, path.name, table))
+            if not bulk:
+                self.conn.commit()
+        self.cursor.execute(f"delete from staging_{table}")
+        if not bulk:
+            self.conn.commit()
+
+        logger.info(f"Update {table} table done, last snapshot: {paths[-1].name}.")
+
     def _init_status_table(self):
         pass
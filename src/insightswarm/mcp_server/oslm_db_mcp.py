@@ -1,14 +1,274 @@
+import base64
+import hashlib
 import json
+import os
+import re
 import sqlite3
+import threading
+import time
 import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from mcp.server.fastmcp import FastMCP
 
+try:
+    from oslm_crawler.codec import dumps
+except ImportError:
+    def dumps(obj, pretty: bool = False) -> str:
+        return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False)
+
 
 DB_FILE = Path(__file__).parents[3] / "data/oslm.db"
+# Rows returned by one `query_database` call, the next ones are fetched with its page token.
+MAX_ROWS = 200
+# Seconds a query may run, checked by the progress handler every `PROGRESS_STEPS` VM steps.
+QUERY_TIMEOUT = 10.0
+PROGRESS_STEPS = 10000
+POOL_SIZE = 4
+# Total size of the encoded results kept by the query result cache.
+CACHE_BYTES = 32 * 1024 * 1024
 mcp = FastMCP("oslm-database")
 
 
+def _database_version(db_path: Path) -> tuple:
+    """Version stamp of the database, which changes with every commit.
+
+    Every commit, including the ones that update the `status` table, bumps the change counter
+    in the header of the database file (rollback journal) or grows the WAL file, so the version
+    is read from the file header and `stat` without opening a connection.
+    """
+    version = []
+    for path in (db_path, db_path.with_name(db_path.name + '-wal')):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            version.append(None)
+            continue
+        version.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    with open(db_path, 'rb') as f:
+        # File change counter of the database header.
+        f.seek(24)
+        version.append(f.read(4))
+    return tuple(version)
+
+
+class _SchemaCache:
+    """Rendered schema of the database, rendered again only after the database changed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.version = None
+        self.schema = None
+
+    def get(self, render) -> str:
+        version = _database_version(self.path)
+        if self.schema is None or version != self.version:
+            self.schema = render()
+            self.version = version
+        return self.schema
+
+
+_schema_cache = _SchemaCache(DB_FILE)
+
+
+class _ConnectionPool:
+    """Read-only connections to the database, reused across queries.
+
+    The connections are opened with `mode=ro` and `query_only`, so that an agent cannot modify
+    the database, and in autocommit mode: a connection never holds a transaction, and with it
+    a lock that blocks the updates of the database, between two queries. They are dropped when
+    the database file is replaced (e.g. rebuilt by `insightswarm db --init`), since they would
+    keep reading the old file.
+    """
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self.size = size
+        self.idle: list[sqlite3.Connection] = []
+        self.inode = None
+        self.lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+
+    def _close_idle(self):
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+
+    @contextmanager
+    def connection(self):
+        with self.lock:
+            inode = os.stat(self.path).st_ino
+            if inode != self.inode:
+                self._close_idle()
+                self.inode = inode
+            conn = self.idle.pop() if self.idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            # E.g. a `BEGIN` sent by the agent.
+            if conn.in_transaction:
+                conn.rollback()
+            with self.lock:
+                if inode == self.inode and len(self.idle) < self.size:
+                    self.idle.append(conn)
+                else:
+                    conn.close()
+
+
+_pool = _ConnectionPool(DB_FILE, POOL_SIZE)
+
+
+# String literals, quoted identifiers and line comments, whose whitespace is kept by
+# `_normalize_sql`.
+_SQL_QUOTED = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]|--[^\n]*\n?)""")
+
+
+def _normalize_sql(sql_query: str) -> str:
+    """Collapse the whitespace outside of quotes and drop the trailing semicolons, so that
+    queries differing only in layout share a cache entry. The case is kept, since it names
+    the columns of the result."""
+    parts = _SQL_QUOTED.split(sql_query)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', parts[i])
+    return ''.join(parts).strip(' ;')
+
+
+# Functions whose result is not determined by the database: the queries using them, or
+# `'now'`, are not cached.
+_SQL_NONDETERMINISTIC = re.compile(
+    r"\b(?:random|randomblob|changes|total_changes|last_insert_rowid)\s*\("
+    r"|\b(?:date|time|datetime|julianday|unixepoch)\s*\(\s*\)"
+    r"|\bcurrent_(?:date|time|timestamp)\b|'now'",
+    re.IGNORECASE,
+)
+
+
+def _is_cacheable(sql_query: str) -> bool:
+    return _SQL_NONDETERMINISTIC.search(sql_query) is None
+
+
+class _ResultCache:
+    """Encoded results of recent queries, keyed by database version, normalized query and
+    offset, evicted least recently used first once their UTF-8 size exceeds `max_bytes`."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Result and its size in bytes.
+        self.results: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> str | None:
+        with self.lock:
+            entry = self.results.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.results.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, result: str):
+        size = len(result.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.results:
+                self.size -= self.results.pop(key)[1]
+            self.results[key] = (result, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.results.popitem(last=False)
+                self.size -= evicted
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.results),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_result_cache = _ResultCache(CACHE_BYTES)
+
+
+class _QueryTimeout(Exception):
+    pass
+
+
+def _execute(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    offset: int,
+    limit: int,
+    timeout: float,
+) -> tuple[list[str] | None, list[tuple]]:
+    """Run `sql_query` and fetch `limit` rows after the first `offset` ones, without
+    materializing the others. Return the column names (None if the statement returns no
+    data) and the rows. Raise `_QueryTimeout` if it runs longer than `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    # A non-zero return value interrupts the statement.
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql_query)
+        if cursor.description is None:
+            return None, []
+        columns = [column[0] for column in cursor.description]
+        while offset > 0:
+            skipped = cursor.fetchmany(min(offset, 1000))
+            if not skipped:
+                break
+            offset -= len(skipped)
+        return columns, cursor.fetchmany(limit)
+    except sqlite3.OperationalError:
+        if time.monotonic() > deadline:
+            raise _QueryTimeout()
+        raise
+    finally:
+        # Closing the cursor resets the statement, which ends its read transaction.
+        cursor.close()
+        conn.set_progress_handler(None, 0)
+
+
+# Pages are offset-based, not cursor-based: each page runs the query again and skips the rows of
+# the previous ones, which costs O(offset). The token carries the version of the database the
+# first page was read from, and is rejected once the database changed, since the rows could then
+# shift between pages.
+def _version_tag(version: tuple) -> str:
+    return hashlib.sha1(repr(version).encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_page_token(sql_query: str, offset: int, version: tuple) -> str:
+    token = dumps({"query": sql_query, "offset": offset, "version": _version_tag(version)})
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def _decode_page_token(page_token: str) -> tuple[str, int, str]:
+    try:
+        token = json.loads(base64.urlsafe_b64decode(page_token.encode("ascii")))
+        return token["query"], int(token["offset"]), token["version"]
+    except Exception:
+        raise ValueError(f"Invalid page token: {page_token}")
+
+
 @mcp.tool()
 def get_database_schema() -> str:
     """
@@ -18,6 +278,14 @@ def get_database_schema() -> str:
     Returns:
         str: 一个Markdown格式的字符串，详细描述了数据库的模式。
     """
+    try:
+        return _schema_cache.get(_render_schema)
+    except Exception as e:
+        err = traceback.format_exc()
+        return f"Error getting database schema information: {e}.\nDetails traceback: {err}"
+
+
+def _render_schema() -> str:
     schema_description = """
 # OSLM 数据库模式信息
 
@@ -72,103 +340,160 @@ def get_database_schema() -> str:
 ### 3. `status` 表
 记录了 `models` 和 `datasets` 表的首次爬取数据的月份和最新爬取数据的月份。
 """
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT DISTINCT org FROM models")
-            models_orgs = [row[0] for row in cursor.fetchall()]
-            models_orgs = ", ".join(f'`{item}`' for item in models_orgs) if models_orgs else "null"
-            
-            cursor.execute("SELECT DISTINCT modality FROM models")
-            models_modality = [row[0] for row in cursor.fetchall()]
-            models_modality = ", ".join(f'`{item}`' for item in models_modality) if models_modality else "null"
-            
-            cursor.execute("SELECT DISTINCT date_crawl FROM models")
-            models_crawl_date = [row[0] for row in cursor.fetchall()]
-            models_crawl_date = ", ".join(f'`{item}`' for item in models_crawl_date) if models_crawl_date else "null"
-            
-            cursor.execute("SELECT first_date_crawl, last_date_crawl FROM status WHERE table_name = 'models'")
-            first_date, last_date = cursor.fetchone()
-            models_first_date = first_date if first_date else "null"
-            models_recent_date = last_date if last_date else "null"
-            
-            cursor.execute("SELECT DISTINCT org FROM datasets")
-            datasets_orgs = [row[0] for row in cursor.fetchall()]
-            datasets_orgs = ", ".join(f'`{item}`' for item in datasets_orgs) if datasets_orgs else "null"
-            
-            cursor.execute("SELECT DISTINCT modality FROM datasets")
-            datasets_modality = [row[0] for row in cursor.fetchall()]
-            datasets_modality = ", ".join(f'`{item}`' for item in datasets_modality) if datasets_modality else "null"
-            
-            cursor.execute("SELECT DISTINCT lifecycle FROM datasets")
-            datasets_lifecycle = [row[0] for row in cursor.fetchall()]
-            datasets_lifecycle = ", ".join(f'`{item}`' for item in datasets_lifecycle) if datasets_lifecycle else "null"
-            
-            cursor.execute("SELECT DISTINCT date_crawl FROM datasets")
-            datasets_crawl_date = [row[0] for row in cursor.fetchall()]
-            datasets_crawl_date = ", ".join(f'`{item}`' for item in datasets_crawl_date) if datasets_crawl_date else "null"
-            
-            cursor.execute("SELECT first_date_crawl, last_date_crawl FROM status WHERE table_name = 'datasets'")
-            first_date, last_date = cursor.fetchone()
-            datasets_first_date = first_date if first_date else "null"
-            datasets_recent_date = last_date if last_date else "null"
-
-            return schema_description.format(
-                models_orgs=models_orgs,
-                models_modality=models_modality,
-                models_crawl_date=models_crawl_date,
-                models_first_date=models_first_date,
-                models_recent_date=models_recent_date,
-                datasets_orgs=datasets_orgs,
-                datasets_modality=datasets_modality,
-                datasets_lifecycle=datasets_lifecycle,
-                datasets_crawl_date=datasets_crawl_date,
-                datasets_first_date=datasets_first_date,
-                datasets_recent_date=datasets_recent_date,
-            )
-    except Exception as e:
-        err = traceback.format_exc()
-        return f"Error getting database schema information: {e}.\nDetails traceback: {err}"
+    # Databases built before the aggregate tables or the per-source views were added are
+    # described without them.
+    monthly_description = """
+### {n}. `models_monthly` 表
+`models` 表按 (`org`, `modality`, `date_crawl`) 分组的月度汇总, 列名为 `org`, `modality`, `date_crawl`, 
+`num_models` (模型数量), 以及 `downloads_last_month`, `likes`, `community`, `descendants` 的总和。
+
+### {m}. `datasets_monthly` 表
+`datasets` 表按 (`org`, `modality`, `lifecycle`, `date_crawl`) 分组的月度汇总, 列名为 `org`, `modality`, 
+`lifecycle`, `date_crawl`, `num_datasets` (数据集数量), 以及 `downloads_last_month`, `likes`, `community`, 
+`dataset_usage` 的总和。
+
+按机构、模态、生命周期或月份统计数量和总量时, 请优先查询 `models_monthly` 和 `datasets_monthly` 表, 
+只有需要单个模型或数据集的信息时才查询 `models` 和 `datasets` 表。
+"""
+    views_description = """
+### {n}. 各数据源的明细视图
+`hf_models_info`, `hf_datasets_info` (HuggingFace), `ms_models_info`, `ms_datasets_info` (ModelScope), 
+`odl_datasets_info` (OpenDataLab) 和 `baai_datasets_info` (BAAIData) 存储了每个数据源每月爬取的原始数据, 
+列名与 `models` / `datasets` 表相同, 另有 `total_downloads` (累计下载量, ModelScope/OpenDataLab/BAAIData) 和 `link` (链接)。
+只有需要区分数据源时才查询这些视图。
+"""
+    with sqlite3.connect(DB_FILE) as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+        names = {row[0] for row in cursor.fetchall()}
+        monthly = 'models_monthly' in names and 'datasets_monthly' in names
+        models_table = 'models_monthly' if monthly else 'models'
+        datasets_table = 'datasets_monthly' if monthly else 'datasets'
+        n = 4
+        if monthly:
+            schema_description += monthly_description.format(n=n, m=n + 1)
+            n += 2
+        if 'hf_models_info' in names:
+            schema_description += views_description.format(n=n)
+        
+        cursor.execute(f"SELECT DISTINCT org FROM {models_table} ORDER BY org")
+        models_orgs = [row[0] for row in cursor.fetchall()]
+        models_orgs = ", ".join(f'`{item}`' for item in models_orgs) if models_orgs else "null"
+        
+        cursor.execute(f"SELECT DISTINCT modality FROM {models_table} ORDER BY modality")
+        models_modality = [row[0] for row in cursor.fetchall()]
+        models_modality = ", ".join(f'`{item}`' for item in models_modality) if models_modality else "null"
+        
+        cursor.execute(f"SELECT DISTINCT date_crawl FROM {models_table} ORDER BY date_crawl")
+        models_crawl_date = [row[0] for row in cursor.fetchall()]
+        models_crawl_date = ", ".join(f'`{item}`' for item in models_crawl_date) if models_crawl_date else "null"
+        
+        cursor.execute("SELECT first_date_crawl, last_date_crawl FROM status WHERE table_name = 'models'")
+        first_date, last_date = cursor.fetchone()
+        models_first_date = first_date if first_date else "null"
+        models_recent_date = last_date if last_date else "null"
+        
+        cursor.execute(f"SELECT DISTINCT org FROM {datasets_table} ORDER BY org")
+        datasets_orgs = [row[0] for row in cursor.fetchall()]
+        datasets_orgs = ", ".join(f'`{item}`' for item in datasets_orgs) if datasets_orgs else "null"
+        
+        cursor.execute(f"SELECT DISTINCT modality FROM {datasets_table} ORDER BY modality")
+        datasets_modality = [row[0] for row in cursor.fetchall()]
+        datasets_modality = ", ".join(f'`{item}`' for item in datasets_modality) if datasets_modality else "null"
+        
+        cursor.execute(f"SELECT DISTINCT lifecycle FROM {datasets_table} ORDER BY lifecycle")
+        datasets_lifecycle = [row[0] for row in cursor.fetchall()]
+        datasets_lifecycle = ", ".join(f'`{item}`' for item in datasets_lifecycle) if datasets_lifecycle else "null"
+        
+        cursor.execute(f"SELECT DISTINCT date_crawl FROM {datasets_table} ORDER BY date_crawl")
+        datasets_crawl_date = [row[0] for row in cursor.fetchall()]
+        datasets_crawl_date = ", ".join(f'`{item}`' for item in datasets_crawl_date) if datasets_crawl_date else "null"
+        
+        cursor.execute("SELECT first_date_crawl, last_date_crawl FROM status WHERE table_name = 'datasets'")
+        first_date, last_date = cursor.fetchone()
+        datasets_first_date = first_date if first_date else "null"
+        datasets_recent_date = last_date if last_date else "null"
+
+        return schema_description.format(
+            models_orgs=models_orgs,
+            models_modality=models_modality,
+            models_crawl_date=models_crawl_date,
+            models_first_date=models_first_date,
+            models_recent_date=models_recent_date,
+            datasets_orgs=datasets_orgs,
+            datasets_modality=datasets_modality,
+            datasets_lifecycle=datasets_lifecycle,
+            datasets_crawl_date=datasets_crawl_date,
+            datasets_first_date=datasets_first_date,
+            datasets_recent_date=datasets_recent_date,
+        )
 
 
 @mcp.tool()
-def query_database(sql_query: str) -> str:
+def query_database(sql_query: str = "", page_token: str | None = None) -> str:
     """
-    对 oslm.db 数据库执行一个SQL查询语句并返回结果。
+    对 oslm.db 数据库执行一个只读的SQL查询语句并返回结果。
     你应该首先使用 `get_database_schema` 来理解表结构，然后再构建你的SQL查询。
-    请确保你的查询语句是有效的SQLite语法。
+    请确保你的查询语句是有效的SQLite语法。每次返回的行数和查询的时间都有上限,
+    请尽量使用聚合、过滤和 LIMIT 减少返回的行数。
 
     Args:
         sql_query (str): 要执行的SQLite查询语句。
+        page_token (str): 上一次结果中的 `next_page_token`, 用于获取下一页结果。给出时忽略 `sql_query`。
+            分页基于偏移量: 每一页都会重新执行查询并跳过之前的行, 请用 ORDER BY 保证行的顺序稳定。
+            数据库更新后之前的令牌失效, 需要重新执行查询。
 
     Returns:
-        str: 一个JSON格式的字符串，其中包含了查询结果。如果查询成功但没有返回数据（例如UPDATE或INSERT），则返回一个成功的消息。如果发生错误，则返回错误信息。
+        str: 一个JSON格式的字符串，包含列名 `columns` 和按列名顺序排列的行 `rows`。如果还有更多的行, 
+        `next_page_token` 为获取下一页的令牌。如果查询没有返回数据，则返回一个成功的消息。如果发生错误，则返回错误信息。
     """
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            # Enables each row of data to be accessed by column name like a dictionary.
-            conn.row_factory = sqlite3.Row
-            
-            cursor = conn.cursor()
-            cursor.execute(sql_query)
-            rows = cursor.fetchall()
-
-            if rows:
-                result = [dict(row) for row in rows]
-                return json.dumps(result, indent=2, ensure_ascii=False)
-            else:
-                conn.commit()
-                return json.dumps({
-                    "status": "success",
-                    "message": "Query executed successfully, no data returned.",
-                    "rows_affected": cursor.rowcount
+        offset = 0
+        version = _database_version(DB_FILE)
+        if page_token:
+            sql_query, offset, token_version = _decode_page_token(page_token)
+            if token_version != _version_tag(version):
+                return dumps({
+                    "error": "The database changed since the first page was read, "
+                             "please run the query again without page_token.",
+                    "query": sql_query,
                 })
+        if not _is_cacheable(sql_query):
+            return _run_query(sql_query, offset, version)
+        # Repeated queries are answered from the cache until the database changes.
+        key = (version, _normalize_sql(sql_query), offset)
+        result = _result_cache.get(key)
+        if result is None:
+            result = _run_query(sql_query, offset, version)
+            _result_cache.put(key, result)
+        return result
 
+    except _QueryTimeout:
+        return dumps({
+            "error": f"Query exceeded the time budget of {QUERY_TIMEOUT} seconds, "
+                     "please narrow it down with filters, aggregates or LIMIT.",
+            "query": sql_query,
+        })
     except sqlite3.Error as e:
-        return json.dumps({"error": f"Database query error: {e}", "query": sql_query}, ensure_ascii=False)
+        return dumps({"error": f"Database query error: {e}", "query": sql_query})
     except Exception as e:
-        return json.dumps({"error": f"Unknown error while executing query: {e}", "query": sql_query}, ensure_ascii=False)
+        return dumps({"error": f"Unknown error while executing query: {e}", "query": sql_query})
+
+
+def _run_query(sql_query: str, offset: int, version: tuple) -> str:
+    with _pool.connection() as conn:
+        columns, rows = _execute(conn, sql_query, offset, MAX_ROWS + 1, QUERY_TIMEOUT)
+
+    if columns is None:
+        return dumps({
+            "status": "success",
+            "message": "Query executed successfully, no data returned.",
+        })
+    result = {"columns": columns, "rows": [list(row) for row in rows[:MAX_ROWS]]}
+    if len(rows) > MAX_ROWS:
+        result["next_page_token"] = _encode_page_token(sql_query, offset + MAX_ROWS, version)
+    return dumps(result)
 
 
 def start():
@@ -0,0 +1,158 @@
+import json
+import sqlite3
+import pytest
+
+pytest.importorskip('mcp.server.fastmcp')
+from insightswarm.mcp_server import oslm_db_mcp  # noqa: E402
+
+NUM_MODELS = 450
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    db_path = tmp_path / 'oslm.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("create table models (model_name text, downloads_last_month integer)")
+        conn.executemany("insert into models values (?, ?)",
+                         [(f'model-{i}', i) for i in range(NUM_MODELS)])
+    conn.close()
+    monkeypatch.setattr(oslm_db_mcp, 'DB_FILE', db_path)
+    monkeypatch.setattr(oslm_db_mcp, '_pool', oslm_db_mcp._ConnectionPool(db_path, 2))
+    monkeypatch.setattr(oslm_db_mcp, '_result_cache', oslm_db_mcp._ResultCache(1 << 20))
+    return db_path
+
+
+def query(*args, **kwargs) -> dict:
+    return json.loads(oslm_db_mcp.query_database(*args, **kwargs))
+
+
+def test_query_pages(db_path):
+    sql = "select model_name, downloads_last_month from models order by downloads_last_month"
+    res = query(sql)
+    assert res['columns'] == ['model_name', 'downloads_last_month']
+    rows, pages = res['rows'], 1
+    while 'next_page_token' in res:
+        res = query(page_token=res['next_page_token'])
+        assert len(res['rows']) <= oslm_db_mcp.MAX_ROWS
+        rows += res['rows']
+        pages += 1
+    assert rows == [[f'model-{i}', i] for i in range(NUM_MODELS)]
+    assert pages == -(-NUM_MODELS // oslm_db_mcp.MAX_ROWS)
+
+    assert query("select count(*) as n from models") == {'columns': ['n'], 'rows': [[NUM_MODELS]]}
+    assert 'Invalid page token' in query(page_token='not-a-token')['error']
+
+
+def test_query_stale_page_token(db_path):
+    res = query("select model_name from models order by model_name")
+    token = res['next_page_token']
+    assert 'error' not in query(page_token=token)
+
+    # Once the database changed, the rows of the next pages could shift: the token is rejected.
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("insert into models values ('model-a', 0)")
+    conn.close()
+    assert 'database changed' in query(page_token=token)['error']
+    assert 'next_page_token' in query("select model_name from models order by model_name")
+
+
+def test_query_timeout(db_path, monkeypatch):
+    monkeypatch.setattr(oslm_db_mcp, 'QUERY_TIMEOUT', 0.1)
+    res = query("with recursive r(i) as (select 1 union all select i + 1 from r) "
+                "select count(*) from r")
+    assert 'time budget' in res['error']
+    # The connection is usable afterwards.
+    assert query("select 1 as x") == {'columns': ['x'], 'rows': [[1]]}
+
+
+def test_query_rejects_writes(db_path):
+    assert 'readonly' in query("delete from models")['error']
+    assert 'error' not in query("begin")
+    assert query("select count(*) as n from models")['rows'] == [[NUM_MODELS]]
+    assert not any(conn.in_transaction for conn in oslm_db_mcp._pool.idle)
+
+    # The pooled connections hold no lock that would block the updates of the database.
+    conn = sqlite3.connect(db_path, timeout=0.1)
+    with conn:
+        conn.execute("delete from models where downloads_last_month >= 100")
+    conn.close()
+    assert query("select count(*) as n from models")['rows'] == [[100]]
+
+
+def test_normalize_sql():
+    normalize = oslm_db_mcp._normalize_sql
+    assert normalize("select *\n\tfrom  models ;") == "select * from models"
+    # Literals and quoted identifiers are kept verbatim.
+    assert normalize("select 'a  b', \"x  y\" from [t  1] where c = 'it''s  ok'") == \
+        "select 'a  b', \"x  y\" from [t  1] where c = 'it''s  ok'"
+    assert normalize("select 'a  b'") != normalize("select 'a b'")
+    # A line comment still ends before the next line.
+    assert normalize("select 1 -- one\n  , 2") == "select 1 -- one\n , 2"
+
+
+def test_result_cache():
+    cache = oslm_db_mcp._ResultCache(10)
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    assert cache.get('a') == 'aaaa'
+    # 'b' is the least recently used.
+    cache.put('c', 'cccc')
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('aaaa', 'cccc')
+    assert cache.size == 8
+
+    # Replacing a result accounts for its new size, in UTF-8 bytes.
+    cache.put('a', 'é')
+    assert cache.size == 6
+    cache.put('d', 'dddd')
+    assert cache.size == 10
+    assert cache.size == sum(size for _, size in cache.results.values())
+
+    # A result larger than the cache is not stored and evicts nothing.
+    cache.put('e', 'e' * 11)
+    assert cache.get('e') is None
+    assert list(cache.results) == ['c', 'a', 'd']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 2)
+
+
+def test_nondeterministic_query_not_cached(db_path):
+    for sql in ["select random() as x", "select date('now') as x", "select current_timestamp as x",
+                "select datetime() as x", "select RandomBlob(4) is not null as x"]:
+        query(sql)
+        query(sql)
+    assert not oslm_db_mcp._result_cache.results
+
+    assert oslm_db_mcp._is_cacheable("select date(date_crawl) as d from models where org = 'Meta'")
+    query("select count(*) as n from models")
+    query("select count(*) as n from models")
+    assert oslm_db_mcp._result_cache.hits == 1
+
+
+def test_schema_without_monthly_tables(tmp_path, monkeypatch):
+    # A database built before the aggregate tables and the per-source views were added.
+    db_path = tmp_path / 'oslm.db'
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("create table models (org text, modality text, date_crawl text)")
+        conn.execute("create table datasets (org text, modality text, lifecycle text, date_crawl text)")
+        conn.execute("create table status (table_name text, first_date_crawl text, last_date_crawl text)")
+        conn.execute("insert into models values ('BAAI', 'Language', '2025-02-07')")
+        conn.execute("insert into datasets values ('Meta', 'Vision', 'Evaluation', '2025-02-07')")
+        conn.executemany("insert into status values (?, '2025-02-07', '2025-02-07')",
+                         [('models',), ('datasets',)])
+    monkeypatch.setattr(oslm_db_mcp, 'DB_FILE', db_path)
+    monkeypatch.setattr(oslm_db_mcp, '_schema_cache', oslm_db_mcp._SchemaCache(db_path))
+    schema = oslm_db_mcp.get_database_schema()
+    assert 'Error' not in schema
+    assert '`BAAI`' in schema and '`Evaluation`' in schema
+    assert 'models_monthly' not in schema and 'hf_models_info' not in schema
+
+    with conn:
+        conn.execute("create table models_monthly as select org, modality, date_crawl from models")
+        conn.execute("create table datasets_monthly as select * from datasets")
+    conn.close()
+    schema = oslm_db_mcp._render_schema()
+    assert '### 4. `models_monthly`' in schema and '### 5. `datasets_monthly`' in schema
+    assert 'hf_models_info' not in schema
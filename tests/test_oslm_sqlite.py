@@ -0,0 +1,257 @@
+import sqlite3
+import pytest
+from oslm_crawler.codec import open_jsonl
+from insightswarm.database.oslm_sqlite import OSLMSqliteController
+
+# The first snapshot is the baseline the database skips.
+DATES = ['2025-01-07', '2025-02-07', '2025-03-07', '2025-04-07']
+ORGS = ['BAAI', 'Meta', 'Google']
+MODALITIES = ['Language', 'Vision', None]
+LIFECYCLES = ['Pre-training', 'Fine-tuning', 'Evaluation']
+SOURCE_FILES = {
+    'HuggingFace/processed-models-info.jsonl': 'model',
+    'HuggingFace/processed-datasets-info.jsonl': 'dataset',
+    'ModelScope/processed-models-info.jsonl': 'model',
+    'ModelScope/processed-datasets-info.jsonl': 'dataset',
+    'OpenDataLab/processed-datasets-info.jsonl': 'dataset',
+    'BAAIData/processed-datasets-info.jsonl': 'dataset',
+}
+
+
+def model(i, month, date):
+    return {'org': ORGS[i % 3], 'repo': f'repo-{i % 2}', 'model_name': f'model-{i}',
+            'modality': MODALITIES[i % 3], 'downloads_last_month': 10 * i + month,
+            'total_downloads': 100 * i + month, 'likes': i + month, 'community': i % 2,
+            'descendants': month, 'date_crawl': date, 'link': f'https://x/model-{i}'}
+
+
+def dataset(i, month, date):
+    return {'org': ORGS[i % 3], 'repo': f'repo-{i % 2}', 'dataset_name': f'dataset-{i}',
+            'modality': MODALITIES[i % 3], 'lifecycle': LIFECYCLES[i % 3],
+            'downloads_last_month': 10 * i + month, 'total_downloads': 100 * i + month,
+            'likes': i + month, 'community': i % 2, 'dataset_usage': month, 'date_crawl': date}
+
+
+def write_snapshot(data_dir, month):
+    # Every month the same repos are crawled again and one model and dataset are published.
+    date = DATES[month]
+    records = {
+        'model': [model(i, month, date) for i in range(4 + month)],
+        'dataset': [dataset(i, month, date) for i in range(3 + month)],
+    }
+    (data_dir / date).mkdir()
+    for kind in ('model', 'dataset'):
+        with open_jsonl(data_dir / date / f'merged-{kind}s-info.jsonl', 'w') as f:
+            f.write_all(records[kind])
+    for artifact, kind in SOURCE_FILES.items():
+        (data_dir / date / artifact).parent.mkdir(exist_ok=True)
+        with open_jsonl(data_dir / date / artifact, 'w') as f:
+            f.write_all(records[kind])
+
+
+def build(data_dir, db_path, bulk=False):
+    controller = OSLMSqliteController(data_dir, db_path)
+    controller.init(bulk)
+    controller.conn.close()
+
+
+def dump(db_path):
+    # Entity ids depend on the loading order, the views show the facts by name.
+    conn = sqlite3.connect(db_path)
+    names = [
+        'models', 'datasets', 'status', 'models_monthly', 'datasets_monthly',
+        *(f'{table}_info' for table in OSLMSqliteController.source_tables),
+    ]
+    res = {name: sorted(conn.execute(f"select * from {name}").fetchall(), key=repr) for name in names}
+    conn.close()
+    return res
+
+
+def schema(db_path):
+    conn = sqlite3.connect(db_path)
+    res = sorted(conn.execute("select type, name from sqlite_master where name not like 'sqlite_%'"))
+    conn.close()
+    return res
+
+
+def test_failed_bulk_load_rolls_back(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for month in range(3):
+        write_snapshot(data_dir, month)
+    db_path = tmp_path / 'oslm.db'
+    build(data_dir, db_path)
+    expected, expected_schema = dump(db_path), schema(db_path)
+
+    write_snapshot(data_dir, 3)
+    controller = OSLMSqliteController(data_dir, db_path)
+
+    def fail(table):
+        raise RuntimeError(f"refresh {table}")
+
+    monkeypatch.setattr(controller, '_refresh_monthly', fail)
+    with pytest.raises(RuntimeError):
+        controller.update(bulk=True)
+    assert controller.cursor.execute("pragma synchronous").fetchone()[0] == 2
+    assert controller.cursor.execute("pragma journal_mode").fetchone()[0] == 'delete'
+    controller.conn.close()
+
+    # The upserted rows, dropped indexes and triggers are all rolled back.
+    assert dump(db_path) == expected
+    assert schema(db_path) == expected_schema
+
+
+def monthly_mismatches(db_path):
+    conn = sqlite3.connect(db_path)
+    res = []
+    for table, (groups, count, measures) in OSLMSqliteController.monthly_columns.items():
+        columns = ', '.join(groups + [count] + measures)
+        aggregates = ', '.join(groups + ['count(*)'] + [f'ifnull(sum({m}), 0)' for m in measures])
+        res += conn.execute(f"""
+            select {columns} from {table}_monthly
+            except select {aggregates} from {table} group by {', '.join(groups)}
+        """).fetchall()
+        res += conn.execute(f"""
+            select {aggregates} from {table} group by {', '.join(groups)}
+            except select {columns} from {table}_monthly
+        """).fetchall()
+    conn.close()
+    return res
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for month in range(len(DATES)):
+        write_snapshot(data_dir, month)
+    return data_dir
+
+
+def test_incremental_update(tmp_path, data_dir):
+    build(data_dir, tmp_path / 'full.db')
+    expected = dump(tmp_path / 'full.db')
+    assert [row[1:] for row in expected['status']] == [('2025-02-07', '2025-04-07')] * 8
+    # A model is first crawled in its month, date_enter_db keeps it over the later crawls.
+    models = {(row[2], row[8]): row[9] for row in expected['models']}
+    assert models['model-4', '2025-04-07'] == '2025-02-07'
+    assert models['model-6', '2025-04-07'] == '2025-04-07'
+
+    # Catching up one snapshot at a time gives the same tables as loading them all at once.
+    incremental_dir = tmp_path / 'incremental'
+    incremental_dir.mkdir()
+    db_path = tmp_path / 'incremental.db'
+    for month in range(len(DATES)):
+        write_snapshot(incremental_dir, month)
+        build(incremental_dir, db_path)
+    assert dump(db_path) == expected
+
+    # Updating an up-to-date database changes nothing.
+    build(data_dir, tmp_path / 'full.db')
+    assert dump(tmp_path / 'full.db') == expected
+
+
+def test_bulk_load(tmp_path, data_dir):
+    build(data_dir, tmp_path / 'default.db')
+    build(data_dir, tmp_path / 'bulk.db', bulk=True)
+    assert dump(tmp_path / 'bulk.db') == dump(tmp_path / 'default.db')
+    assert schema(tmp_path / 'bulk.db') == schema(tmp_path / 'default.db')
+    assert monthly_mismatches(tmp_path / 'bulk.db') == []
+
+    # A bulk catch-up on top of a default load as well.
+    (tmp_path / 'partial').mkdir()
+    for month in range(2):
+        write_snapshot(tmp_path / 'partial', month)
+    build(tmp_path / 'partial', tmp_path / 'partial.db')
+    for month in range(2, len(DATES)):
+        write_snapshot(tmp_path / 'partial', month)
+    build(tmp_path / 'partial', tmp_path / 'partial.db', bulk=True)
+    assert dump(tmp_path / 'partial.db') == dump(tmp_path / 'default.db')
+
+
+def test_monthly_aggregates(tmp_path, data_dir):
+    db_path = tmp_path / 'oslm.db'
+    build(data_dir, db_path)
+    assert monthly_mismatches(db_path) == []
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("""
+            insert into models (org, repo, model_name, modality, downloads_last_month, likes,
+                                community, descendants, date_crawl)
+            values ('NewOrg', 'repo-0', 'new', 'Speech', 5, 1, 0, 0, '2025-04-07')
+        """)
+        conn.execute("update models set downloads_last_month = downloads_last_month + 7, "
+                     "modality = 'Vision' where model_name = 'model-1'")
+        conn.execute("update datasets set org = 'Meta', lifecycle = 'Preference' "
+                     "where dataset_name = 'dataset-0'")
+        conn.execute("delete from models where model_name = 'model-0'")
+        conn.execute("delete from datasets where org = 'Google'")
+    assert conn.execute("select count(*) from models_monthly where org = 'NewOrg'").fetchone()[0] == 1
+    assert conn.execute("select count(*) from datasets_monthly where org = 'Google'").fetchone()[0] == 0
+    conn.close()
+    assert monthly_mismatches(db_path) == []
+
+
+def test_monthly_null_measures(tmp_path, data_dir):
+    db_path = tmp_path / 'oslm.db'
+    build(data_dir, db_path)
+
+    # A missing measure counts as 0, in a new group as in an existing one.
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("""
+            insert into models (org, repo, model_name, modality, downloads_last_month, likes,
+                                community, descendants, date_crawl)
+            values (?, 'repo-0', ?, 'Language', 5, null, 1, null, '2025-04-07')
+        """, [('NewOrg', 'new-0'), ('NewOrg', 'new-1'), ('BAAI', 'new-2')])
+        conn.execute("update models set likes = 3 where model_name = 'new-1'")
+        conn.execute("update datasets set community = null, dataset_usage = null "
+                     "where dataset_name = 'dataset-0'")
+    assert conn.execute("""
+        select num_models, downloads_last_month, likes, community, descendants
+        from models_monthly where org = 'NewOrg'
+    """).fetchall() == [(2, 10, 3, 2, 0)]
+    with conn:
+        conn.execute("delete from models where model_name = 'new-1'")
+        conn.execute("delete from datasets where dataset_name = 'dataset-3'")
+    conn.close()
+    assert monthly_mismatches(db_path) == []
+
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_missing_merged_artifact(tmp_path, data_dir, bulk):
+    build(data_dir, tmp_path / 'full.db')
+    expected = dump(tmp_path / 'full.db')
+
+    # A snapshot crawled but not merged yet stops the load of models before it.
+    merged = data_dir / DATES[2] / 'merged-models-info.jsonl'
+    merged.rename(tmp_path / merged.name)
+    db_path = tmp_path / 'oslm.db'
+    build(data_dir, db_path, bulk)
+    status = dict((row[0], row[2]) for row in dump(db_path)['status'])
+    assert status['models'] == DATES[1]
+    assert status['datasets'] == DATES[3]
+
+    # It is loaded, with the later ones, once merged.
+    (tmp_path / merged.name).rename(merged)
+    build(data_dir, db_path, bulk)
+    assert dump(db_path) == expected
+
+
+def test_missing_source_artifact(tmp_path, data_dir):
+    build(data_dir, tmp_path / 'full.db')
+    expected = dump(tmp_path / 'full.db')
+
+    # A source processed late is loaded when its file appears, not skipped.
+    processed = data_dir / DATES[2] / 'OpenDataLab/processed-datasets-info.jsonl'
+    processed.rename(tmp_path / 'processed.jsonl')
+    db_path = tmp_path / 'oslm.db'
+    build(data_dir, db_path)
+    status = dict((row[0], row[2]) for row in dump(db_path)['status'])
+    assert status['odl_datasets'] == DATES[1]
+    assert status['baai_datasets'] == DATES[3]
+
+    (tmp_path / 'processed.jsonl').rename(processed)
+    build(data_dir, db_path)
+    assert dump(db_path) == expected